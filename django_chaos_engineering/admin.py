@@ -4,21 +4,34 @@ manage chaos actions through the admin interface.
 
 Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
 """
-from django_chaos_engineering import models
+import typing
+
+from django_chaos_engineering import budget, models
 from django.contrib import admin
 from django.contrib.contenttypes.admin import GenericTabularInline
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, Model, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpRequest
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 
 def disable(modeladmin, request, queryset):
     queryset.update(enabled=False)
+    # Updates don't send signals
+    models.ChaosGeneration.objects.bump()
 
 
 disable.short_description = _("Disable selected actions")
 
 
 def enable(modeladmin, request, queryset):
+    budget.reset(queryset.model.model_key, queryset.values_list("pk", flat=True))
     queryset.update(enabled=True)
+    models.ChaosGeneration.objects.bump()
 
 
 enable.short_description = _("Enable selected actions")
@@ -28,8 +41,114 @@ class ChaosKVInline(GenericTabularInline):
     model = models.ChaosKV
 
 
-class ChaosActionResponseAdmin(admin.ModelAdmin):
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator that avoids counting all rows of large tables.
+
+    Unfiltered changelists on PostgreSQL use the planner's row estimate once it
+    exceeds `estimate_threshold`, everything else is counted without the
+    annotations of the changelist.
+    """
+
+    estimate_threshold = 10000
+
+    def _get_estimate(self) -> typing.Optional[int]:
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql" or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self._get_estimate()
+        if estimate is not None and estimate > self.estimate_threshold:
+            return estimate
+        return self.object_list.values("pk").order_by().count()
+
+
+def count_related(model: typing.Type[Model], attr: str) -> Coalesce:
+    """
+    Count the related objects of actions with a correlated subquery.
+
+    Unlike `Count()` over joins this doesn't multiply rows when several
+    relations are counted.
+
+    :param model: The action model
+    :param attr: `chaos_kvs`, `for_users` or `for_groups`
+    """
+    if attr == "chaos_kvs":
+        related = models.ChaosKV.objects.filter(
+            content_type=ContentType.objects.get_for_model(model)
+        )
+        source = "object_id"
+    else:
+        field = model._meta.get_field(attr)
+        related = field.remote_field.through.objects.all()
+        source = field.m2m_field_name()
+    counts = (
+        related.filter(**{source: OuterRef("pk")})
+        .order_by()
+        .values(source)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class ChaosActionAdmin(admin.ModelAdmin):
+    """
+    Shared configuration of the action admins.
+    """
+
     inlines = [ChaosKVInline]
+    list_filter = ["verb", "enabled", "ctime", "on_host"]
+    actions = [disable, enable]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                kv_count=count_related(self.model, "chaos_kvs"),
+                user_count=count_related(self.model, "for_users"),
+                group_count=count_related(self.model, "for_groups"),
+            )
+        )
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet) -> None:
+        # Bump the generation once, not for every deleted action and KV
+        with models.ChaosGeneration.objects.deferred():
+            super().delete_queryset(request, queryset)
+
+    def kv_count(self, obj: models.ChaosActionBase) -> int:
+        return obj.kv_count
+
+    kv_count.short_description = _("KVs")
+    kv_count.admin_order_field = "kv_count"
+
+    def user_count(self, obj: models.ChaosActionBase) -> int:
+        return obj.user_count
+
+    user_count.short_description = _("Users")
+    user_count.admin_order_field = "user_count"
+
+    def group_count(self, obj: models.ChaosActionBase) -> int:
+        return obj.group_count
+
+    group_count.short_description = _("Groups")
+    group_count.admin_order_field = "group_count"
+
+
+class ChaosActionResponseAdmin(ChaosActionAdmin):
     search_fields = ["act_on_url_name"]
     list_display = [
         "pk",
@@ -37,19 +156,22 @@ class ChaosActionResponseAdmin(admin.ModelAdmin):
         "act_on_url_name",
         "enabled",
         "probability",
+        "kv_count",
+        "user_count",
+        "group_count",
+        "evaluations",
+        "firings",
+        "injected_ms",
         "ctime",
         "mtime",
     ]
-    list_filter = ["verb", "enabled", "ctime", "on_host"]
-    actions = [disable, enable]
 
 
 admin.site.register(models.ChaosActionResponse, ChaosActionResponseAdmin)
 
 
-class ChaosActionDBAdmin(admin.ModelAdmin):
-    inlines = [ChaosKVInline]
-    search_fields = ["act_on_url_name"]
+class ChaosActionDBAdmin(ChaosActionAdmin):
+    search_fields = ["act_on_value", "act_on_attribute"]
     list_display = [
         "pk",
         "verb",
@@ -57,11 +179,96 @@ class ChaosActionDBAdmin(admin.ModelAdmin):
         "act_on_value",
         "enabled",
         "probability",
+        "kv_count",
+        "user_count",
+        "group_count",
+        "evaluations",
+        "firings",
+        "injected_ms",
         "ctime",
         "mtime",
     ]
-    list_filter = ["verb", "enabled", "ctime", "on_host"]
-    actions = [disable, enable]
 
 
 admin.site.register(models.ChaosActionDB, ChaosActionDBAdmin)
+
+
+class ChaosActionCacheAdmin(ChaosActionAdmin):
+    search_fields = ["act_on_prefix", "act_on_cache"]
+    list_display = [
+        "pk",
+        "verb",
+        "act_on_cache",
+        "act_on_prefix",
+        "enabled",
+        "probability",
+        "kv_count",
+        "evaluations",
+        "firings",
+        "injected_ms",
+        "ctime",
+        "mtime",
+    ]
+
+
+admin.site.register(models.ChaosActionCache, ChaosActionCacheAdmin)
+
+
+class ChaosActionStorageAdmin(ChaosActionAdmin):
+    list_filter = ChaosActionAdmin.list_filter + ["act_on_method"]
+    search_fields = ["act_on_prefix"]
+    list_display = [
+        "pk",
+        "verb",
+        "act_on_method",
+        "act_on_prefix",
+        "enabled",
+        "probability",
+        "kv_count",
+        "evaluations",
+        "firings",
+        "injected_ms",
+        "ctime",
+        "mtime",
+    ]
+
+
+admin.site.register(models.ChaosActionStorage, ChaosActionStorageAdmin)
+
+
+class ChaosActionEmailAdmin(ChaosActionAdmin):
+    search_fields = ["act_on_recipient"]
+    list_display = [
+        "pk",
+        "verb",
+        "act_on_recipient",
+        "enabled",
+        "probability",
+        "kv_count",
+        "evaluations",
+        "firings",
+        "injected_ms",
+        "ctime",
+        "mtime",
+    ]
+
+
+admin.site.register(models.ChaosActionEmail, ChaosActionEmailAdmin)
+
+
+class ChaosEventAdmin(admin.ModelAdmin):
+    list_display = [
+        "ctime",
+        "model",
+        "action_id",
+        "verb",
+        "target",
+        "injected_ms",
+        "host",
+    ]
+    list_filter = ["model", "verb", "host", "ctime"]
+    search_fields = ["target"]
+    date_hierarchy = "ctime"
+
+
+admin.site.register(models.ChaosEvent, ChaosEventAdmin)
@@ -1,6 +1,59 @@
+import logging
+import os
+import sys
+import typing
+
 from django.apps import AppConfig
+from django.db import DatabaseError, connections
 from django.utils.translation import gettext_lazy as _
 
+from django_chaos_engineering.telemetry import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+#: Management commands that serve requests, the warmup runs for them
+serving_commands = ["runserver"]
+
+
+def is_management_command(argv: typing.Optional[typing.List[str]] = None) -> bool:
+    """
+    If the process runs a management command other than a server, like
+    `migrate` or `test`.
+
+    :param argv: The command line, `sys.argv` by default
+    """
+    argv = sys.argv if argv is None else argv
+    if not argv:
+        return False
+    program = os.path.basename(argv[0])
+    if program == "__main__.py":
+        # python -m django, but not servers like python -m gunicorn
+        if os.path.basename(os.path.dirname(argv[0])) != "django":
+            return False
+    elif program not in ("manage.py", "django-admin", "django-admin.py"):
+        return False
+    return len(argv) < 2 or argv[1] not in serving_commands
+
 
 class ChaosConfig(AppConfig):
-    name = _("chaos")
+    name = "django_chaos_engineering"
+    verbose_name = _("chaos")
+
+    def ready(self) -> None:
+        """
+        Warm the chaos state when the `warmup` setting is enabled, unless a
+        management command runs.
+        """
+        if not get_setting("warmup", False) or is_management_command():
+            return
+        from django_chaos_engineering.snapshot import warmup
+
+        try:
+            warmup()
+        except DatabaseError:
+            logger.warning("Chaos warmup failed, is the database migrated?")
+        finally:
+            # Forked workers must not share the connections of a preloading
+            # master process
+            connections.close_all()
@@ -0,0 +1,72 @@
+"""
+Injection budgets shared by all worker processes.
+
+Actions can limit how often they fire and how much delay they inject. The
+spent budget is counted in a Django cache, its `incr` is atomic across
+processes for shared backends like memcached or redis. The local memory cache
+only counts per process.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import typing
+
+from django.core.cache import BaseCache, caches
+
+from django_chaos_engineering.telemetry import get_setting
+
+
+#: Budget of fired injections
+kind_injections = "injections"
+#: Budget of injected delay in milliseconds
+kind_injected_ms = "injected_ms"
+
+kinds = (kind_injections, kind_injected_ms)
+
+
+def get_cache() -> BaseCache:
+    """
+    The cache configured by the `budget_cache` setting.
+    """
+    return caches[get_setting("budget_cache", "default")]
+
+
+def get_key(model: str, action_id: int, kind: str) -> str:
+    return "chaos:budget:{}:{}:{}".format(model, action_id, kind)
+
+
+def spend(model: str, action_id: int, kind: str, amount: int = 1) -> int:
+    """
+    Atomically add to the spent budget of an action.
+
+    :param model: The action model, see `models.model_choices`
+    :param action_id: The action's primary key
+    :param kind: One of `kinds`
+    :param amount: The amount to add
+    :returns: The spent budget, including the amount
+    """
+    cache = get_cache()
+    key = get_key(model, action_id, kind)
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        # The key doesn't exist, unless another process just added it
+        if cache.add(key, amount, timeout=None):
+            return amount
+        return cache.incr(key, amount)
+
+
+def spent(model: str, action_id: int, kind: str) -> int:
+    """
+    The spent budget of an action.
+    """
+    return get_cache().get(get_key(model, action_id, kind), 0)
+
+
+def reset(model: str, action_ids: typing.Iterable[int]) -> None:
+    """
+    Forget the spent budgets of actions.
+    """
+    get_cache().delete_many(
+        [get_key(model, action_id, kind) for action_id in action_ids for kind in kinds]
+    )
@@ -0,0 +1,462 @@
+"""
+Bulk (de)serialization of chaos actions.
+
+Actions are represented as plain dictionaries, called records, so they can be
+stored as JSON or YAML. A record looks like this:
+
+.. code-block:: python
+
+    {
+        "model": "response",
+        "key": "checkout-slow",
+        "verb": "slow",
+        "act_on_url_name": "checkout",
+        "probability": 10,
+        "enabled": True,
+        "on_host": "",
+        "config": {"slow_min": 1000, "slow_max": 3000},
+        "users": ["alice"],
+        "groups": ["testers"],
+    }
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import json
+import typing
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from django_chaos_engineering import budget, models
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+
+#: Version of the file format
+format_version = 1
+
+#: Identifies snapshot files
+snapshot_format = "django_chaos_engineering"
+
+#: Objects per query for bulk inserts and updates
+batch_size = 500
+
+#: Relations needed to serialize actions
+prefetch_fields = ("chaos_kvs", "for_users", "for_groups")
+
+
+def read_file(path: str) -> typing.List[dict]:
+    """
+    Read records from a JSON or YAML file.
+
+    The file contains either a list of records, or a mapping with the records
+    in its `actions` key.
+
+    :param path: The file path, `.yml` and `.yaml` files are parsed as YAML
+    :returns: The records
+    """
+    with open(path) as fh:
+        if path.endswith((".yml", ".yaml")):
+            if yaml is None:
+                raise ValidationError(_("Install PyYAML to import YAML files"))
+            try:
+                data = yaml.safe_load(fh)
+            except yaml.YAMLError as e:
+                raise ValidationError(str(e))
+        else:
+            data = json.load(fh)
+    if isinstance(data, dict):
+        data = data.get("actions", [])
+    if not isinstance(data, list):
+        raise ValidationError(_("Expected a list of actions"))
+    return data
+
+
+def iter_actions(
+    queryset: QuerySet, prefetch: bool = True, chunk_size: int = batch_size
+) -> typing.Iterator[models.ChaosActionBase]:
+    """
+    Stream the actions of a queryset in primary key order.
+
+    Actions are fetched in chunks, with KVs and targeting prefetched per chunk.
+    `QuerySet.iterator()` can't be used, it ignores `prefetch_related` before
+    Django 4.1.
+
+    :param queryset: The actions
+    :param prefetch: Prefetch the KVs and targeting of the actions
+    :param chunk_size: Number of actions per query
+    """
+    queryset = queryset.order_by("pk")
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch_fields)
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        for action in chunk:
+            yield action
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1].pk
+
+
+def action_to_record(
+    action: models.ChaosActionBase, with_id: bool = False, stats: bool = False
+) -> dict:
+    """
+    Serialize an action.
+
+    Use `iter_actions` or `prefetch_related(*prefetch_fields)` when serializing
+    many actions.
+
+    :param action: The action
+    :param with_id: Include the action's id
+    :param stats: Include the action's counters
+    """
+    record = OrderedDict()  # type: typing.Dict[str, typing.Any]
+    if with_id:
+        record["id"] = action.pk
+    record["model"] = action.model_key
+    record["key"] = action.external_key
+    for field in action.record_fields:
+        record[field] = getattr(action, field)
+    record["probability"] = str(action.probability)
+    record["config"] = OrderedDict((kv.key, kv.value) for kv in action.chaos_kvs.all())
+    record["users"] = [user.username for user in action.for_users.all()]
+    record["groups"] = [group.name for group in action.for_groups.all()]
+    if stats:
+        for field in ("evaluations", "firings", "injected_ms"):
+            record[field] = getattr(action, field)
+    return record
+
+
+def _get_ids(cls, lookup: str, records: typing.List[dict], attr: str) -> dict:
+    """
+    Map user or group names used by the records to their ids, in one query.
+    """
+    names = {name for record in records for name in record.get(attr, [])}
+    if not names:
+        return {}
+    ids = dict(cls.objects.filter(**{lookup + "__in": names}).values_list(lookup, "pk"))
+    missing = names - set(ids)
+    if missing:
+        raise ValidationError(
+            _("Unknown {}: {}").format(attr, ", ".join(sorted(missing)))
+        )
+    return ids
+
+
+def _make_action(cls, record: dict, replace: bool) -> models.ChaosActionBase:
+    if replace:
+        if not record.get("id"):
+            raise ValidationError(_("Action without id: {}").format(record))
+        action = cls(pk=record["id"], external_key=record.get("key") or None)
+    else:
+        if not record.get("key"):
+            raise ValidationError(_("Action without key: {}").format(record))
+        action = cls(external_key=record["key"])
+    for field in cls.record_fields:
+        if field in record:
+            setattr(action, field, record[field])
+    try:
+        action.full_clean(validate_unique=False)
+        # The KVs are inserted in bulk, without their own validation
+        for key, value in record.get("config", {}).items():
+            models.ChaosKV(key=key, value=str(value)).full_clean(
+                exclude=["content_type", "object_id"]
+            )
+    except ValidationError as e:
+        raise ValidationError(_("Invalid action {}: {}").format(record, e))
+    return action
+
+
+def _set_relations(
+    cls, records: typing.List[dict], pks: typing.List[int], names: dict
+) -> None:
+    """
+    Replace the KVs and user/group targeting of the actions with bulk queries.
+
+    :param records: The records
+    :param pks: The primary keys of the records' actions
+    :param names: User and group ids by name
+    """
+    content_type = ContentType.objects.get_for_model(cls)
+    models.ChaosKV.objects.filter(content_type=content_type, object_id__in=pks).delete()
+    models.ChaosKV.objects.bulk_create(
+        [
+            models.ChaosKV(
+                content_type=content_type, object_id=pk, key=key, value=str(value)
+            )
+            for record, pk in zip(records, pks)
+            for key, value in record.get("config", {}).items()
+        ],
+        batch_size=batch_size,
+    )
+    for attr in ("users", "groups"):
+        field = cls._meta.get_field("for_" + attr)
+        through = field.remote_field.through
+        source = field.m2m_field_name() + "_id"
+        target = field.m2m_reverse_field_name() + "_id"
+        through.objects.filter(**{source + "__in": pks}).delete()
+        through.objects.bulk_create(
+            [
+                through(**{source: pk, target: names[attr][name]})
+                for record, pk in zip(records, pks)
+                for name in record.get(attr, [])
+            ],
+            batch_size=batch_size,
+        )
+
+
+def _get_pks(cls, keys: typing.List[str]) -> typing.Dict[str, int]:
+    return dict(
+        cls.objects.filter(external_key__in=keys)
+        .order_by()
+        .values_list("external_key", "pk")
+    )
+
+
+def _load_model(
+    cls, records: typing.List[dict], names: dict, replace: bool
+) -> typing.Tuple[int, int, typing.List[int]]:
+    """
+    :returns: The number of created and updated actions, and the primary keys
+              of the created or enabled actions, which need a fresh budget
+    """
+    actions = [_make_action(cls, record, replace) for record in records]
+    if replace:
+        cls.objects.bulk_create(actions, batch_size=batch_size)
+        pks = [action.pk for action in actions]
+        _set_relations(cls, records, pks, names)
+        return len(actions), 0, pks
+    keys = [action.external_key for action in actions]
+    if len(set(keys)) != len(keys):
+        raise ValidationError(_("Duplicate action keys"))
+    existing = _get_pks(cls, keys)
+    disabled = set(
+        cls.objects.filter(pk__in=existing.values(), enabled=False).values_list(
+            "pk", flat=True
+        )
+    )
+    created = [action for action in actions if action.external_key not in existing]
+    updated = [action for action in actions if action.external_key in existing]
+    now = timezone.now()
+    for action in updated:
+        action.pk = existing[action.external_key]
+        action.mtime = now
+    cls.objects.bulk_create(created, batch_size=batch_size)
+    cls.objects.bulk_update(
+        updated, list(cls.record_fields) + ["mtime"], batch_size=batch_size
+    )
+    # Not all databases return primary keys from bulk inserts
+    pks = _get_pks(cls, keys)
+    _set_relations(cls, records, [pks[key] for key in keys], names)
+    fresh = [
+        pks[key]
+        for key, action in zip(keys, actions)
+        if action.enabled and (key not in existing or existing[key] in disabled)
+    ]
+    return len(created), len(updated), fresh
+
+
+def _reset_sequences() -> None:
+    """
+    Actions inserted with explicit primary keys don't advance the sequences
+    of some databases.
+    """
+    sql = connection.ops.sequence_reset_sql(
+        no_style(), list(models.action_models.values())
+    )
+    with connection.cursor() as cursor:
+        for statement in sql:
+            cursor.execute(statement)
+
+
+def load_records(
+    records: typing.List[dict], replace: bool = False
+) -> typing.Tuple[int, int]:
+    """
+    Create or update actions from records, in a single transaction.
+
+    Actions are identified by the record's `key`, so loading the same records
+    twice doesn't create duplicates. The KVs and targeting of updated actions
+    are replaced by the ones from the record.
+
+    The configuration generation is bumped once for all changes. Created and
+    enabled actions get a fresh budget.
+
+    :param records: The records
+    :param replace: Delete all existing actions and create the records with
+                    their `id`, used to replay snapshots
+    :returns: The number of created and updated actions
+    :raises ValidationError: For invalid records, nothing is saved then
+    """
+    by_model = OrderedDict(
+        (key, []) for key in models.action_models
+    )  # type: typing.Dict[str, typing.List[dict]]
+    for record in records:
+        model = record.get("model")
+        if model not in by_model:
+            raise ValidationError(_("Unknown action model {}").format(model))
+        by_model[model].append(record)
+    names = {
+        "users": _get_ids(User, "username", records, "users"),
+        "groups": _get_ids(Group, "name", records, "groups"),
+    }
+    created = updated = 0
+    fresh = {}  # type: typing.Dict[str, typing.List[int]]
+    with transaction.atomic(), models.ChaosGeneration.objects.deferred():
+        if replace:
+            for cls in models.action_models.values():
+                cls.objects.all().delete()
+        for model, model_records in by_model.items():
+            if model_records:
+                c, u, fresh[model] = _load_model(
+                    models.action_models[model], model_records, names, replace
+                )
+                created += c
+                updated += u
+        if replace:
+            _reset_sequences()
+        models.ChaosGeneration.objects.bump()
+    # Replayed actions reuse primary keys, and enabled actions start over
+    for model, pks in fresh.items():
+        budget.reset(model, pks)
+    return created, updated
+
+
+def create_storm(
+    users: typing.List[int],
+    groups: typing.List[int],
+    active_until: datetime,
+    probabilities: typing.Dict[str, float],
+) -> typing.Tuple[str, int]:
+    """
+    Create wildcard actions for every verb of every action model.
+
+    The actions are inserted with one bulk query per model, the user and group
+    targeting with one bulk query per relation. All actions share a new storm
+    id, so they can be found and deleted without any joins.
+
+    :param users: Ids of the targeted users
+    :param groups: Ids of the targeted groups
+    :param active_until: The end time of the storm
+    :param probabilities: Probability of the actions, by action model
+    :returns: The storm id and the number of created actions
+    """
+    storm_id = uuid.uuid4().hex
+    count = 0
+    with transaction.atomic(), models.ChaosGeneration.objects.deferred():
+        for key, cls in models.action_models.items():
+            if not cls.storm_verbs:
+                continue
+            actions = [
+                cls(
+                    verb=verb,
+                    probability=probabilities[key],
+                    storm_id=storm_id,
+                    active_until=active_until,
+                    **cls.storm_defaults
+                )
+                for verb in cls.storm_verbs
+            ]
+            cls.objects.bulk_create(actions, batch_size=batch_size)
+            pks = list(
+                cls.objects.filter(storm_id=storm_id).values_list("pk", flat=True)
+            )
+            for attr, ids in (("users", users), ("groups", groups)):
+                field = cls._meta.get_field("for_" + attr)
+                through = field.remote_field.through
+                source = field.m2m_field_name() + "_id"
+                target = field.m2m_reverse_field_name() + "_id"
+                through.objects.bulk_create(
+                    [through(**{source: pk, target: i}) for pk in pks for i in ids],
+                    batch_size=batch_size,
+                )
+            count += len(pks)
+        models.ChaosGeneration.objects.bump()
+    return storm_id, count
+
+
+def delete_storms(expired_before: typing.Optional[datetime] = None) -> int:
+    """
+    Delete storm actions.
+
+    :param expired_before: Only delete actions of storms that ended before
+                           this time, default is to delete all storm actions
+    :returns: The number of deleted actions
+    """
+    count = 0
+    with transaction.atomic(), models.ChaosGeneration.objects.deferred():
+        for cls in models.action_models.values():
+            actions = cls.objects.exclude(storm_id="")
+            if expired_before is not None:
+                actions = actions.filter(active_until__lt=expired_before)
+            count += actions.delete()[1].get(cls._meta.label, 0)
+    return count
+
+
+def write_snapshot(fh: typing.TextIO) -> int:
+    """
+    Write all actions as a snapshot in the JSON lines format.
+
+    The first line is a header with the format version and the configuration
+    generation, every other line is an action record.
+
+    :param fh: A writable text file
+    :returns: The number of written actions
+    """
+    generation, token = models.ChaosGeneration.objects.current()
+    header = OrderedDict(
+        [
+            ("format", snapshot_format),
+            ("version", format_version),
+            ("generation", generation),
+            ("exported", timezone.now()),
+        ]
+    )
+    fh.write(_dump_json(header))
+    count = 0
+    for cls in models.action_models.values():
+        for action in iter_actions(cls.objects.all()):
+            fh.write(_dump_json(action_to_record(action, with_id=True)))
+            count += 1
+    return count
+
+
+def read_snapshot(fh: typing.TextIO) -> typing.Tuple[dict, typing.List[dict]]:
+    """
+    Read a snapshot written by `write_snapshot`.
+
+    :param fh: A readable text file
+    :returns: The snapshot header and the action records
+    """
+    try:
+        header = json.loads(fh.readline())
+        records = [json.loads(line) for line in fh if line.strip()]
+    except ValueError as e:
+        raise ValidationError(str(e))
+    if not isinstance(header, dict) or header.get("format") != snapshot_format:
+        raise ValidationError(_("Not a chaos snapshot"))
+    if header.get("version") != format_version:
+        raise ValidationError(
+            _("Unsupported snapshot version {}").format(header.get("version"))
+        )
+    return header, records
+
+
+def _dump_json(data: dict) -> str:
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
@@ -0,0 +1,151 @@
+"""
+A cache backend that wraps another configured cache and applies cache chaos
+actions to it:
+
+.. code-block:: python
+
+    CACHES = {
+        "real": {"BACKEND": "django.core.cache.backends.memcached.MemcachedCache"},
+        "default": {
+            "BACKEND": "django_chaos_engineering.cache.ChaosCacheBackend",
+            "LOCATION": "real",
+        },
+    }
+
+The location is the alias of the wrapped cache. Actions match the keys passed
+to the cache, before the wrapped cache adds its own prefix and version. Keys
+starting with `chaos:` are used by `django_chaos_engineering` itself and are
+never acted on.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import typing
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils import timezone
+
+from django_chaos_engineering import models
+from django_chaos_engineering.snapshot import Snapshot, get_snapshot
+
+
+#: Keys of `django_chaos_engineering` itself, like injection budgets
+reserved_prefix = "chaos:"
+
+
+class ChaosCacheBackend(BaseCache):
+    """
+    Wraps the cache in `LOCATION`.
+
+    Reads of keys with a firing `miss` action return nothing, writes and
+    deletes of keys with a firing `stale` action are dropped. `slow` and
+    `raise` actions act on every operation.
+    """
+
+    def __init__(self, location: str, params: dict) -> None:
+        super().__init__(params)
+        self.alias = location
+
+    @property
+    def cache(self) -> BaseCache:
+        # The cache handler keeps one connection per thread
+        return caches[self.alias]
+
+    def _fired(self, snapshot: Snapshot, key: str) -> typing.Set[str]:
+        """
+        Perform the actions for a key.
+
+        :returns: The verbs of the actions that fired
+        """
+        if key.startswith(reserved_prefix):
+            return set()
+        return {
+            action.verb
+            for action in snapshot.for_cache(self.alias, key, timezone.now())
+            if action.perform(target=key)
+        }
+
+    def _missed(self, key: str) -> bool:
+        return models.verb_miss in self._fired(get_snapshot(), key)
+
+    def _stale(self, key: str) -> bool:
+        return models.verb_stale in self._fired(get_snapshot(), key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._stale(key):
+            return True
+        return self.cache.add(key, value, timeout=timeout, version=version)
+
+    def get(self, key, default=None, version=None):
+        if self._missed(key):
+            return default
+        return self.cache.get(key, default=default, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._stale(key):
+            return None
+        return self.cache.set(key, value, timeout=timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._stale(key):
+            return True
+        return self.cache.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        if self._stale(key):
+            return True
+        return self.cache.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self._missed(key):
+            return False
+        return self.cache.has_key(key, version=version)
+
+    def get_many(self, keys, version=None):
+        snapshot = get_snapshot()
+        keys = [
+            key for key in keys if models.verb_miss not in self._fired(snapshot, key)
+        ]
+        if not keys:
+            return {}
+        return self.cache.get_many(keys, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        snapshot = get_snapshot()
+        data = {
+            key: value
+            for key, value in data.items()
+            if models.verb_stale not in self._fired(snapshot, key)
+        }
+        if not data:
+            return []
+        return self.cache.set_many(data, timeout=timeout, version=version)
+
+    def delete_many(self, keys, version=None):
+        snapshot = get_snapshot()
+        keys = [
+            key for key in keys if models.verb_stale not in self._fired(snapshot, key)
+        ]
+        if keys:
+            self.cache.delete_many(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._fired(get_snapshot(), key)
+        return self.cache.incr(key, delta=delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._fired(get_snapshot(), key)
+        return self.cache.decr(key, delta=delta, version=version)
+
+    def incr_version(self, key, delta=1, version=None):
+        return self.cache.incr_version(key, delta=delta, version=version)
+
+    def decr_version(self, key, delta=1, version=None):
+        return self.cache.decr_version(key, delta=delta, version=version)
+
+    def clear(self):
+        return self.cache.clear()
+
+    def close(self, **kwargs):
+        self.cache.close(**kwargs)
@@ -1,3 +1,6 @@
+from smtplib import SMTPException
+
+
 class ChaosException(Exception):
     """
     Base chaos exception.
@@ -14,3 +17,21 @@ class ChaosExceptionDB(ChaosException):
     """
     Fallback exception for database actions.
     """
+
+
+class ChaosExceptionCache(ChaosException, ConnectionError):
+    """
+    Fallback exception for cache actions, like a lost cache server.
+    """
+
+
+class ChaosExceptionStorage(ChaosException, OSError):
+    """
+    Fallback exception for storage actions, like a failing disk.
+    """
+
+
+class ChaosExceptionEmail(ChaosException, SMTPException):
+    """
+    Fallback exception for email actions, like a refusing mail server.
+    """
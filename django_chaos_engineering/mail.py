@@ -0,0 +1,90 @@
+"""
+An email backend that wraps another backend and applies email chaos actions to
+every sent message. The wrapped backend is set with the `email_backend`
+setting, the default is the SMTP backend:
+
+.. code-block:: python
+
+    EMAIL_BACKEND = "django_chaos_engineering.mail.ChaosEmailBackend"
+    CHAOS = {"email_backend": "django.core.mail.backends.smtp.EmailBackend"}
+
+Messages are delayed one by one. When an action raises for a message, the
+messages before it are still sent, like a mail server that fails in the middle
+of a batch. With `fail_silently` the failing messages are skipped instead.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import typing
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from django_chaos_engineering.snapshot import get_snapshot
+from django_chaos_engineering.telemetry import get_setting
+
+
+#: The wrapped backend without an `email_backend` setting
+default_email_backend = "django.core.mail.backends.smtp.EmailBackend"
+
+
+class ChaosEmailBackend(BaseEmailBackend):
+    """
+    Wraps the email backend of the `email_backend` setting.
+    """
+
+    def __init__(
+        self,
+        fail_silently: bool = False,
+        wrapped_backend: typing.Optional[str] = None,
+        **kwargs
+    ) -> None:
+        """
+        :param wrapped_backend: The wrapped backend, overrides the setting
+        :param kwargs: Arguments for the wrapped backend
+        """
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(
+            wrapped_backend or get_setting("email_backend", default_email_backend),
+            fail_silently=fail_silently,
+            **kwargs
+        )
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def _perform(self, message: EmailMessage) -> None:
+        """
+        Perform the actions for a message.
+
+        :raises: The exceptions of raise actions
+        """
+        recipients = message.recipients()
+        target = ", ".join(recipients)
+        for action in get_snapshot().for_email(recipients, timezone.now()):
+            action.perform(target=target)
+
+    def send_messages(self, email_messages):
+        """
+        Send the messages that survive the chaos actions.
+
+        :returns: The number of sent messages
+        """
+        passed = []
+        for message in email_messages:
+            try:
+                self._perform(message)
+            except Exception:
+                if not self.fail_silently:
+                    if passed:
+                        self.backend.send_messages(passed)
+                    raise
+                continue
+            passed.append(message)
+        if not passed:
+            return 0
+        return self.backend.send_messages(passed)
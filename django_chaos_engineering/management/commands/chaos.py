@@ -2,23 +2,30 @@
 Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
 """
 
+import json
+import time
+from datetime import timedelta
 from itertools import chain
 
+from django.conf import settings
 from django.contrib.auth.models import User, Group
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.management.base import BaseCommand, CommandError
-from django.urls import reverse
+from django.urls import ResolverMatch, resolve, reverse
 from django.urls import exceptions
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
-from django_chaos_engineering import mock_data, models
+from django_chaos_engineering import bulk, matchers, mock_data, models, snapshot
+from django_chaos_engineering.telemetry import get_setting
 
 
-#: For KV key for special actions
-STORM_KEY = "creator"
-#: For KV value for special actions
-STORM_VALUE = "storm"
+#: Default storm duration in minutes
+default_storm_duration = 60
 
-STORM_ENABLED = False
+#: Output formats of the list command
+output_formats = ["text", "json", "jsonl"]
 
 
 class Command(BaseCommand):
@@ -46,7 +53,14 @@ class Command(BaseCommand):
         parser_create_response.add_argument(
             "url_name",
             type=str,
-            help=_("Url (by name) to act on"),
+            help=_("Url (by name) to act on, or a pattern"),
+        )
+        parser_create_response.add_argument(
+            "--url-match",
+            choices=matchers.url_match_choices_str,
+            default=matchers.url_match_exact,
+            type=str,
+            help=_("How the url name is matched"),
         )
         parser_create_response.add_argument(
             "--create-kv",
@@ -78,6 +92,12 @@ class Command(BaseCommand):
             type=str,
             help=_("The model attribute to match"),
         )
+        parser_create_db.add_argument(
+            "--alias",
+            default="",
+            type=str,
+            help=_("The database alias to match, default is any"),
+        )
         parser_create_db.add_argument(
             "--create-kv",
             type=str,
@@ -88,6 +108,87 @@ class Command(BaseCommand):
             metavar=("keyword", "value"),
         )
 
+        parser_create_cache = subparsers.add_parser("create_cache")
+        parser_create_cache.set_defaults(command="create_cache")
+        parser_create_cache.add_argument(
+            "verb",
+            type=str,
+            choices=models.ChaosActionCache.verb_choices_str,
+            help=_("The action's effect"),
+        )
+        parser_create_cache.add_argument(
+            "prefix",
+            type=str,
+            help=_("The cache key prefix to match, empty for any"),
+        )
+        parser_create_cache.add_argument(
+            "--cache",
+            default="",
+            type=str,
+            help=_("The alias of the wrapped cache to match, default is any"),
+        )
+        parser_create_cache.add_argument(
+            "--create-kv",
+            type=str,
+            nargs=2,
+            action="append",
+            help=_("KVs for the created action, see the documentation"),
+            default=list(),
+            metavar=("keyword", "value"),
+        )
+
+        parser_create_storage = subparsers.add_parser("create_storage")
+        parser_create_storage.set_defaults(command="create_storage")
+        parser_create_storage.add_argument(
+            "verb",
+            type=str,
+            choices=models.ChaosActionStorage.verb_choices_str,
+            help=_("The action's effect"),
+        )
+        parser_create_storage.add_argument(
+            "prefix",
+            type=str,
+            help=_("The file name prefix to match, empty for any"),
+        )
+        parser_create_storage.add_argument(
+            "--method",
+            choices=models.ChaosActionStorage.method_choices_str,
+            type=str,
+            help=_("The storage method to match, default is any"),
+        )
+        parser_create_storage.add_argument(
+            "--create-kv",
+            type=str,
+            nargs=2,
+            action="append",
+            help=_("KVs for the created action, see the documentation"),
+            default=list(),
+            metavar=("keyword", "value"),
+        )
+
+        parser_create_email = subparsers.add_parser("create_email")
+        parser_create_email.set_defaults(command="create_email")
+        parser_create_email.add_argument(
+            "verb",
+            type=str,
+            choices=models.ChaosActionEmail.verb_choices_str,
+            help=_("The action's effect"),
+        )
+        parser_create_email.add_argument(
+            "recipient",
+            type=str,
+            help=_("The end of the recipient addresses to match, empty for any"),
+        )
+        parser_create_email.add_argument(
+            "--create-kv",
+            type=str,
+            nargs=2,
+            action="append",
+            help=_("KVs for the created action, see the documentation"),
+            default=list(),
+            metavar=("keyword", "value"),
+        )
+
         parser_list = subparsers.add_parser("list")
         parser_list.set_defaults(command="list")
         parser_list.add_argument("--verb", type=str, help=_("Filter by verb"))
@@ -105,6 +206,21 @@ class Command(BaseCommand):
         parser_list.add_argument(
             "--excess", "-e", action="store_true", help=_("Dump excessive data")
         )
+        parser_list.add_argument(
+            "--enabled", action="store_true", help=_("Only list enabled actions")
+        )
+        parser_list.add_argument("--host", type=str, help=_("Filter by host"))
+        parser_list.add_argument(
+            "--url",
+            type=str,
+            help=_("Filter by the url name actions fire on, implies response actions"),
+        )
+        parser_list.add_argument(
+            "--format",
+            choices=output_formats,
+            default=output_formats[0],
+            help=_("Output format"),
+        )
 
         parser_dump = subparsers.add_parser("dump")
         parser_dump.set_defaults(command="dump")
@@ -120,7 +236,44 @@ class Command(BaseCommand):
             "--excess", action="store_true", help=_("Dump excessive data")
         )
 
-        if STORM_ENABLED is True:
+        parser_import = subparsers.add_parser("import")
+        parser_import.set_defaults(command="import")
+        parser_import.add_argument(
+            "file",
+            type=str,
+            help=_("JSON or YAML file with actions, see the documentation"),
+        )
+
+        parser_export = subparsers.add_parser("export")
+        parser_export.set_defaults(command="export")
+        parser_export.add_argument(
+            "file",
+            type=str,
+            nargs="?",
+            help=_("Snapshot file, default is stdout"),
+        )
+
+        parser_replay = subparsers.add_parser("replay")
+        parser_replay.set_defaults(command="replay")
+        parser_replay.add_argument(
+            "file", type=str, help=_("Snapshot file written by export")
+        )
+
+        parser_publish = subparsers.add_parser("publish")
+        parser_publish.set_defaults(command="publish")
+        parser_publish.add_argument(
+            "file",
+            type=str,
+            nargs="?",
+            help=_("Snapshot file, default is the snapshot_file setting"),
+        )
+        parser_publish.add_argument(
+            "--interval",
+            type=float,
+            help=_("Keep publishing changes, checking every INTERVAL seconds"),
+        )
+
+        if getattr(settings, "CHAOS", {}).get("storm", False):
             parser_storm = subparsers.add_parser("storm")
             parser_storm.set_defaults(command="storm")
             parser_storm.add_argument(
@@ -128,14 +281,14 @@ class Command(BaseCommand):
                 nargs="+",
                 type=str,
                 help=_("The users to have a party for"),
-                default=User.objects.none(),
+                default=[],
             )
             parser_storm.add_argument(
                 "--groups",
                 nargs="+",
                 type=str,
                 help=_("The groups to have a party for"),
-                default=Group.objects.none(),
+                default=[],
             )
             parser_storm.add_argument(
                 "--end", action="store_true", help=_("Delete existing storm actions")
@@ -143,87 +296,248 @@ class Command(BaseCommand):
             parser_storm.add_argument(
                 "--probability", type=int, help=_("Probability %% of created actions")
             )
+            parser_storm.add_argument(
+                "--duration",
+                type=int,
+                help=_("Minutes until the storm ends"),
+                default=getattr(settings, "CHAOS", {}).get(
+                    "storm_duration", default_storm_duration
+                ),
+            )
 
     def handle(self, *args, **options):
-        cmd = options["command"]
-        if cmd == "list":
-            self.list(
-                verb=options["verb"],
-                include_models=options["models"],
-                more=options["more"],
-                excess=options["excess"],
-            )
-        if cmd == "dump":
-            self.dump(
-                model=options["model"],
-                id=options["id"],
-                more=options["more"],
-                excess=options["excess"],
-            )
-        elif cmd == "create_response":
-            self.create_response(
-                options.get("url_name"),
-                options.get("verb"),
-                create_kv=options.get("create_kv", []),
-            )
-        elif cmd == "create_db":
-            config = {}
-            for kv in options.get("create_kv", []):
-                config[kv[0]] = kv[1]
-            self.create(
-                action_type="db",
-                verb=options.get("verb"),
-                act_on_attribute=options.get("attribute"),
-                act_on_value=options.get("value"),
-                config=config,
-            )
-        elif cmd == "storm":
-            if options["end"] is True:
-                self.storm_end()
-            else:
-                self.storm_start(
-                    options["users"], options["groups"], options["probability"]
-                )
+        handlers = {
+            "list": self.handle_list,
+            "dump": self.handle_dump,
+            "create_response": self.handle_create_response,
+            "create_db": self.handle_create_db,
+            "create_cache": self.handle_create_cache,
+            "create_storage": self.handle_create_storage,
+            "create_email": self.handle_create_email,
+            "import": self.handle_import,
+            "export": self.handle_export,
+            "replay": self.handle_replay,
+            "publish": self.handle_publish,
+            "storm": self.handle_storm,
+        }
+        handler = handlers.get(options["command"])
+        if handler is not None:
+            handler(options)
 
-    def create_response(self, url_name, verb, create_kv=None):
-        config = {}
-        create_kv = create_kv or []
-        for kv in create_kv:
-            config[kv[0]] = kv[1]
-        try:
-            reverse(url_name)
-        except exceptions.NoReverseMatch:
-            self.stderr.write(
-                "Could not reverse name {}.. still continuing".format(url_name)
+    @staticmethod
+    def get_config(options):
+        """
+        The action config from the key/value pairs of the create commands.
+        """
+        return {kv[0]: kv[1] for kv in options.get("create_kv") or []}
+
+    def handle_list(self, options):
+        self.list(
+            verb=options["verb"],
+            include_models=options["models"],
+            more=options["more"],
+            excess=options["excess"],
+            enabled=options["enabled"],
+            host=options["host"],
+            url=options["url"],
+            output_format=options["format"],
+        )
+
+    def handle_dump(self, options):
+        self.dump(
+            model=options["model"],
+            id=options["id"],
+            more=options["more"],
+            excess=options["excess"],
+        )
+
+    def handle_create_response(self, options):
+        self.create_response(
+            options.get("url_name"),
+            options.get("verb"),
+            create_kv=options.get("create_kv", []),
+            url_match=options.get("url_match"),
+        )
+
+    def handle_create_db(self, options):
+        self.create(
+            action_type="db",
+            verb=options.get("verb"),
+            act_on_attribute=options.get("attribute"),
+            act_on_value=options.get("value"),
+            act_on_alias=options.get("alias"),
+            config=self.get_config(options),
+        )
+
+    def handle_create_cache(self, options):
+        self.create(
+            action_type="cache",
+            verb=options.get("verb"),
+            act_on_prefix=options.get("prefix"),
+            act_on_cache=options.get("cache"),
+            config=self.get_config(options),
+        )
+
+    def handle_create_storage(self, options):
+        self.create(
+            action_type="storage",
+            verb=options.get("verb"),
+            act_on_prefix=options.get("prefix"),
+            act_on_method=options.get("method"),
+            config=self.get_config(options),
+        )
+
+    def handle_create_email(self, options):
+        self.create(
+            action_type="email",
+            verb=options.get("verb"),
+            act_on_recipient=options.get("recipient"),
+            config=self.get_config(options),
+        )
+
+    def handle_import(self, options):
+        self.import_file(options["file"])
+
+    def handle_export(self, options):
+        self.export(options["file"])
+
+    def handle_replay(self, options):
+        self.replay(options["file"])
+
+    def handle_publish(self, options):
+        self.publish(options["file"], options["interval"])
+
+    def handle_storm(self, options):
+        if options["end"] is True:
+            self.storm_end()
+        else:
+            self.storm_start(
+                options["users"],
+                options["groups"],
+                options["probability"],
+                options["duration"],
             )
+
+    def create_response(self, url_name, verb, create_kv=None, url_match=None):
+        config = self.get_config({"create_kv": create_kv})
+        url_match = url_match or matchers.url_match_exact
+        if url_match == matchers.url_match_exact:
+            try:
+                reverse(url_name)
+            except exceptions.NoReverseMatch:
+                self.stderr.write(
+                    "Could not reverse name {}.. still continuing".format(url_name)
+                )
         self.create(
             action_type="response",
             verb=verb,
             act_on_url_name=url_name,
+            url_match=url_match,
             config=config,
         )
 
-    def list(self, verb, include_models, more=False, excess=False):
-        if "response" in include_models:
-            actions_response = models.ChaosActionResponse.objects.all()
-        else:
-            actions_response = models.ChaosActionResponse.objects.none()
-        if "db" in include_models:
-            actions_db = models.ChaosActionDB.objects.all()
+    def get_list_queryset(self, model, verb=None, enabled=False, host=None, url=None):
+        """
+        Get the actions of a model, filtered in SQL.
+
+        :returns: The queryset, or None if the model can't match the filters
+        """
+        cls = models.action_models[model]
+        queryset = cls.objects.all()
+        if url is not None:
+            if cls is not models.ChaosActionResponse:
+                return None
+            queryset = self.filter_url(queryset, url)
+        if verb:
+            queryset = queryset.filter(verb=verb)
+        if enabled:
+            queryset = queryset.enabled()
+        if host is not None:
+            queryset = queryset.on_host(host)
+        return queryset
+
+    def filter_url(self, queryset, url_name):
+        """
+        Filter response actions by a url name, matched like the middleware does.
+
+        Exact names are filtered in SQL, the other actions are matched in Python.
+        Names that can't be reversed without arguments only match by name.
+
+        :param url_name: The url name, optionally with namespaces
+        """
+        try:
+            path = reverse(url_name)
+            resolver_match = resolve(path)
+        except (exceptions.NoReverseMatch, exceptions.Resolver404):
+            namespaces = url_name.split(":")
+            name = namespaces.pop()
+            path = ""
+            resolver_match = ResolverMatch(
+                None, (), {}, url_name=name, app_names=namespaces, namespaces=namespaces
+            )
+        patterns = list(
+            queryset.exclude(url_match=matchers.url_match_exact).values_list(
+                "pk", "url_match", "act_on_url_name"
+            )
+        )
+        matcher = matchers.UrlMatcher([(match, name) for pk, match, name in patterns])
+        pks = [patterns[index][0] for index in matcher.match(path, resolver_match)]
+        exact = queryset.filter(url_match=matchers.url_match_exact).for_url(
+            resolver_match.url_name
+        )
+        return exact | queryset.filter(pk__in=pks)
+
+    def list(
+        self,
+        verb,
+        include_models,
+        more=False,
+        excess=False,
+        enabled=False,
+        host=None,
+        url=None,
+        output_format="text",
+    ):
+        querysets = []
+        for model in models.model_choices:
+            if model in include_models:
+                queryset = self.get_list_queryset(model, verb, enabled, host, url)
+                if queryset is not None:
+                    querysets.append(queryset)
+        # Relations are only shown by these
+        prefetch = more or excess or output_format != "text"
+        actions = chain.from_iterable(
+            bulk.iter_actions(queryset, prefetch=prefetch) for queryset in querysets
+        )
+        if output_format == "text":
+            found = False
+            for action in actions:
+                found = True
+                for line in action.dump(more=more, excess=excess):
+                    self.stdout.write(line)
+            if not found:
+                self.stderr.write(_("No chaos actions found"))
         else:
-            actions_db = models.ChaosActionDB.objects.none()
-        actions = list(chain(actions_response, actions_db))
-        for action in actions:
-            for line in action.dump(more=more, excess=excess):
-                self.stdout.write(line)
-        if not actions:
-            self.stderr.write(_("No chaos actions found"))
+            self.write_json(actions, lines=output_format == "jsonl")
+
+    def write_json(self, actions, lines=False):
+        """
+        Write actions as a JSON array, or as JSON lines.
+        """
+        if not lines:
+            self.stdout.write("[")
+        for i, action in enumerate(actions):
+            record = bulk.action_to_record(action, with_id=True, stats=True)
+            record = json.dumps(record, cls=DjangoJSONEncoder)
+            if lines:
+                self.stdout.write(record)
+            else:
+                self.stdout.write("{}{}".format("," if i else "", record))
+        if not lines:
+            self.stdout.write("]")
 
     def dump(self, model, id, more=False, excess=False):
-        if model == "db":
-            cls = models.ChaosActionDB
-        elif model == "response":
-            cls = models.ChaosActionResponse
+        cls = models.action_models[model]
         try:
             for line in cls.objects.get(id=id).dump(more=more, excess=excess):
                 self.stdout.write(line)
@@ -234,17 +548,77 @@ class Command(BaseCommand):
         mockers = {
             "response": mock_data.make_action_response,
             "db": mock_data.make_action_db,
+            "cache": mock_data.make_action_cache,
+            "storage": mock_data.make_action_storage,
+            "email": mock_data.make_action_email,
         }
         mocker = mockers.get(kwargs.pop("action_type"))
         action = mocker(**kwargs)
         self.stdout.write(_("Created action: {}".format(action)))
 
+    def import_file(self, path):
+        try:
+            created, updated = bulk.load_records(bulk.read_file(path))
+        except (OSError, ValueError, ValidationError) as e:
+            raise CommandError(_("Could not import {}: {}").format(path, e))
+        self.stdout.write(
+            _("Imported actions: {} created, {} updated").format(created, updated)
+        )
+
+    def export(self, path=None):
+        if path is None:
+            bulk.write_snapshot(self.stdout)
+            return
+        with open(path, "w") as fh:
+            count = bulk.write_snapshot(fh)
+        self.stdout.write(_("Exported {} actions to {}").format(count, path))
+
+    def replay(self, path):
+        """
+        Replace all actions with the ones from a snapshot.
+        """
+        try:
+            with open(path) as fh:
+                header, records = bulk.read_snapshot(fh)
+            created, updated = bulk.load_records(records, replace=True)
+        except (OSError, ValidationError) as e:
+            raise CommandError(_("Could not replay {}: {}").format(path, e))
+        self.stdout.write(
+            _("Replayed {} actions from generation {}").format(
+                created, header.get("generation")
+            )
+        )
+
+    def publish(self, path=None, interval=None):
+        """
+        Write the shared snapshot file, and with an interval keep writing it
+        whenever the configuration changes.
+        """
+        path = path or get_setting("snapshot_file")
+        if not path:
+            raise CommandError(_("Pass a file or set the snapshot_file setting"))
+        version = None
+        while True:
+            if version != models.ChaosGeneration.objects.current():
+                try:
+                    published = snapshot.publish(path)
+                except OSError as e:
+                    raise CommandError(_("Could not publish {}: {}").format(path, e))
+                version = published.version
+                self.stdout.write(
+                    _("Published {} actions of generation {} to {}").format(
+                        len(published), version[0], path
+                    )
+                )
+            if not interval:
+                return
+            time.sleep(interval)
+
     def storm_end(self):
-        kvs = models.ChaosKV.objects.filter(key=STORM_KEY, value=STORM_VALUE)
-        models.ChaosActionDB.objects.filter(chaos_kvs__in=kvs).delete()
-        models.ChaosActionResponse.objects.filter(chaos_kvs__in=kvs).delete()
+        count = bulk.delete_storms()
+        self.stdout.write(_("Deleted {} storm actions").format(count))
 
-    def storm_start(self, users, groups, probability=None):
+    def storm_start(self, users, groups, probability=None, duration=None):
         """
         Create some wildcard actions with relatively low probability.
 
@@ -253,45 +627,40 @@ class Command(BaseCommand):
 
         With NV being the number of verbs of the action we want:
 
-        - For db router actions: 0.333%
-        - For middleware actions: 10%
+        - For db router actions: 0.333% / NV
+        - For middleware actions: 10% / NV
 
-        All actions created here get a KV object associated with them to make
-        it possible to delete them easily.
+        The actions are ignored after `duration` minutes, actions of earlier
+        storms that already ended are deleted.
         """
         if users and groups:
             raise CommandError("--user and --group can not be used together")
 
-        users = User.objects.filter(username__in=users)
-        groups = Group.objects.filter(name__in=groups)
-        if not users and not groups:
+        user_ids = list(
+            User.objects.filter(username__in=users).values_list("pk", flat=True)
+        )
+        group_ids = list(
+            Group.objects.filter(name__in=groups).values_list("pk", flat=True)
+        )
+        if not user_ids and not group_ids:
             raise CommandError("Could not find any matching users/groups by given names")
 
-        probability = probability or 10 / len(
-            models.ChaosActionResponse.verb_choices_str
-        )
-        for verb in models.ChaosActionResponse.verb_choices_str:
-            action = mock_data.make_action_response(
-                verb=verb,
-                act_on_url_name="",
-                for_users=users,
-                for_groups=groups,
-                probability=probability,
-                config={STORM_KEY: STORM_VALUE},
-            )
-            self.stdout.write("Created response action\t{}".format(action))
-
-        probability = probability or 1 / 30 / len(
-            models.ChaosActionResponse.verb_choices_str
-        )
-        for verb in models.ChaosActionDB.verb_choices_str:
-            action = mock_data.make_action_db(
-                verb=verb,
-                act_on_attribute=models.attr_choices_db["attr_app_label"]["attribute"],
-                act_on_value="",
-                for_users=users,
-                for_groups=groups,
-                probability=probability,
-                config={STORM_KEY: STORM_VALUE},
+        now = timezone.now()
+        bulk.delete_storms(expired_before=now)
+        if duration is None:
+            duration = default_storm_duration
+        active_until = now + timedelta(minutes=duration)
+        probabilities = {
+            "response": probability or 10 / len(models.ChaosActionResponse.storm_verbs),
+            "db": probability or 10 / 30 / len(models.ChaosActionDB.storm_verbs),
+        }
+        for key in models.action_models:
+            probabilities.setdefault(key, probability or 1)
+        storm_id, count = bulk.create_storm(
+            user_ids, group_ids, active_until, probabilities
+        )
+        self.stdout.write(
+            _("Created {} actions for storm {}, active until {}").format(
+                count, storm_id, active_until
             )
-            self.stdout.write("Created dbroute action\t{}".format(action))
+        )
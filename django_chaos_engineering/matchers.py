@@ -0,0 +1,300 @@
+"""
+Compiled url matching for response actions.
+
+All url patterns of a snapshot are compiled into a few structures, so matching
+a request costs the same however many actions exist:
+
+- Exact url names and namespaces are dictionary lookups
+- Glob and regex patterns on url names are combined into one regex, every
+  pattern is an optional lookahead with its own group, so one pass finds all
+  matching patterns. Patterns with groups of their own are matched one by one,
+  their group names could clash and numbered backreferences would shift
+- Path prefixes are stored in a trie that is walked once along the path
+
+Response actions can also match requests by method, path, headers, cookies
+and query parameters, see `compile_request_match`.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import fnmatch
+import logging
+import re
+import shlex
+import typing
+from collections import OrderedDict
+from operator import itemgetter
+
+from django.http import HttpRequest
+from django.urls import ResolverMatch
+from django.utils.translation import gettext as _
+
+
+logger = logging.getLogger(__name__)
+
+#: Match the url name exactly, an empty pattern matches any view
+url_match_exact = "exact"
+#: Match the url name with a shell style pattern like `checkout-*`
+url_match_glob = "glob"
+#: Match the url name with a regular expression
+url_match_regex = "regex"
+#: Match an application or instance namespace of the view
+url_match_namespace = "namespace"
+#: Match the beginning of the request path
+url_match_path = "path"
+
+url_match_choices_str = [
+    url_match_exact,
+    url_match_glob,
+    url_match_regex,
+    url_match_namespace,
+    url_match_path,
+]
+
+
+def pattern_to_regex(url_match: str, pattern: str) -> str:
+    """
+    The regular expression for a glob or regex pattern.
+    """
+    if url_match == url_match_glob:
+        # translate() appends its own end anchor
+        return fnmatch.translate(pattern)
+    return r"(?:{})\Z".format(pattern)
+
+
+class PrefixTrie:
+    """
+    A character trie of path prefixes.
+    """
+
+    def __init__(self) -> None:
+        self.root = {}  # type: dict
+        #: Values by the id of their terminal node
+        self.values = {}  # type: typing.Dict[int, typing.List[int]]
+
+    def __bool__(self) -> bool:
+        return bool(self.values)
+
+    def add(self, prefix: str, value: int) -> None:
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        self.values.setdefault(id(node), []).append(value)
+
+    def find(self, path: str) -> typing.List[int]:
+        """
+        The values of all prefixes of the path.
+        """
+        found = list(self.values.get(id(self.root), []))
+        node = self.root
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                break
+            found.extend(self.values.get(id(node), []))
+        return found
+
+
+class UrlMatcher:
+    """
+    Matches requests against the url patterns of many actions at once.
+
+    Actions are identified by their index in the list passed to the
+    constructor, matches are returned in that order.
+    """
+
+    def __init__(self, patterns: typing.Sequence[typing.Tuple[str, str]]) -> None:
+        """
+        :param patterns: The `url_match` and pattern of every action
+        """
+        self.any = []  # type: typing.List[int]
+        self.exact = {}  # type: typing.Dict[str, typing.List[int]]
+        self.namespaces = {}  # type: typing.Dict[str, typing.List[int]]
+        self.paths = PrefixTrie()
+        self.groups = []  # type: typing.List[typing.Tuple[str, int]]
+        #: Patterns that can't be combined, with their index
+        self.separate = []  # type: typing.List[typing.Tuple[typing.Pattern, int]]
+        regexes = []  # type: typing.List[typing.Tuple[str, int]]
+        for index, (url_match, pattern) in enumerate(patterns):
+            if pattern is None:
+                # Null url names never matched anything
+                continue
+            if url_match == url_match_exact:
+                if pattern:
+                    self.exact.setdefault(pattern, []).append(index)
+                else:
+                    self.any.append(index)
+            elif url_match == url_match_namespace:
+                self.namespaces.setdefault(pattern, []).append(index)
+            elif url_match == url_match_path:
+                self.paths.add(pattern, index)
+            elif url_match in (url_match_glob, url_match_regex):
+                regex = self._add_regex(url_match, pattern, index)
+                if regex is not None:
+                    regexes.append((regex, index))
+        self.regex = self._combine(regexes)
+
+    def _add_regex(
+        self, url_match: str, pattern: str, index: int
+    ) -> typing.Optional[str]:
+        """
+        Compile the regex of a glob or regex pattern.
+
+        Invalid patterns are skipped, patterns with groups of their own are
+        matched one by one.
+
+        :returns: The regex if it can be combined with others
+        """
+        regex = pattern_to_regex(url_match, pattern)
+        try:
+            compiled = re.compile(regex)
+        except re.error as e:
+            logger.error("Invalid url pattern %s: %s", pattern, e)
+            return None
+        if compiled.groups:
+            self.separate.append((compiled, index))
+            return None
+        return regex
+
+    def _combine(
+        self, regexes: typing.List[typing.Tuple[str, int]]
+    ) -> typing.Optional[typing.Pattern]:
+        """
+        Combine regexes into one, or match them one by one if that fails.
+
+        :param regexes: The regexes without groups of their own, with their index
+        """
+        if not regexes:
+            return None
+        combined = []
+        for regex, index in regexes:
+            group = "m{}".format(len(self.groups))
+            combined.append("(?:(?=(?P<{}>{})))?".format(group, regex))
+            self.groups.append((group, index))
+        try:
+            return re.compile("".join(combined))
+        except re.error as e:
+            logger.error("Could not combine url patterns: %s", e)
+        self.groups = []
+        self.separate.extend((re.compile(regex), index) for regex, index in regexes)
+        return None
+
+    def match(self, path: str, resolver_match: ResolverMatch) -> typing.List[int]:
+        """
+        The indexes of the actions matching a request.
+
+        :param path: The path of the request
+        :param resolver_match: The resolved view
+        """
+        found = list(self.any)
+        url_name = resolver_match.url_name
+        if url_name:
+            found.extend(self.exact.get(url_name, []))
+            if self.regex is not None:
+                match = self.regex.match(url_name)
+                found.extend(
+                    index
+                    for group, index in self.groups
+                    if match.group(group) is not None
+                )
+            found.extend(
+                index for regex, index in self.separate if regex.match(url_name)
+            )
+        if self.namespaces:
+            names = set(resolver_match.app_names) | set(resolver_match.namespaces)
+            if resolver_match.namespace:
+                names.add(resolver_match.namespace)
+            for name in names:
+                found.extend(self.namespaces.get(name, []))
+        if self.paths:
+            found.extend(self.paths.find(path))
+        return sorted(set(found))
+
+
+#: Request match clauses by name, with their relative evaluation cost
+request_match_costs = OrderedDict(
+    [("method", 0), ("path", 1), ("header", 2), ("cookie", 3), ("query", 4)]
+)
+
+#: A compiled request match clause
+Predicate = typing.Callable[[HttpRequest], bool]
+
+
+def _split_name_value(text: str) -> typing.Tuple[str, typing.Optional[str]]:
+    name, sep, value = text.partition("=")
+    if not name:
+        raise ValueError(_("Missing name in {}").format(text))
+    return name, value if sep else None
+
+
+def _header_key(name: str) -> str:
+    """
+    The `request.META` key of a header.
+    """
+    key = name.upper().replace("-", "_")
+    if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+        return key
+    return "HTTP_" + key
+
+
+def _compile_lookup(
+    getter: typing.Callable[[HttpRequest], typing.Mapping], text: str
+) -> Predicate:
+    name, value = _split_name_value(text)
+    if value is None:
+        return lambda request: name in getter(request)
+    return lambda request: getter(request).get(name) == value
+
+
+def _compile_clause(kind: str, argument: str) -> Predicate:
+    if kind == "method":
+        methods = frozenset(method.upper() for method in argument.split(","))
+        return lambda request: request.method in methods
+    if kind == "path":
+        return lambda request: request.path_info.startswith(argument)
+    if kind == "header":
+        name, value = _split_name_value(argument)
+        key = _header_key(name)
+        if value is None:
+            return lambda request: key in request.META
+        return lambda request: request.META.get(key) == value
+    if kind == "cookie":
+        return _compile_lookup(lambda request: request.COOKIES, argument)
+    return _compile_lookup(lambda request: request.GET, argument)
+
+
+def compile_request_match(text: str) -> typing.List[Predicate]:
+    """
+    Compile a request match into predicates, cheapest first.
+
+    A request match is a whitespace separated list of clauses, and a request
+    must match all of them. Clauses can be quoted like shell arguments:
+
+    - ``method:POST`` or ``method:GET,HEAD``
+    - ``path:/api/``, the beginning of the path
+    - ``header:X-Chaos`` or ``header:X-Chaos=on``
+    - ``cookie:name`` or ``cookie:name=value``
+    - ``query:name`` or ``query:name=value``
+
+    :param text: The request match
+    :returns: The predicates
+    :raises ValueError: For invalid request matches
+    """
+    clauses = []
+    for clause in shlex.split(text or ""):
+        kind, sep, argument = clause.partition(":")
+        if not sep or kind not in request_match_costs or not argument:
+            raise ValueError(_("Invalid request match clause {}").format(clause))
+        clauses.append((request_match_costs[kind], _compile_clause(kind, argument)))
+    clauses.sort(key=itemgetter(0))
+    return [predicate for cost, predicate in clauses]
+
+
+def match_request(predicates: typing.List[Predicate], request: HttpRequest) -> bool:
+    """
+    If a request matches all predicates.
+    """
+    for predicate in predicates:
+        if not predicate(request):
+            return False
+    return True
@@ -3,13 +3,16 @@ Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
 """
 
 import logging
-from typing import Callable
+import time
+from typing import Callable, List, Optional
 
-from django.http import HttpResponse, HttpRequest
-from django.urls import resolve
-from django.urls.exceptions import Resolver404
+from django.conf import settings
+from django.http import HttpResponse, HttpRequest, StreamingHttpResponse
+from django.utils import timezone
 
-from django_chaos_engineering import models
+from django_chaos_engineering.models import ChaosActionResponse
+from django_chaos_engineering.snapshot import get_snapshot
+from django_chaos_engineering.targeting import acting_user
 
 
 logger = logging.getLogger(__name__)
@@ -21,38 +24,100 @@ class ChaosResponseMiddleware:
 
     It does this through these mechanisms:
 
-    1. Delaying responses
+    1. Delaying responses, or padding them to a total latency
     2. Raising errors
     3. Returning responses with specific status codes
+    4. Delaying or truncating streaming responses
     """
 
     def __init__(self, get_response: Callable) -> None:
         self.get_response = get_response
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
-        """
-        This is where we execute actions and return custom responses.
+        start = time.monotonic()
+        # Database actions for users and groups act on the queries of the view
+        with acting_user(getattr(request, "user", None)):
+            response = self.get_response(request)
+        actions = getattr(request, "_chaos_pad_actions", None)
+        if actions:
+            self.pad(request, actions, start)
+        actions = getattr(request, "_chaos_stream_actions", None)
+        if actions and response.streaming:
+            self.wrap_streaming(request, response, actions)
+        return response
 
-        There's probably no need to continue with other middlewares once we
-        return an error, so we short circuit the chain here.
+    def pad(
+        self, request: HttpRequest, actions: List[ChaosActionResponse], start: float
+    ) -> None:
+        """
+        Pad the response with the slow actions that have a latency target and
+        matched the request, see `ChaosActionResponse.latency_targets`.
 
-        https://docs.djangoproject.com/en/2.2/topics/http/middleware/#middleware-order-and-layering
+        :param start: When the middleware received the request, from
+                      `time.monotonic()`
         """
+        for action in actions:
+            action.perform_pad(
+                (time.monotonic() - start) * 1000,
+                target=request.resolver_match.url_name,
+            )
 
-        try:
-            data = resolve(request.path_info)
-            url_name = data.url_name
-        except Resolver404:
-            return self.get_response(request)
-        actions = (
-            models.ChaosActionResponse.objects.none_for_ignored_apps(data.app_names)
-            .enabled()
-            .for_url(url_name)
-            .for_user(request.user)
-            .on_this_host()
-        )
+    def wrap_streaming(
+        self,
+        request: HttpRequest,
+        response: StreamingHttpResponse,
+        actions: List[ChaosActionResponse],
+    ) -> None:
+        """
+        Wrap the content of a streaming response with the stream actions that
+        matched the request. The content stays lazy.
+        """
+        content = response.streaming_content
+        performed = False
         for action in actions:
-            r = action.perform()
+            wrapped = action.perform_stream(
+                content, target=request.resolver_match.url_name
+            )
+            if wrapped is not None:
+                content = wrapped
+                performed = True
+        if performed:
+            response.streaming_content = content
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> Optional[HttpResponse]:
+        """
+        This is where we execute actions and return custom responses.
+
+        The handler already resolved the url, so `request.resolver_match` is
+        used instead of resolving the path a second time. Returning a response
+        skips the view.
+
+        https://docs.djangoproject.com/en/2.2/topics/http/middleware/#process-view
+        """
+        data = request.resolver_match
+        ignored_apps = getattr(settings, "CHAOS", {}).get("ignore_apps_request", [])
+        if set(data.app_names) & set(ignored_apps):
+            return None
+        for action in get_snapshot().for_request(request, timezone.now()):
+            if action.verb in action.stream_verbs:
+                # Streaming responses are only known after the view ran
+                request._chaos_stream_actions = getattr(
+                    request, "_chaos_stream_actions", []
+                ) + [action]
+                continue
+            if action.pads:
+                # The total latency is only known after the view ran
+                request._chaos_pad_actions = getattr(
+                    request, "_chaos_pad_actions", []
+                ) + [action]
+                continue
+            r = action.perform(target=data.url_name)
             if isinstance(r, HttpResponse):
                 return r
-        return self.get_response(request)
+        return None
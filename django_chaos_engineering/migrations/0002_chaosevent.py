@@ -0,0 +1,60 @@
+# Generated by Django 3.1 on 2026-10-19 00:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChaosEvent",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=16, verbose_name="Action model")),
+                ("action_id", models.PositiveIntegerField(verbose_name="Action id")),
+                ("verb", models.CharField(max_length=16, verbose_name="Verb")),
+                (
+                    "target",
+                    models.CharField(
+                        blank=True,
+                        help_text="Url name or model label the action fired on",
+                        max_length=255,
+                        verbose_name="Target",
+                    ),
+                ),
+                (
+                    "injected_ms",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Injected delay (ms)"
+                    ),
+                ),
+                ("host", models.CharField(max_length=255, verbose_name="Host")),
+                (
+                    "ctime",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="Creation time",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ChaosEvent",
+                "verbose_name_plural": "ChaosEvents",
+                "ordering": ("-ctime",),
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.1 on 2026-10-19 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0002_chaosevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="evaluations",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Evaluations"
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="firings",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Firings"
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="injected_ms",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Injected delay (ms)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="evaluations",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Evaluations"
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="firings",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Firings"
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="injected_ms",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Injected delay (ms)"
+            ),
+        ),
+    ]
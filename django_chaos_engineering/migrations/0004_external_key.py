@@ -0,0 +1,37 @@
+# Generated by Django 3.1 on 2026-10-19 00:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0003_action_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="external_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifies imported actions across environments",
+                max_length=255,
+                null=True,
+                unique=True,
+                verbose_name="External key",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="external_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifies imported actions across environments",
+                max_length=255,
+                null=True,
+                unique=True,
+                verbose_name="External key",
+            ),
+        ),
+    ]
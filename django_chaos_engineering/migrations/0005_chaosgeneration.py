@@ -0,0 +1,42 @@
+# Generated by Django 3.1 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0004_external_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChaosGeneration",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "generation",
+                    models.BigIntegerField(default=0, verbose_name="Generation"),
+                ),
+                ("token", models.CharField(max_length=32, verbose_name="Token")),
+                (
+                    "mtime",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Modification time"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ChaosGeneration",
+                "verbose_name_plural": "ChaosGenerations",
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.1 on 2026-10-19 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0005_chaosgeneration"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="active_until",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="The action is ignored after this time, blank for never",
+                null=True,
+                verbose_name="Active until",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="storm_id",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Set for actions created by a storm",
+                max_length=32,
+                verbose_name="Storm id",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="active_until",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="The action is ignored after this time, blank for never",
+                null=True,
+                verbose_name="Active until",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="storm_id",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Set for actions created by a storm",
+                max_length=32,
+                verbose_name="Storm id",
+            ),
+        ),
+    ]
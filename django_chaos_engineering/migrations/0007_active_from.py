@@ -0,0 +1,33 @@
+# Generated by Django 3.1 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0006_storm"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="active_from",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="The action is ignored before this time, blank for always",
+                null=True,
+                verbose_name="Active from",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="active_from",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="The action is ignored before this time, blank for always",
+                null=True,
+                verbose_name="Active from",
+            ),
+        ),
+    ]
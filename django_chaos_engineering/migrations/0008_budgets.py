@@ -0,0 +1,53 @@
+# Generated by Django 3.1 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0007_active_from"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="max_injected_ms",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Disable the action after this much delay, blank for never",
+                null=True,
+                verbose_name="Max injected delay (ms)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="max_injections",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Disable the action after this many injections, blank for never",
+                null=True,
+                verbose_name="Max injections",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="max_injected_ms",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Disable the action after this much delay, blank for never",
+                null=True,
+                verbose_name="Max injected delay (ms)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="max_injections",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Disable the action after this many injections, blank for never",
+                null=True,
+                verbose_name="Max injections",
+            ),
+        ),
+    ]
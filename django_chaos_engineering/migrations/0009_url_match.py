@@ -0,0 +1,30 @@
+# Generated by Django 3.1 on 2026-10-19 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0008_budgets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="url_match",
+            field=models.CharField(
+                choices=[
+                    ("exact", "Exact url name"),
+                    ("glob", "Url name glob pattern"),
+                    ("regex", "Url name regular expression"),
+                    ("namespace", "Namespace"),
+                    ("path", "Path prefix"),
+                ],
+                default="exact",
+                help_text="How the url name field is matched against requests",
+                max_length=16,
+                verbose_name="Url match",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.1 on 2026-10-19 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0009_url_match"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactionresponse",
+            name="request_match",
+            field=models.TextField(
+                blank=True,
+                help_text="Only act on matching requests, like: method:POST header:X-Chaos=on",
+                verbose_name="Request match",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.1 on 2026-10-19 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0010_request_match"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chaosactiondb",
+            name="act_on_alias",
+            field=models.CharField(
+                blank=True,
+                help_text="Only act on queries for this database alias, blank for any",
+                max_length=255,
+                verbose_name="Act on alias",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="chaosactionresponse",
+            name="request_match",
+            field=models.TextField(
+                blank=True,
+                help_text="Only act on matching requests, like: method:POST",
+                verbose_name="Request match",
+            ),
+        ),
+    ]
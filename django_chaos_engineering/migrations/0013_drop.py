@@ -0,0 +1,27 @@
+# Generated by Django 3.1 on 2026-10-19 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0012_reroute"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="chaosactiondb",
+            name="verb",
+            field=models.CharField(
+                choices=[
+                    ("slow", "slow"),
+                    ("raise", "raise"),
+                    ("reroute", "reroute"),
+                    ("drop", "drop"),
+                ],
+                help_text="Please refer to the documentation for configuration hints",
+                max_length=16,
+            ),
+        ),
+    ]
@@ -0,0 +1,178 @@
+# Generated by Django 3.1 on 2026-10-19 01:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django_chaos_engineering.models
+import django_chaos_engineering.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("django_chaos_engineering", "0013_drop"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChaosActionCache",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ctime",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Creation time"
+                    ),
+                ),
+                (
+                    "mtime",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Modification time"
+                    ),
+                ),
+                (
+                    "on_host",
+                    models.CharField(
+                        blank=True,
+                        help_text="Limit the action to this host, blank for any",
+                        max_length=255,
+                        verbose_name="On host",
+                    ),
+                ),
+                ("enabled", models.BooleanField(default=True, verbose_name="Enabled")),
+                (
+                    "external_key",
+                    models.CharField(
+                        blank=True,
+                        help_text="Identifies imported actions across environments",
+                        max_length=255,
+                        null=True,
+                        unique=True,
+                        verbose_name="External key",
+                    ),
+                ),
+                (
+                    "storm_id",
+                    models.CharField(
+                        blank=True,
+                        db_index=True,
+                        help_text="Set for actions created by a storm",
+                        max_length=32,
+                        verbose_name="Storm id",
+                    ),
+                ),
+                (
+                    "active_from",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="The action is ignored before this time, blank for always",
+                        null=True,
+                        verbose_name="Active from",
+                    ),
+                ),
+                (
+                    "active_until",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="The action is ignored after this time, blank for never",
+                        null=True,
+                        verbose_name="Active until",
+                    ),
+                ),
+                (
+                    "max_injections",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Disable the action after this many injections, blank for never",
+                        null=True,
+                        verbose_name="Max injections",
+                    ),
+                ),
+                (
+                    "max_injected_ms",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Disable the action after this much delay, blank for never",
+                        null=True,
+                        verbose_name="Max injected delay (ms)",
+                    ),
+                ),
+                (
+                    "probability",
+                    django_chaos_engineering.models.RoundingDecimalField(
+                        decimal_places=5,
+                        default=100,
+                        max_digits=8,
+                        validators=[
+                            django_chaos_engineering.validators.validate_probability
+                        ],
+                    ),
+                ),
+                (
+                    "evaluations",
+                    models.BigIntegerField(
+                        default=0, editable=False, verbose_name="Evaluations"
+                    ),
+                ),
+                (
+                    "firings",
+                    models.BigIntegerField(
+                        default=0, editable=False, verbose_name="Firings"
+                    ),
+                ),
+                (
+                    "injected_ms",
+                    models.BigIntegerField(
+                        default=0, editable=False, verbose_name="Injected delay (ms)"
+                    ),
+                ),
+                (
+                    "verb",
+                    models.CharField(
+                        choices=[
+                            ("slow", "slow"),
+                            ("raise", "raise"),
+                            ("miss", "miss"),
+                            ("stale", "stale"),
+                        ],
+                        help_text="Please refer to the documentation for configuration hints",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "act_on_prefix",
+                    models.CharField(
+                        blank=True,
+                        help_text="Only act on cache keys with this prefix, blank for any",
+                        max_length=255,
+                        verbose_name="Act on prefix",
+                    ),
+                ),
+                (
+                    "act_on_cache",
+                    models.CharField(
+                        blank=True,
+                        help_text="Only act on this wrapped cache alias, blank for any",
+                        max_length=255,
+                        verbose_name="Act on cache",
+                    ),
+                ),
+                ("for_groups", models.ManyToManyField(to="auth.Group")),
+                ("for_users", models.ManyToManyField(to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "verbose_name": "ChaosActionCache",
+                "verbose_name_plural": "ChaosActionCaches",
+                "ordering": ("-mtime",),
+            },
+        ),
+    ]
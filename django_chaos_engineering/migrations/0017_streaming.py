@@ -0,0 +1,29 @@
+# Generated by Django 3.1 on 2026-10-19 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_chaos_engineering", "0016_email"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="chaosactionresponse",
+            name="verb",
+            field=models.CharField(
+                choices=[
+                    ("slow", "slow"),
+                    ("return", "return"),
+                    ("raise", "raise"),
+                    ("drip", "drip"),
+                    ("stall", "stall"),
+                    ("truncate", "truncate"),
+                ],
+                help_text="Please refer to the documentation for configuration hints",
+                max_length=16,
+            ),
+        ),
+    ]
@@ -17,7 +17,7 @@ from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.utils.translation import gettext as _
 
-from django_chaos_engineering import models
+from django_chaos_engineering import matchers, models
 
 
 logger = logging.getLogger(__name__)
@@ -90,7 +90,7 @@ def get_string_nullable(value: Union[str, bool], default: str) -> Union[None, st
 
 @safe_only
 def make_kv(
-    action: Union[models.ChaosActionResponse, models.ChaosActionDB],
+    action: models.ChaosActionBase,
     key: Optional[str] = None,
     value: Optional[str] = None,
 ) -> models.ChaosKV:
@@ -112,11 +112,12 @@ def make_action_response(
     for_users: Optional[list] = None,
     for_groups: Optional[list] = None,
     on_host: Optional[str] = None,
+    url_match: Optional[str] = None,
 ) -> models.ChaosActionResponse:
     """
     Creates a response action.
 
-    :param act_on_url_name: View name
+    :param act_on_url_name: View name or pattern
     :param config: Additional configuration for the action
     :param enabled: If the action is enabled
     :returns: The new action
@@ -126,9 +127,11 @@ def make_action_response(
     probability = get_probability(probability)
     enabled = get_bool(enabled)
     on_host = on_host or ""
+    url_match = url_match or matchers.url_match_exact
     action = models.ChaosActionResponse(
         verb=verb,
         act_on_url_name=act_on_url_name,
+        url_match=url_match,
         probability=probability,
         enabled=enabled,
         on_host=on_host,
@@ -156,11 +159,13 @@ def make_action_db(
     for_users: Optional[list] = None,
     for_groups: Optional[list] = None,
     on_host: Optional[str] = None,
+    act_on_alias: Optional[str] = None,
 ) -> models.ChaosActionResponse:
     """
     Creates a database action.
 
     :param act_on: Undecided
+    :param act_on_alias: Database alias, blank for any
     :param config: Additional configuration for the action
     :param enabled: If the action is enabled
     :returns: The new action
@@ -177,6 +182,7 @@ def make_action_db(
         verb=verb,
         act_on_attribute=act_on_attribute,
         act_on_value=act_on_value,
+        act_on_alias=act_on_alias or "",
         probability=probability,
         enabled=enabled,
         on_host=on_host,
@@ -193,6 +199,120 @@ def make_action_db(
     return action
 
 
+@safe_only
+def make_action_cache(
+    act_on_prefix: Optional[str] = None,
+    verb: Optional[str] = None,
+    config: Optional[dict] = None,
+    probability: Optional[int] = None,
+    enabled: Optional[bool] = None,
+    on_host: Optional[str] = None,
+    act_on_cache: Optional[str] = None,
+) -> models.ChaosActionCache:
+    """
+    Creates a cache action.
+
+    :param act_on_prefix: Cache key prefix, blank for any
+    :param act_on_cache: Alias of the wrapped cache, blank for any
+    :param config: Additional configuration for the action
+    :param enabled: If the action is enabled
+    :returns: The new action
+    """
+    verb = verb or random.choice(models.ChaosActionCache.verb_choices_str)
+    act_on_prefix = "mock_prefix" if act_on_prefix is None else act_on_prefix
+    probability = get_probability(probability)
+    enabled = get_bool(enabled)
+    action = models.ChaosActionCache(
+        verb=verb,
+        act_on_prefix=act_on_prefix,
+        act_on_cache=act_on_cache or "",
+        probability=probability,
+        enabled=enabled,
+        on_host=on_host or "",
+    )
+    action.full_clean()
+    action.save()
+    if config:
+        for key, value in config.items():
+            make_kv(key=key, value=value, action=action)
+    return action
+
+
+@safe_only
+def make_action_storage(
+    act_on_prefix: Optional[str] = None,
+    verb: Optional[str] = None,
+    config: Optional[dict] = None,
+    probability: Optional[int] = None,
+    enabled: Optional[bool] = None,
+    on_host: Optional[str] = None,
+    act_on_method: Optional[str] = None,
+) -> models.ChaosActionStorage:
+    """
+    Creates a storage action.
+
+    :param act_on_prefix: File name prefix, blank for any
+    :param act_on_method: Storage method, blank for any
+    :param config: Additional configuration for the action
+    :param enabled: If the action is enabled
+    :returns: The new action
+    """
+    verb = verb or random.choice(models.ChaosActionStorage.verb_choices_str)
+    act_on_prefix = "mock_prefix" if act_on_prefix is None else act_on_prefix
+    probability = get_probability(probability)
+    enabled = get_bool(enabled)
+    action = models.ChaosActionStorage(
+        verb=verb,
+        act_on_prefix=act_on_prefix,
+        act_on_method=act_on_method or "",
+        probability=probability,
+        enabled=enabled,
+        on_host=on_host or "",
+    )
+    action.full_clean()
+    action.save()
+    if config:
+        for key, value in config.items():
+            make_kv(key=key, value=value, action=action)
+    return action
+
+
+@safe_only
+def make_action_email(
+    act_on_recipient: Optional[str] = None,
+    verb: Optional[str] = None,
+    config: Optional[dict] = None,
+    probability: Optional[int] = None,
+    enabled: Optional[bool] = None,
+    on_host: Optional[str] = None,
+) -> models.ChaosActionEmail:
+    """
+    Creates an email action.
+
+    :param act_on_recipient: Recipient address suffix, blank for any
+    :param config: Additional configuration for the action
+    :param enabled: If the action is enabled
+    :returns: The new action
+    """
+    verb = verb or random.choice(models.ChaosActionEmail.verb_choices_str)
+    act_on_recipient = "@example.com" if act_on_recipient is None else act_on_recipient
+    probability = get_probability(probability)
+    enabled = get_bool(enabled)
+    action = models.ChaosActionEmail(
+        verb=verb,
+        act_on_recipient=act_on_recipient,
+        probability=probability,
+        enabled=enabled,
+        on_host=on_host or "",
+    )
+    action.full_clean()
+    action.save()
+    if config:
+        for key, value in config.items():
+            make_kv(key=key, value=value, action=action)
+    return action
+
+
 @safe_only
 def make_user(**kwargs):
     kwargs["username"] = kwargs.get("username", get_string())
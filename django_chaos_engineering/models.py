@@ -7,12 +7,18 @@ tests are available on multiple app servers.
 Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
 """
 
-import importlib
+import functools
+import json
 import logging
+import os
 import random
+import re
 import socket
+import threading
 import time
 import typing
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
 from operator import attrgetter
@@ -24,13 +30,19 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core import exceptions
-from django.db import models
-from django.db.models import Q
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, OperationalError, connections
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.template import TemplateDoesNotExist
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext as _
 
 from django_chaos_engineering import exceptions as chaos_exceptions
-from django_chaos_engineering import validators
+from django_chaos_engineering import budget, matchers, streaming, telemetry, validators
 
 
 logger = logging.getLogger(__name__)
@@ -40,9 +52,25 @@ logger = logging.getLogger(__name__)
 verb_slow = "slow"
 verb_return = "return"
 verb_raise = "raise"
+#: Send database queries to another database
+verb_reroute = "reroute"
+#: Drop the database connection
+verb_drop = "drop"
+#: Pretend a cached value doesn't exist
+verb_miss = "miss"
+#: Drop cache writes, readers keep getting the old value
+verb_stale = "stale"
+#: Limit the throughput of file reads and writes
+verb_throttle = "throttle"
+#: Delay every chunk of a streaming response
+verb_drip = "drip"
+#: Delay a streaming response once after some bytes
+verb_stall = "stall"
+#: End a streaming response after some bytes
+verb_truncate = "truncate"
 
 #: The models available for commands
-model_choices = ["response", "db"]
+model_choices = ["response", "db", "cache", "storage", "email"]
 
 #: Database actions need to match a model attribute
 #: This mapping contains model attribute paths and labels, with a key used for
@@ -61,6 +89,43 @@ attr_choices_db = {
 }
 
 
+def get_status_code_map(setting: str, default: dict) -> typing.Dict[int, type]:
+    """
+    A map of status codes to classes from a setting, or the default.
+
+    :param setting: The name of the setting, its values are dotted paths
+    :param default: The map without the setting
+    """
+    configured = telemetry.get_setting(setting)
+    if configured is None:
+        return default
+    return {int(code): import_string(path) for code, path in configured.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def get_hostnames() -> typing.FrozenSet[str]:
+    """
+    The names of this host, resolved once per process.
+
+    `socket.getfqdn()` can wait for a DNS lookup.
+    """
+    return frozenset([socket.gethostname(), socket.getfqdn()])
+
+
+#: A prepared return action, see `ChaosActionResponse.return_plan`
+ReturnPlan = typing.NamedTuple(
+    "ReturnPlan",
+    [
+        ("status_code", int),
+        # Raised instead of returning a response
+        ("exception", typing.Optional[type]),
+        ("response_class", typing.Optional[typing.Type[http.HttpResponse]]),
+        ("content", bytes),
+        ("headers", typing.Dict[str, str]),
+    ],
+)
+
+
 class RoundingDecimalField(models.DecimalField):
     """
     Automatically rounding DecimalField.
@@ -93,8 +158,7 @@ class ChaosActionQuerySet(models.QuerySet):
         """
         Will match actions that are configured for this or any host.
         """
-        hostnames = set([socket.gethostname(), socket.getfqdn()])
-        return self.filter(Q(on_host__in=hostnames) | Q(on_host=""))
+        return self.filter(Q(on_host__in=get_hostnames()) | Q(on_host=""))
 
     def for_user(self, user: User) -> models.QuerySet:
         """
@@ -163,6 +227,15 @@ class ChaosActionBase(models.Model):
     default_exception = chaos_exceptions.ChaosException
     default_exception_path = "django_chaos_engineering.exceptions.ChaosException"
 
+    #: The key of the model in `model_choices`
+    model_key = ""
+
+    #: Field values of actions created by `chaos storm`
+    storm_defaults = {}  # type: typing.Dict[str, str]
+
+    #: Verbs of actions created by `chaos storm`
+    storm_verbs = []  # type: typing.List[str]
+
     ctime = models.DateTimeField(
         auto_now_add=timezone.now, verbose_name=_("Creation time")
     )
@@ -178,6 +251,48 @@ class ChaosActionBase(models.Model):
         verbose_name=_("On host"),
     )
     enabled = models.BooleanField(default=True, verbose_name=_("Enabled"))
+    #: Stable identifier for actions managed through `chaos import`
+    external_key = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text=_("Identifies imported actions across environments"),
+        verbose_name=_("External key"),
+    )
+    #: Groups actions created by `chaos storm`
+    storm_id = models.CharField(
+        max_length=32,
+        blank=True,
+        db_index=True,
+        help_text=_("Set for actions created by a storm"),
+        verbose_name=_("Storm id"),
+    )
+    active_from = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("The action is ignored before this time, blank for always"),
+        verbose_name=_("Active from"),
+    )
+    active_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("The action is ignored after this time, blank for never"),
+        verbose_name=_("Active until"),
+    )
+    #: Budgets, the action disables itself when one is used up
+    max_injections = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Disable the action after this many injections, blank for never"),
+        verbose_name=_("Max injections"),
+    )
+    max_injected_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Disable the action after this much delay, blank for never"),
+        verbose_name=_("Max injected delay (ms)"),
+    )
     probability = RoundingDecimalField(
         default=100,
         max_digits=8,
@@ -187,6 +302,29 @@ class ChaosActionBase(models.Model):
     chaos_kvs = GenericRelation("ChaosKV")
     for_users = models.ManyToManyField(User)
     for_groups = models.ManyToManyField(Group)
+    #: Counters, flushed periodically by `telemetry`
+    evaluations = models.BigIntegerField(
+        default=0, editable=False, verbose_name=_("Evaluations")
+    )
+    firings = models.BigIntegerField(
+        default=0, editable=False, verbose_name=_("Firings")
+    )
+    injected_ms = models.BigIntegerField(
+        default=0, editable=False, verbose_name=_("Injected delay (ms)")
+    )
+
+    #: Fields that are (de)serialized by the `bulk` module
+    record_fields = (
+        "verb",
+        "enabled",
+        "probability",
+        "on_host",
+        "active_from",
+        "active_until",
+        "storm_id",
+        "max_injections",
+        "max_injected_ms",
+    )
 
     #: Always returned from dump()
     dump_core = {
@@ -205,7 +343,16 @@ class ChaosActionBase(models.Model):
         _("for users"): "for_users.all",
         _("for groups"): "for_groups.all",
         _("on host"): "on_host",
+        _("external key"): "external_key",
+        _("active from"): "active_from",
+        _("active until"): "active_until",
+        _("storm id"): "storm_id",
+        _("max injections"): "max_injections",
+        _("max injected ms"): "max_injected_ms",
         _("additional config"): "chaos_kvs.all",
+        _("evaluations"): "evaluations",
+        _("firings"): "firings",
+        _("injected ms"): "injected_ms",
     }
 
     #: Optionally returned from dump()
@@ -293,11 +440,61 @@ class ChaosActionBase(models.Model):
         """
         return self.probability >= random.uniform(0, 100)
 
+    def is_active(self, now: datetime) -> bool:
+        """
+        If the action is active at the given time.
+
+        This is checked in memory after loading the actions, so the time
+        doesn't end up in the queries.
+        """
+        if self.active_from is not None and now < self.active_from:
+            return False
+        return self.active_until is None or now < self.active_until
+
+    def clean(self) -> None:
+        super().clean()
+        if (
+            self.active_from is not None
+            and self.active_until is not None
+            and self.active_from >= self.active_until
+        ):
+            raise exceptions.ValidationError(
+                {"active_until": _("The end must be after the start of the action")}
+            )
+
     @property
     def humanized_enabled(self) -> str:
         return _("enabled") if self.enabled else _("disabled")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The state in the database, to notice when the action is enabled
+        instance._loaded_enabled = instance.__dict__.get("enabled")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs) -> None:
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_enabled = self.__dict__.get("enabled")
+
+    def save(self, *args, **kwargs) -> None:
+        """
+        Save the action, with a fresh budget when it is created or enabled.
+        """
+        if self._state.adding:
+            fresh = self.enabled
+        else:
+            fresh = self.enabled and getattr(self, "_loaded_enabled", None) is False
+        super().save(*args, **kwargs)
+        self._loaded_enabled = self.enabled
+        if fresh:
+            budget.reset(self.model_key, [self.pk])
+
     def enable(self) -> None:
+        """
+        Enable the action with a fresh budget.
+        """
+        budget.reset(self.model_key, [self.pk])
         self.enabled = True
         self.save()
 
@@ -305,6 +502,63 @@ class ChaosActionBase(models.Model):
         self.enabled = False
         self.save()
 
+    def use_budget(self) -> bool:
+        """
+        Count an injection against the budget of the action.
+
+        :returns: False if the budget is used up, the action must not fire
+        """
+        if self.max_injected_ms is not None and (
+            budget.spent(self.model_key, self.pk, budget.kind_injected_ms)
+            >= self.max_injected_ms
+        ):
+            self.exhaust_budget()
+            return False
+        if self.max_injections is None:
+            return True
+        spent = budget.spend(self.model_key, self.pk, budget.kind_injections)
+        if spent >= self.max_injections:
+            self.exhaust_budget()
+        return spent <= self.max_injections
+
+    def spend_budget_ms(self, injected_ms: int) -> None:
+        """
+        Count injected delay against the budget of the action.
+        """
+        if self.max_injected_ms is None or not injected_ms:
+            return
+        spent = budget.spend(
+            self.model_key, self.pk, budget.kind_injected_ms, injected_ms
+        )
+        if spent >= self.max_injected_ms:
+            self.exhaust_budget()
+
+    def exhaust_budget(self) -> None:
+        """
+        Disable the action because its budget is used up.
+
+        Only the process that actually disables the action bumps the
+        configuration generation.
+        """
+        self.enabled = False
+        updated = (
+            type(self)
+            .objects.filter(pk=self.pk, enabled=True)
+            .update(enabled=False, mtime=timezone.now())
+        )
+        if updated:
+            logger.warning(
+                "Chaos action: %s %s used up its budget", self.model_key, self.pk
+            )
+            ChaosGeneration.objects.bump()
+
+    @cached_property
+    def args(self) -> typing.Dict[str, str]:
+        """
+        The KVs of the action, read once for the lifetime of the instance.
+        """
+        return {kv.key: kv.value for kv in self.chaos_kvs.all()}
+
     def get_arg(
         self, key: str, default: typing.Union[str, int]
     ) -> typing.Union[str, int]:
@@ -317,52 +571,97 @@ class ChaosActionBase(models.Model):
                         default value
         :returns: The value of the argument
         """
-        kv = self.chaos_kvs.filter(key=key).first()
-        if kv:
-            if type(default) == int:
-                return int(kv.value)
-            return kv.value
-        return default
+        if key not in self.args:
+            return default
+        if type(default) == int:
+            return int(self.args[key])
+        return self.args[key]
+
+    @cached_property
+    def exception_class(self) -> typing.Type[BaseException]:
+        """
+        The configured exception class, imported once.
 
-    def perform_raise(self) -> None:
+        Falls back to the default exception of the model if the configured one
+        can't be imported.
         """
-        Raises an exception.
+        path = self.get_arg(ChaosKV.attr_exception, self.default_exception_path)
+        try:
+            return import_string(path)
+        except ImportError:
+            logger.error(_("Could not raise configured exception {}").format(path))
+        return self.default_exception
 
-        The raised exception is the one configured in the action, or the
-        default exception of the model if the configured one can't be imported.
+    def perform_raise(self) -> None:
+        """
+        Raises an exception, see `exception_class`.
 
         :raises: all kinds of exceptions
         """
-        exception_path = self.get_arg("exception", self.default_exception_path)
-        if exception_path:
-            parts = exception_path.split(".")
-            cls_name = parts[-1]
-            path = ".".join(parts[:-1])
-            try:
-                cls = getattr(importlib.import_module(path), cls_name)
-                logger.warning(_("Chaos action: raise {}".format(cls)))
-                raise cls()
-            except (ImportError, ValueError):
-                logger.error(
-                    _("Could not raise configured exception {}".format(exception_path))
-                )
-        raise self.default_exception()
+        logger.warning("Chaos action: raise %s", self.exception_class)
+        raise self.exception_class()
 
-    def _get_random_slow(self) -> int:
+    @cached_property
+    def slow_range(self) -> typing.Tuple[int, int]:
+        """
+        The minimum and maximum delay of slow actions.
+        """
         slow_min = int(self.get_arg(ChaosKV.attr_slow_min, ChaosKV.slow_min))
         slow_max = int(self.get_arg(ChaosKV.attr_slow_max, ChaosKV.slow_max))
-        if slow_max <= slow_min:
+        return slow_min, max(slow_min, slow_max)
+
+    def prepare(self) -> None:
+        """
+        Prepare what the verb of the action needs before it fires for the first
+        time, see `snapshot.warmup`.
+        """
+        self.args
+        if self.verb == verb_raise:
+            self.exception_class
+        elif self.verb in (verb_slow, verb_drip):
+            self.slow_range
+
+    def _get_random_slow(self) -> int:
+        slow_min, slow_max = self.slow_range
+        if slow_max == slow_min:
             return slow_min
         return random.randint(slow_min, slow_max)
 
-    def perform_slow(self) -> None:
+    def perform_slow(self) -> int:
         """
         This method simply sleeps for a random time based on the action
         configuration.
+
+        :returns: The delay in milliseconds
         """
         slow = self._get_random_slow()
-        logger.warning(_("Chaos action: slow {}ms".format(slow)))
+        logger.warning("Chaos action: slow %sms", slow)
         time.sleep(int(slow) / 1000)
+        return slow
+
+    def log_skipped(self) -> None:
+        """
+        Record that the action was evaluated but did not fire.
+        """
+        telemetry.count_action(self.model_key, self.pk, fired=False)
+
+    def log_event(self, target: str, injected_ms: int = 0) -> None:
+        """
+        Record that the action fired, see `telemetry.record_event`, and
+        count the injected delay against the budget.
+        """
+        self.spend_budget_ms(injected_ms)
+        self.log_fired(target, injected_ms)
+
+    def log_fired(self, target: str, injected_ms: int = 0) -> None:
+        """
+        Record that the action fired, for delay that already counted against
+        the budget.
+        """
+        telemetry.record_event(self.model_key, self.pk, self.verb, target, injected_ms)
+        telemetry.count_action(
+            self.model_key, self.pk, fired=True, injected_ms=injected_ms
+        )
 
     class Meta:
         abstract = True
@@ -391,28 +690,56 @@ class ChaosActionResponse(ChaosActionBase):
 
     objects = ChaosActionResponseManager()
 
+    model_key = "response"
+
     default_exception = chaos_exceptions.ChaosExceptionResponse
     default_exception_path = "django_chaos_engineering.exceptions.ChaosExceptionResponse"
 
     dump_cls = {
         _("act on url name"): "act_on_url_name",
+        _("url match"): "url_match",
+        _("request match"): "request_match",
     }
 
-    #: Map response codes to exceptions
-    #: Todo, it should be possible to override this with a setting
+    record_fields = ChaosActionBase.record_fields + (
+        "act_on_url_name",
+        "url_match",
+        "request_match",
+    )
+
+    #: Field values of actions created by `chaos storm`, they match any view
+    storm_defaults = {"act_on_url_name": ""}
+
+    #: Map response codes to exceptions, overridden by the
+    #: `status_code_exception_map` setting
     status_code_exception_map = {403: exceptions.PermissionDenied, 404: http.Http404}
 
-    #: Map response codes to django core views
-    #: Todo, it should be possible to override this with a setting
+    #: Map response codes to response classes, overridden by the
+    #: `status_code_response_map` setting
     status_code_response_map = {500: http.HttpResponseServerError}
 
     #: Used for random mock values and command choices
-    verb_choices_str = [verb_slow, verb_return, verb_raise]
+    verb_choices_str = [
+        verb_slow,
+        verb_return,
+        verb_raise,
+        verb_drip,
+        verb_stall,
+        verb_truncate,
+    ]
+    storm_verbs = [verb_slow, verb_return, verb_raise]
     verb_choices = (
         (verb_slow, _("slow")),
         (verb_return, _("return")),
         (verb_raise, _("raise")),
+        (verb_drip, _("drip")),
+        (verb_stall, _("stall")),
+        (verb_truncate, _("truncate")),
     )
+    #: Verbs that act on the content of streaming responses
+    stream_verbs = (verb_drip, verb_stall, verb_truncate)
+    #: Bytes before streaming responses stall or end without configuration
+    after_bytes = 65536
     verb = models.CharField(
         max_length=16,
         choices=verb_choices,
@@ -425,48 +752,311 @@ class ChaosActionResponse(ChaosActionBase):
         null=True,
         blank=True,
     )
+    url_match_choices = (
+        (matchers.url_match_exact, _("Exact url name")),
+        (matchers.url_match_glob, _("Url name glob pattern")),
+        (matchers.url_match_regex, _("Url name regular expression")),
+        (matchers.url_match_namespace, _("Namespace")),
+        (matchers.url_match_path, _("Path prefix")),
+    )
+    url_match = models.CharField(
+        max_length=16,
+        choices=url_match_choices,
+        default=matchers.url_match_exact,
+        help_text=_("How the url name field is matched against requests"),
+        verbose_name=_("Url match"),
+    )
+
+    request_match = models.TextField(
+        blank=True,
+        help_text=_("Only act on matching requests, like: method:POST"),
+        verbose_name=_("Request match"),
+    )
+
+    @cached_property
+    def request_predicates(self) -> typing.List[matchers.Predicate]:
+        """
+        The compiled request match, cached for the lifetime of the instance.
+        """
+        return matchers.compile_request_match(self.request_match)
+
+    def prepare(self) -> None:
+        super().prepare()
+        self.request_predicates
+        if self.verb == verb_return:
+            self.return_plan
+        elif self.verb == verb_slow:
+            self.latency_targets
+
+    def clean(self) -> None:
+        super().clean()
+        try:
+            matchers.compile_request_match(self.request_match)
+        except ValueError as e:
+            raise exceptions.ValidationError({"request_match": str(e)})
+        if self.url_match in (matchers.url_match_glob, matchers.url_match_regex):
+            try:
+                re.compile(
+                    matchers.pattern_to_regex(self.url_match, self.act_on_url_name or "")
+                )
+            except re.error as e:
+                raise exceptions.ValidationError(
+                    {"act_on_url_name": _("Invalid pattern: {}").format(e)}
+                )
 
     def __str__(self) -> str:
         return "{}: {} {}".format(self.pk, self.verb, self.act_on_url_name)
 
-    def perform(self) -> typing.Optional[http.HttpResponse]:
+    def perform(self, target: str = "") -> typing.Optional[http.HttpResponse]:
         """
         This is where the action should happen.
 
+        :param target: The url name of the request, for the event log
         :returns: http response object if necessary
         """
 
-        if self.random_act is False:
+        if self.random_act is False or not self.use_budget():
+            self.log_skipped()
             return None
         if self.verb == verb_slow:
-            self.perform_slow()
+            self.log_event(target, self.perform_slow())
         elif self.verb == verb_return:
+            self.log_event(target)
             return self.perform_return()
         elif self.verb == verb_raise:
+            self.log_event(target)
             self.perform_raise()
         return None
 
+    #: Chunk of generated bodies, see the `body_kb` KV
+    body_filler = b"chaos " * 171 + b"\n"
+
+    def _get_body(self, status_code: int) -> bytes:
+        """
+        The body of return responses.
+
+        In order of precedence the body is read from the `body_file` KV,
+        rendered from the template in the `body_template` KV, or generated with
+        the size in kilobytes from the `body_kb` KV. The default is a short
+        message.
+        """
+        body_file = self.get_arg(ChaosKV.attr_body_file, "")
+        path = self._get_body_path(body_file) if body_file else None
+        if path:
+            try:
+                with open(path, "rb") as fh:
+                    return fh.read()
+            except OSError as e:
+                logger.error(_("Could not read body file {}: {}").format(body_file, e))
+        body_template = self.get_arg(ChaosKV.attr_body_template, "")
+        if body_template:
+            try:
+                return render_to_string(
+                    body_template, {"action": self, "status_code": status_code}
+                ).encode()
+            except TemplateDoesNotExist as e:
+                logger.error(_("Could not render body template {}").format(e))
+        body_kb = self.get_arg(ChaosKV.attr_body_kb, 0)
+        if body_kb > 0:
+            size = body_kb * 1024
+            return (self.body_filler * (size // len(self.body_filler) + 1))[:size]
+        return _("Chaos response {}").format(status_code).encode()
+
+    @staticmethod
+    def _get_body_path(body_file: str) -> typing.Optional[str]:
+        """
+        The path of a body file, only files in the directory of the `body_dir`
+        setting are served.
+
+        :param body_file: A path relative to the directory
+        """
+        body_dir = telemetry.get_setting("body_dir")
+        if not body_dir:
+            logger.error(_("Body files need the body_dir setting"))
+            return None
+        body_dir = os.path.realpath(body_dir)
+        path = os.path.realpath(os.path.join(body_dir, body_file))
+        if os.path.commonpath([body_dir, path]) != body_dir:
+            logger.error(_("Body file {} is not in {}").format(body_file, body_dir))
+            return None
+        return path
+
+    def _get_headers(self) -> typing.Dict[str, str]:
+        """
+        The headers of return responses, from the JSON object in the `headers`
+        KV.
+        """
+        headers = self.get_arg(ChaosKV.attr_headers, "")
+        if not headers:
+            return {}
+        try:
+            headers = json.loads(headers)
+            if not isinstance(headers, dict):
+                raise ValueError(_("Not an object"))
+        except ValueError as e:
+            logger.error(_("Invalid headers {}: {}").format(headers, e))
+            return {}
+        return {str(name): str(value) for name, value in headers.items()}
+
+    @cached_property
+    def return_plan(self) -> ReturnPlan:
+        """
+        Everything a return action needs, prepared once for the lifetime of the
+        instance.
+        """
+        status_code = self.get_arg(ChaosKV.attr_status_code, 401)
+        exception_map = get_status_code_map(
+            "status_code_exception_map", self.status_code_exception_map
+        )
+        if status_code in exception_map:
+            return ReturnPlan(status_code, exception_map[status_code], None, b"", {})
+        response_map = get_status_code_map(
+            "status_code_response_map", self.status_code_response_map
+        )
+        headers = self._get_headers()
+        content_type = self.get_arg(ChaosKV.attr_content_type, "")
+        if content_type:
+            headers["Content-Type"] = content_type
+        return ReturnPlan(
+            status_code,
+            None,
+            response_map.get(status_code, http.HttpResponse),
+            self._get_body(status_code),
+            headers,
+        )
+
     def perform_return(self) -> http.HttpResponse:
         """
         Returns a specific HTTP status code or exception.
 
         :raises: Assume that this can raise any Django core/http exception
         """
-        status_code = self.get_arg("status_code", 401)
-        logger.warning(_("Chaos action: return {}".format(status_code)))
-        if status_code in self.status_code_exception_map:
-            raise self.status_code_exception_map[status_code]()
-        elif status_code in self.status_code_response_map:
-            response = self.status_code_response_map[status_code]()
-        else:
-            response = http.HttpResponse()
-            response.status_code = status_code
-        # TODO setting or action property
-        if True:
-            response.content = _("Chaos response {}".format(status_code))
-        logger.info(_("Response status set to {}".format(status_code)))
+        plan = self.return_plan
+        logger.warning("Chaos action: return %s", plan.status_code)
+        if plan.exception is not None:
+            raise plan.exception()
+        response = plan.response_class(plan.content, status=plan.status_code)
+        for name, value in plan.headers.items():
+            response[name] = value
         return response
 
+    @cached_property
+    def latency_targets(self) -> typing.List[typing.Tuple[float, int]]:
+        """
+        The total latency that slow actions pad responses to, as points of
+        percentile and milliseconds. Empty for slow actions that add their
+        delay to the response time.
+
+        The `percentiles` KV holds points like `50:200,99:900`, a `target_ms`
+        KV is the same as `100:<target_ms>`.
+        """
+        percentiles = self.get_arg(ChaosKV.attr_percentiles, "")
+        if percentiles:
+            try:
+                points = sorted(
+                    (float(percentile), int(ms))
+                    for percentile, ms in (
+                        point.split(":") for point in percentiles.split(",")
+                    )
+                )
+                if not 0 <= points[0][0] <= points[-1][0] <= 100:
+                    raise ValueError(_("Percentiles must be between 0 and 100"))
+                return points
+            except ValueError as e:
+                logger.error(_("Invalid percentiles {}: {}").format(percentiles, e))
+        target_ms = self.get_arg(ChaosKV.attr_target_ms, 0)
+        if target_ms:
+            return [(100.0, target_ms)]
+        return []
+
+    @property
+    def pads(self) -> bool:
+        """
+        If the action pads the response to a total latency, see
+        `latency_targets`.
+        """
+        return self.verb == verb_slow and bool(self.latency_targets)
+
+    def _get_random_target(self) -> int:
+        """
+        Sample a total latency, interpolating between the percentiles.
+
+        Below the lowest percentile its latency is used.
+        """
+        sample = random.uniform(0, 100)
+        lower_percentile, lower_ms = 0.0, self.latency_targets[0][1]
+        for percentile, ms in self.latency_targets:
+            if sample <= percentile:
+                if percentile == lower_percentile:
+                    return ms
+                share = (sample - lower_percentile) / (percentile - lower_percentile)
+                return int(lower_ms + (ms - lower_ms) * share)
+            lower_percentile, lower_ms = percentile, ms
+        return lower_ms
+
+    def perform_pad(self, elapsed_ms: float, target: str = "") -> int:
+        """
+        Delay a response until it took a sampled total latency. Nothing is added
+        to responses that already took longer.
+
+        :param elapsed_ms: The time since the middleware received the request
+        :param target: The url name of the request, for the event log
+        :returns: The delay in milliseconds
+        """
+        if self.random_act is False or not self.use_budget():
+            self.log_skipped()
+            return 0
+        total_ms = self._get_random_target()
+        pad = max(0, int(total_ms - elapsed_ms))
+        logger.warning("Chaos action: pad %sms to %sms", pad, total_ms)
+        if pad:
+            time.sleep(pad / 1000)
+        self.log_event(target, pad)
+        return pad
+
+    def perform_stream(
+        self, content: streaming.Chunks, target: str = ""
+    ) -> typing.Optional[typing.Iterator[bytes]]:
+        """
+        Wrap the content of a streaming response.
+
+        The delays count against the budget while they happen, the event is
+        logged with their total when the stream ends.
+
+        :param content: The chunks of the response
+        :param target: The url name of the request, for the event log
+        :returns: The wrapped content, or None if the action wasn't performed
+        """
+        if self.random_act is False or not self.use_budget():
+            self.log_skipped()
+            return None
+        logger.warning("Chaos action: %s stream", self.verb)
+        after = self.get_arg(ChaosKV.attr_after_bytes, self.after_bytes)
+        injected = []  # type: typing.List[int]
+
+        def delay() -> None:
+            injected_ms = self.perform_slow()
+            self.spend_budget_ms(injected_ms)
+            injected.append(injected_ms)
+
+        if self.verb == verb_drip:
+            wrapped = streaming.drip(content, delay)
+        elif self.verb == verb_stall:
+            wrapped = streaming.stall(content, after, delay)
+        elif self.verb == verb_truncate:
+            wrapped = streaming.truncate(content, after)
+        else:
+            return None
+        return self._log_stream(wrapped, target, injected)
+
+    def _log_stream(
+        self, content: streaming.Chunks, target: str, injected: typing.List[int]
+    ) -> typing.Iterator[bytes]:
+        try:
+            yield from content
+        finally:
+            self.log_fired(target, sum(injected))
+
     class Meta:
         ordering = ("-mtime",)
         verbose_name = _("ChaosActionResponse")
@@ -480,10 +1070,11 @@ class ChaosActionDBQuerySet(ChaosActionQuerySet):
 
         This method is supposed to make the database router more
         efficient by only querying actions that are possible for the
-        passed model.
+        passed model. Actions with a blank value match any model.
         """
         return self.filter(
-            Q(act_on_value=str(model._meta.app_label))
+            Q(act_on_value="")
+            | Q(act_on_value=str(model._meta.app_label))
             | Q(act_on_value=str(model.__name__))
             | Q(act_on_value=str(model.__class__.__name__))
             | Q(act_on_value=str(model.__module__))
@@ -505,21 +1096,41 @@ class ChaosActionDB(ChaosActionBase):
 
     objects = ChaosActionDBManager()
 
+    model_key = "db"
+
     default_exception = chaos_exceptions.ChaosExceptionDB
     default_exception_path = "django_chaos_engineering.exceptions.ChaosExceptionDB"
 
     dump_cls = {
         _("act on attribute"): "act_on_attribute",
         _("act on value"): "act_on_value",
+        _("act on alias"): "act_on_alias",
         _("default attribute"): "attr_default",
     }
 
+    record_fields = ChaosActionBase.record_fields + (
+        "act_on_attribute",
+        "act_on_value",
+        "act_on_alias",
+    )
+
     verb_choices = (
         (verb_slow, _("slow")),
         (verb_raise, _("raise")),
+        (verb_reroute, _("reroute")),
+        (verb_drop, _("drop")),
     )
     #: Used for random mock values and command choices
-    verb_choices_str = [verb_slow, verb_raise]
+    verb_choices_str = [verb_slow, verb_raise, verb_reroute, verb_drop]
+    #: Verbs of actions created by `chaos storm`, rerouting needs an alias and
+    #: dropped connections break running transactions
+    storm_verbs = [verb_slow, verb_raise]
+
+    #: Close the connection, Django reconnects on the next query
+    drop_close = "close"
+    #: Fail the next statement with an `OperationalError`
+    drop_error = "error"
+    drop_choices_str = [drop_close, drop_error]
     #: Used for random mock values and command choices
     attr_choices_str = [data["attribute"] for attr, data in attr_choices_db.items()]
     attr_choices_field = [
@@ -528,6 +1139,9 @@ class ChaosActionDB(ChaosActionBase):
     #: Default attribute when using the `chaos` command
     attr_default = attr_choices_db["attr_app_label"]["attribute"]
 
+    #: Field values of actions created by `chaos storm`, they match any model
+    storm_defaults = {"act_on_attribute": attr_default, "act_on_value": ""}
+
     verb = models.CharField(
         max_length=16,
         choices=verb_choices,
@@ -546,35 +1160,382 @@ class ChaosActionDB(ChaosActionBase):
         blank=True,
         # TODO app label validator (might not be a good idea?)
     )
+    act_on_alias = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Only act on queries for this database alias, blank for any"),
+        verbose_name=_("Act on alias"),
+    )
+
+    def clean(self) -> None:
+        super().clean()
+        if self.act_on_alias and self.act_on_alias not in settings.DATABASES:
+            raise exceptions.ValidationError(
+                {"act_on_alias": _("Unknown database {}").format(self.act_on_alias)}
+            )
 
     def __str__(self) -> str:
         return "{}: {} {} {}".format(
             self.pk, self.verb, self.act_on_attribute, self.act_on_value
         )
 
-    def perform(self) -> bool:
+    def perform(self, target: str = "", alias: str = DEFAULT_DB_ALIAS) -> bool:
         """
         This is where the action should happen.
 
+        :param target: The label of the routed model, for the event log
+        :param alias: The database alias the query goes to
         :returns: If the action was performed or not
         """
 
-        if self.random_act is False:
+        if self.random_act is False or not self.use_budget():
+            self.log_skipped()
             return False
         if self.verb == verb_slow:
-            self.perform_slow()
+            self.log_event(target, self.perform_slow())
             return True
         elif self.verb == verb_raise:
+            self.log_event(target)
             self.perform_raise()
             return True  # Only reached during tests
+        elif self.verb == verb_reroute:
+            self.log_event(target)
+            logger.warning(
+                "Chaos action: reroute to %s", self.get_arg(ChaosKV.attr_alias, "")
+            )
+            return True
+        elif self.verb == verb_drop:
+            self.log_event(target)
+            self.perform_drop(alias)
+            return True
         return None
 
+    def perform_drop(self, alias: str) -> None:
+        """
+        Drop the connection to a database.
+
+        By default the connection is closed, so the next query has to
+        reconnect. With the `drop` KV set to `error` the next statement on the
+        connection fails with an `OperationalError` instead, like it would
+        when the server went away.
+
+        :param alias: The database alias of the connection
+        """
+        connection = connections[alias]
+        if self.get_arg(ChaosKV.attr_drop, self.drop_close) == self.drop_error:
+            logger.warning("Chaos action: fail next statement on %s", alias)
+
+            def fail_next(execute, sql, params, many, context):
+                connection.execute_wrappers.remove(fail_next)
+                raise OperationalError(_("Chaos action: connection dropped"))
+
+            connection.execute_wrappers.append(fail_next)
+        else:
+            logger.warning("Chaos action: close connection %s", alias)
+            connection.close()
+
+    def get_reroute_alias(self) -> typing.Optional[str]:
+        """
+        The database alias a reroute action sends queries to.
+
+        :returns: The `alias` KV, or `None` if it isn't a configured database
+        """
+        alias = self.get_arg(ChaosKV.attr_alias, "")
+        if alias not in settings.DATABASES:
+            logger.error("Chaos action: can't reroute to unknown database %s", alias)
+            return None
+        return alias
+
     class Meta:
         ordering = ("-mtime",)
         verbose_name = _("ChaosActionDB")
         verbose_name_plural = _("ChaosActionDBs")
 
 
+class ChaosActionCacheManager(ChaosActionBaseManager):
+    def get_queryset(self) -> models.QuerySet:
+        return ChaosActionQuerySet(self.model, using=self._db)
+
+
+class ChaosActionCache(ChaosActionBase):
+    """
+    A chaos action for cache operations, see `cache.ChaosCacheBackend`.
+    """
+
+    objects = ChaosActionCacheManager()
+
+    model_key = "cache"
+
+    default_exception = chaos_exceptions.ChaosExceptionCache
+    default_exception_path = "django_chaos_engineering.exceptions.ChaosExceptionCache"
+
+    dump_cls = {
+        _("act on prefix"): "act_on_prefix",
+        _("act on cache"): "act_on_cache",
+    }
+
+    record_fields = ChaosActionBase.record_fields + ("act_on_prefix", "act_on_cache")
+
+    verb_choices = (
+        (verb_slow, _("slow")),
+        (verb_raise, _("raise")),
+        (verb_miss, _("miss")),
+        (verb_stale, _("stale")),
+    )
+    #: Used for random mock values and command choices
+    verb_choices_str = [verb_slow, verb_raise, verb_miss, verb_stale]
+
+    verb = models.CharField(
+        max_length=16,
+        choices=verb_choices,
+        help_text=_("Please refer to the documentation for configuration hints"),
+    )
+    act_on_prefix = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Only act on cache keys with this prefix, blank for any"),
+        verbose_name=_("Act on prefix"),
+    )
+    act_on_cache = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Only act on this wrapped cache alias, blank for any"),
+        verbose_name=_("Act on cache"),
+    )
+
+    def clean(self) -> None:
+        super().clean()
+        if self.act_on_cache and self.act_on_cache not in settings.CACHES:
+            raise exceptions.ValidationError(
+                {"act_on_cache": _("Unknown cache {}").format(self.act_on_cache)}
+            )
+
+    def __str__(self) -> str:
+        return "{}: {} {} {}".format(
+            self.pk, self.verb, self.act_on_cache, self.act_on_prefix
+        )
+
+    def perform(self, target: str = "") -> bool:
+        """
+        This is where the action should happen.
+
+        Misses and stale values are up to the cache backend, this only tells
+        it that the action fired.
+
+        :param target: The cache key, for the event log
+        :returns: If the action was performed or not
+        """
+
+        if self.random_act is False or not self.use_budget():
+            self.log_skipped()
+            return False
+        if self.verb == verb_slow:
+            self.log_event(target, self.perform_slow())
+        elif self.verb == verb_raise:
+            self.log_event(target)
+            self.perform_raise()
+        else:
+            self.log_event(target)
+            logger.warning("Chaos action: cache %s %s", self.verb, target)
+        return True
+
+    class Meta:
+        ordering = ("-mtime",)
+        verbose_name = _("ChaosActionCache")
+        verbose_name_plural = _("ChaosActionCaches")
+
+
+class ChaosActionStorageManager(ChaosActionBaseManager):
+    def get_queryset(self) -> models.QuerySet:
+        return ChaosActionQuerySet(self.model, using=self._db)
+
+
+class ChaosActionStorage(ChaosActionBase):
+    """
+    A chaos action for file storage operations, see `storage.ChaosStorage`.
+    """
+
+    objects = ChaosActionStorageManager()
+
+    model_key = "storage"
+
+    default_exception = chaos_exceptions.ChaosExceptionStorage
+    default_exception_path = "django_chaos_engineering.exceptions.ChaosExceptionStorage"
+
+    #: Storage methods actions can act on
+    method_open = "open"
+    method_save = "save"
+    method_exists = "exists"
+    method_url = "url"
+    method_listdir = "listdir"
+    method_choices_str = [
+        method_open,
+        method_save,
+        method_exists,
+        method_url,
+        method_listdir,
+    ]
+
+    #: Throughput of throttled reads and writes without a configuration
+    bytes_per_second = 65536
+
+    dump_cls = {
+        _("act on prefix"): "act_on_prefix",
+        _("act on method"): "act_on_method",
+    }
+
+    record_fields = ChaosActionBase.record_fields + ("act_on_prefix", "act_on_method")
+
+    verb_choices = (
+        (verb_slow, _("slow")),
+        (verb_raise, _("raise")),
+        (verb_throttle, _("throttle")),
+    )
+    #: Used for random mock values and command choices
+    verb_choices_str = [verb_slow, verb_raise, verb_throttle]
+
+    verb = models.CharField(
+        max_length=16,
+        choices=verb_choices,
+        help_text=_("Please refer to the documentation for configuration hints"),
+    )
+    act_on_prefix = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Only act on file names with this prefix, blank for any"),
+        verbose_name=_("Act on prefix"),
+    )
+    act_on_method = models.CharField(
+        max_length=16,
+        blank=True,
+        choices=[(method, method) for method in method_choices_str],
+        help_text=_("Only act on this storage method, blank for any"),
+        verbose_name=_("Act on method"),
+    )
+
+    def __str__(self) -> str:
+        return "{}: {} {} {}".format(
+            self.pk, self.verb, self.act_on_method, self.act_on_prefix
+        )
+
+    def get_bytes_per_second(self) -> int:
+        return max(
+            1, int(self.get_arg(ChaosKV.attr_bytes_per_second, self.bytes_per_second))
+        )
+
+    def perform(self, target: str = "", size: int = 0) -> bool:
+        """
+        This is where the action should happen.
+
+        Throttled reads are up to the storage, which knows how much is read.
+
+        :param target: The file name, for the event log
+        :param size: The number of written bytes, for throttled writes
+        :returns: If the action was performed or not
+        """
+
+        if self.random_act is False or not self.use_budget():
+            self.log_skipped()
+            return False
+        if self.verb == verb_slow:
+            self.log_event(target, self.perform_slow())
+        elif self.verb == verb_raise:
+            self.log_event(target)
+            self.perform_raise()
+        elif self.verb == verb_throttle:
+            self.log_event(target, self.perform_throttle(size))
+        return True
+
+    def perform_throttle(self, size: int) -> int:
+        """
+        Sleep as long as transferring some bytes takes at the throttled rate.
+
+        :param size: The number of bytes
+        :returns: The delay in milliseconds
+        """
+        if not size:
+            return 0
+        delay = int(size * 1000 / self.get_bytes_per_second())
+        logger.warning("Chaos action: throttle %s bytes by %sms", size, delay)
+        time.sleep(delay / 1000)
+        return delay
+
+    class Meta:
+        ordering = ("-mtime",)
+        verbose_name = _("ChaosActionStorage")
+        verbose_name_plural = _("ChaosActionStorages")
+
+
+class ChaosActionEmailManager(ChaosActionBaseManager):
+    def get_queryset(self) -> models.QuerySet:
+        return ChaosActionQuerySet(self.model, using=self._db)
+
+
+class ChaosActionEmail(ChaosActionBase):
+    """
+    A chaos action for sent emails, see `mail.ChaosEmailBackend`.
+    """
+
+    objects = ChaosActionEmailManager()
+
+    model_key = "email"
+
+    default_exception = chaos_exceptions.ChaosExceptionEmail
+    default_exception_path = "django_chaos_engineering.exceptions.ChaosExceptionEmail"
+
+    dump_cls = {_("act on recipient"): "act_on_recipient"}
+
+    record_fields = ChaosActionBase.record_fields + ("act_on_recipient",)
+
+    verb_choices = (
+        (verb_slow, _("slow")),
+        (verb_raise, _("raise")),
+    )
+    #: Used for random mock values and command choices
+    verb_choices_str = [verb_slow, verb_raise]
+
+    verb = models.CharField(
+        max_length=16,
+        choices=verb_choices,
+        help_text=_("Please refer to the documentation for configuration hints"),
+    )
+    act_on_recipient = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_(
+            "Only act on messages to recipients ending with this, like @example.com,"
+            " blank for any"
+        ),
+        verbose_name=_("Act on recipient"),
+    )
+
+    def __str__(self) -> str:
+        return "{}: {} {}".format(self.pk, self.verb, self.act_on_recipient)
+
+    def perform(self, target: str = "") -> bool:
+        """
+        This is where the action should happen.
+
+        :param target: The recipients of the message, for the event log
+        :returns: If the action was performed or not
+        """
+
+        if self.random_act is False or not self.use_budget():
+            self.log_skipped()
+            return False
+        if self.verb == verb_slow:
+            self.log_event(target, self.perform_slow())
+        elif self.verb == verb_raise:
+            self.log_event(target)
+            self.perform_raise()
+        return True
+
+    class Meta:
+        ordering = ("-mtime",)
+        verbose_name = _("ChaosActionEmail")
+        verbose_name_plural = _("ChaosActionEmails")
+
+
 class ChaosKV(models.Model):
     """
     Key-value store for additional action configuration.
@@ -595,6 +1556,26 @@ class ChaosKV(models.Model):
     attr_status_code = "status_code"
     #: Who created this action, used for auto-generated ones
     attr_creator = "creator"
+    #: The database alias for reroute actions
+    attr_alias = "alias"
+    #: How drop actions drop the connection
+    attr_drop = "drop"
+    #: The throughput of throttle actions
+    attr_bytes_per_second = "bytes_per_second"
+    #: The body of return actions, a file, a template or a size in kilobytes
+    attr_body_file = "body_file"
+    attr_body_template = "body_template"
+    attr_body_kb = "body_kb"
+    #: The content type of return actions
+    attr_content_type = "content_type"
+    #: Headers of return actions as a JSON object
+    attr_headers = "headers"
+    #: Bytes before streaming responses stall or end
+    attr_after_bytes = "after_bytes"
+    #: Total latency of slow response actions in milliseconds
+    attr_target_ms = "target_ms"
+    #: Total latency distribution of slow response actions, like `50:200,99:900`
+    attr_percentiles = "percentiles"
     #: Used for random mock values
     attr_choices_str = [
         attr_creator,
@@ -636,3 +1617,140 @@ class ChaosKV(models.Model):
         ordering = ("key",)
         verbose_name = _("ChaosKeyValue")
         verbose_name_plural = _("ChaosKeyValues")
+
+
+#: Action models by their `model_choices` key
+action_models = {
+    ChaosActionResponse.model_key: ChaosActionResponse,
+    ChaosActionDB.model_key: ChaosActionDB,
+    ChaosActionCache.model_key: ChaosActionCache,
+    ChaosActionStorage.model_key: ChaosActionStorage,
+    ChaosActionEmail.model_key: ChaosActionEmail,
+}
+
+
+class ChaosEvent(models.Model):
+    """
+    Injection event log entry, written in batches by `telemetry`.
+    """
+
+    model = models.CharField(max_length=16, verbose_name=_("Action model"))
+    action_id = models.PositiveIntegerField(verbose_name=_("Action id"))
+    verb = models.CharField(max_length=16, verbose_name=_("Verb"))
+    target = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Url name or model label the action fired on"),
+        verbose_name=_("Target"),
+    )
+    injected_ms = models.PositiveIntegerField(
+        default=0, verbose_name=_("Injected delay (ms)")
+    )
+    host = models.CharField(max_length=255, verbose_name=_("Host"))
+    ctime = models.DateTimeField(
+        default=timezone.now, db_index=True, verbose_name=_("Creation time")
+    )
+
+    def __str__(self) -> str:
+        return "{} {}:{} {} {}".format(
+            self.ctime, self.model, self.action_id, self.verb, self.target
+        )
+
+    class Meta:
+        ordering = ("-ctime",)
+        verbose_name = _("ChaosEvent")
+        verbose_name_plural = _("ChaosEvents")
+
+
+class ChaosGenerationManager(models.Manager):
+    #: The primary key of the only row
+    row_id = 1
+
+    _deferred = threading.local()
+
+    def current(self) -> typing.Tuple[int, str]:
+        """
+        The current configuration generation.
+
+        :returns: The generation number and a random token. The token changes
+                  with every bump, even when a rolled back transaction or a
+                  restored database repeat a generation number.
+        """
+        row = self.filter(pk=self.row_id).values_list("generation", "token").first()
+        return row or (0, "")
+
+    def bump(self) -> None:
+        """
+        Mark the chaos configuration as changed.
+        """
+        if getattr(self._deferred, "depth", 0):
+            self._deferred.pending = True
+            return
+        token = uuid.uuid4().hex
+        updated = self.filter(pk=self.row_id).update(
+            generation=F("generation") + 1, token=token, mtime=timezone.now()
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    self.create(pk=self.row_id, generation=1, token=token)
+            except IntegrityError:
+                # Somebody else created the row
+                self.bump()
+                return
+        # Changes take effect in this process right away, regardless of the
+        # snapshot TTL and refresh thread
+        from django_chaos_engineering import snapshot
+
+        snapshot.expire()
+
+    @contextmanager
+    def deferred(self) -> typing.Iterator[None]:
+        """
+        Bump the generation only once for all changes made in the block.
+        """
+        state = self._deferred
+        state.depth = getattr(state, "depth", 0) + 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if not state.depth and getattr(state, "pending", False):
+                state.pending = False
+                self.bump()
+
+
+class ChaosGeneration(models.Model):
+    """
+    Single row marker that changes whenever the chaos configuration changes.
+
+    Processes that cache the configuration can compare this cheap marker to
+    know when to reload it.
+    """
+
+    generation = models.BigIntegerField(default=0, verbose_name=_("Generation"))
+    token = models.CharField(max_length=32, verbose_name=_("Token"))
+    mtime = models.DateTimeField(
+        auto_now=timezone.now, verbose_name=_("Modification time")
+    )
+
+    objects = ChaosGenerationManager()
+
+    def __str__(self) -> str:
+        return "{} ({})".format(self.generation, self.token)
+
+    class Meta:
+        verbose_name = _("ChaosGeneration")
+        verbose_name_plural = _("ChaosGenerations")
+
+
+def bump_generation(sender, **kwargs) -> None:
+    ChaosGeneration.objects.bump()
+
+
+for sender in [ChaosKV, *action_models.values()]:
+    post_save.connect(bump_generation, sender=sender)
+    post_delete.connect(bump_generation, sender=sender)
+for cls in action_models.values():
+    m2m_changed.connect(bump_generation, sender=cls.for_users.through)
+    m2m_changed.connect(bump_generation, sender=cls.for_groups.through)
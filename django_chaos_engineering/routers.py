@@ -3,12 +3,15 @@ Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
 """
 
 import typing
-from operator import attrgetter
 
+from django.db import DEFAULT_DB_ALIAS, router
 from django.db.models import Model
 from django.conf import settings
+from django.utils import timezone
 
-from django_chaos_engineering import models
+from django_chaos_engineering.models import verb_drop, verb_reroute
+from django_chaos_engineering.snapshot import get_snapshot
+from django_chaos_engineering.targeting import get_acting_user
 
 
 class ChaosRouter:
@@ -16,18 +19,64 @@ class ChaosRouter:
     Using a db router for chaos actions is a hack.
 
     I'm a hacker.
+
+    The router returns `None`, so the next router decides, unless a reroute
+    action fires or an action needed the database alias. The router then asks
+    the other routers itself and returns their alias, so actions act on the
+    database the query actually goes to, even with routers that pick a
+    replica at random.
     """
 
-    def do_chaos(self, model: typing.Type[Model]):
+    def get_alias(self, method: str, model: typing.Type[Model], **hints) -> str:
         """
-        Get the actual action and perform its side effect.
+        The database alias the other routers choose.
+
+        This works like Django's `ConnectionRouter`, but skips chaos routers.
+        The routers before this one already returned `None`, so put the
+        `ChaosRouter` first to target the aliases of the others.
+
+        :param method: `db_for_read` or `db_for_write`
+        :param model: The routed model
+        :param hints: The routing hints
         """
+        for other in router.routers:
+            if isinstance(other, ChaosRouter):
+                continue
+            alias = getattr(other, method, lambda model, **hints: None)(model, **hints)
+            if alias:
+                return alias
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return DEFAULT_DB_ALIAS
 
-        actions = models.ChaosActionDB.objects.enabled().on_this_host().for_model(model)
+    def do_chaos(
+        self, model: typing.Type[Model], method: str = "db_for_read", **hints
+    ) -> typing.Optional[str]:
+        """
+        Get the actual action and perform its side effect.
+
+        The database alias is only determined when an action targets one or
+        drops its connection.
+
+        :returns: The alias of the first performed reroute action, or the alias
+                  the actions acted on, or `None` when no alias was determined
+        """
+        snapshot = get_snapshot()
+        alias = None
+        if snapshot.uses_alias:
+            alias = self.get_alias(method, model, **hints)
+        rerouted = None
+        actions = snapshot.for_model(model, timezone.now(), alias, get_acting_user())
         for action in actions:
-            wanted_value = attrgetter(action.act_on_attribute)(model)
-            if wanted_value == action.act_on_value:
-                action.perform()
+            if action.verb == verb_drop and alias is None:
+                alias = self.get_alias(method, model, **hints)
+            performed = action.perform(
+                target=model._meta.label, alias=alias or DEFAULT_DB_ALIAS
+            )
+            if performed and action.verb == verb_reroute and rerouted is None:
+                rerouted = action.get_reroute_alias()
+        return rerouted or alias
 
     def db_for_read(self, model, **hints):
         """
@@ -40,8 +89,7 @@ class ChaosRouter:
             *settings.CHAOS.get("ignore_apps", []),
         ]:
             return None
-        self.do_chaos(model)
-        return None
+        return self.do_chaos(model, "db_for_read", **hints)
 
     def db_for_write(self, model, **hints):
         """
@@ -54,5 +102,4 @@ class ChaosRouter:
             *settings.CHAOS.get("ignore_apps", []),
         ]:
             return None
-        self.do_chaos(model)
-        return None
+        return self.do_chaos(model, "db_for_write", **hints)
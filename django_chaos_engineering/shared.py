@@ -0,0 +1,248 @@
+"""
+A snapshot of the chaos configuration shared by all processes of a host.
+
+Every process loads its own snapshot from the database by default, so the
+number of configuration queries grows with the number of workers. With the
+`snapshot_file` setting one publisher writes the enabled actions to a file
+instead, and processes map that file into memory:
+
+.. code-block:: python
+
+    CHAOS = {"snapshot_file": "/run/chaos/snapshot"}
+
+.. code-block:: shell
+
+   manage.py chaos publish --interval 5
+
+A new file is written next to the old one and renamed over it, so readers
+always see a complete file. Checking for changes is a `stat()` and a read of
+the mapped header, the actions are only decoded when the generation in the
+header changed. Without a published file processes fall back to the database.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import typing
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from django_chaos_engineering import models, telemetry
+
+
+#: Identifies snapshot files
+magic = b"CHAOSMAP"
+
+#: Version of the file format
+format_version = 1
+
+#: Magic, format version, generation, token and payload length
+header = struct.Struct("<8sIQ32sQ")
+
+#: A generation number and token, see `models.ChaosGeneration`
+Version = typing.Tuple[int, str]
+
+#: Actions by model key and targeted user and group ids, see `snapshot.Snapshot`
+Actions = typing.Dict[str, typing.List[models.ChaosActionBase]]
+Targets = typing.Dict[typing.Tuple[str, int], typing.Tuple[set, set]]
+
+
+def encode(version: Version, actions: Actions, targets: Targets) -> bytes:
+    """
+    Serialize the actions of a snapshot with their KVs and targeting.
+
+    :param version: The configuration generation of the actions
+    :param actions: Actions by model key
+    :param targets: User and group ids by model key and action id
+    :returns: The file content
+    """
+    data = {
+        "actions": {
+            key: [
+                {
+                    "fields": {
+                        field.attname: getattr(action, field.attname)
+                        for field in action._meta.concrete_fields
+                    },
+                    "args": action.args,
+                }
+                for action in key_actions
+            ]
+            for key, key_actions in actions.items()
+        },
+        "targets": [
+            [key, action_id, sorted(users), sorted(groups)]
+            for (key, action_id), (users, groups) in targets.items()
+        ],
+    }
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+    generation, token = version
+    return (
+        header.pack(magic, format_version, generation, token.encode(), len(payload))
+        + payload
+    )
+
+
+def _make_action(
+    action_cls: typing.Type[models.ChaosActionBase], record: dict
+) -> models.ChaosActionBase:
+    fields = action_cls._meta.concrete_fields
+    action = action_cls.from_db(
+        None,
+        [field.attname for field in fields],
+        [field.to_python(record["fields"][field.attname]) for field in fields],
+    )
+    # The KVs are part of the snapshot, see `ChaosActionBase.args`
+    action.__dict__["args"] = record["args"]
+    return action
+
+
+def decode(buffer: bytes) -> typing.Tuple[Version, dict]:
+    """
+    Read the header and payload of a snapshot file.
+
+    :raises ValueError: For truncated files or other formats
+    """
+    version, length = read_header(buffer)
+    payload = bytes(buffer[header.size : header.size + length])
+    if len(payload) != length:
+        raise ValueError("Truncated chaos snapshot file")
+    return version, json.loads(payload.decode())
+
+
+def read_header(buffer: bytes) -> typing.Tuple[Version, int]:
+    """
+    Read the version and payload length of a snapshot file.
+
+    :raises ValueError: For truncated files or other formats
+    """
+    if len(buffer) < header.size:
+        raise ValueError("Truncated chaos snapshot file")
+    file_magic, file_version, generation, token, length = header.unpack_from(buffer)
+    if file_magic != magic or file_version != format_version:
+        raise ValueError("Not a chaos snapshot file")
+    return (generation, token.rstrip(b"\0").decode()), length
+
+
+def write(path: str, content: bytes) -> None:
+    """
+    Replace a snapshot file atomically.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), prefix=".chaos-"
+    )
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(content)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class SnapshotFile:
+    """
+    A published snapshot file, mapped into memory.
+
+    The mapping is replaced when the file was renamed over or changed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        #: The identity of the mapped file and its mapping, replaced at once so
+        #: threads never see a mapping with the identity of another file
+        self.mapped = None  # type: typing.Optional[typing.Tuple[tuple, bytes]]
+        self.lock = threading.Lock()
+
+    def _remap(self) -> typing.Optional[bytes]:
+        """
+        The mapped file content, `None` without a file.
+        """
+        try:
+            result = os.stat(self.path)
+        except FileNotFoundError:
+            self.mapped = None
+            return None
+        identity = (result.st_dev, result.st_ino, result.st_size, result.st_mtime_ns)
+        mapped = self.mapped
+        if mapped is not None and mapped[0] == identity:
+            return mapped[1]
+        with self.lock:
+            mapped = self.mapped
+            if mapped is None or mapped[0] != identity:
+                with open(self.path, "rb") as fh:
+                    result = os.fstat(fh.fileno())
+                    identity = (
+                        result.st_dev,
+                        result.st_ino,
+                        result.st_size,
+                        result.st_mtime_ns,
+                    )
+                    # Empty files can't be mapped, read_header rejects them
+                    content = (
+                        mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                        if result.st_size
+                        else b""
+                    )
+                mapped = self.mapped = (identity, content)
+        return mapped[1]
+
+    def version(self) -> typing.Optional[Version]:
+        """
+        The generation of the published snapshot.
+
+        :returns: `None` without a file
+        :raises ValueError: For files of other formats
+        """
+        buffer = self._remap()
+        if buffer is None:
+            return None
+        return read_header(buffer)[0]
+
+    def read(self) -> typing.Tuple[Version, Actions, Targets]:
+        """
+        Decode the actions of this host.
+
+        :raises ValueError: For files of other formats
+        """
+        buffer = self._remap()
+        if buffer is None:
+            raise ValueError("Missing chaos snapshot file")
+        version, data = decode(buffer)
+        hostnames = models.get_hostnames()
+        actions = {}  # type: Actions
+        for key, action_cls in models.action_models.items():
+            actions[key] = [
+                _make_action(action_cls, record)
+                for record in data["actions"].get(key, [])
+                if record["fields"]["on_host"] in hostnames
+                or not record["fields"]["on_host"]
+            ]
+        targets = {
+            (key, action_id): (set(users), set(groups))
+            for key, action_id, users, groups in data["targets"]
+        }  # type: Targets
+        return version, actions, targets
+
+
+_files = {}  # type: typing.Dict[str, SnapshotFile]
+
+
+def get_snapshot_file() -> typing.Optional[SnapshotFile]:
+    """
+    The snapshot file of the `snapshot_file` setting.
+    """
+    path = telemetry.get_setting("snapshot_file")
+    if not path:
+        return None
+    if path not in _files:
+        _files[path] = SnapshotFile(path)
+    return _files[path]
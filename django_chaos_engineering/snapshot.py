@@ -0,0 +1,415 @@
+"""
+In-memory snapshot of the chaos configuration.
+
+Matching actions against requests and models happens on every request and on
+every ORM query, so it must not hit the database. The enabled actions of this
+host are loaded once, together with their KVs and targeting, and kept until
+the configuration generation changes. Time windows, url names, users and
+models are then matched in memory.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import logging
+import threading
+import time
+import typing
+from datetime import datetime
+from operator import attrgetter
+
+from django.db.models import Model
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.test.signals import setting_changed
+from django.utils.functional import cached_property
+
+from django_chaos_engineering import models, shared, telemetry
+from django_chaos_engineering.matchers import PrefixTrie, UrlMatcher, match_request
+from django_chaos_engineering.targeting import ActingUser
+
+
+logger = logging.getLogger(__name__)
+
+#: A generation number and token, see `models.ChaosGeneration`
+Version = shared.Version
+
+#: Default seconds between generation checks, see `get_snapshot`
+default_snapshot_ttl = 5
+
+
+class Snapshot:
+    """
+    The enabled actions of this host at one configuration generation.
+    """
+
+    def __init__(
+        self,
+        version: Version,
+        actions: typing.Dict[str, typing.List[models.ChaosActionBase]],
+        targets: typing.Dict[typing.Tuple[str, int], typing.Tuple[set, set]],
+    ) -> None:
+        """
+        :param version: The configuration generation of the actions
+        :param actions: Actions by model key, see `models.action_models`
+        :param targets: User and group ids by model key and action id, only for
+                        targeted actions
+        """
+        self.version = version
+        self.actions = actions
+        self.targets = targets
+
+    def __len__(self) -> int:
+        return sum(len(actions) for actions in self.actions.values())
+
+    @classmethod
+    def load(cls, version: Version, all_hosts: bool = False) -> "Snapshot":
+        """
+        Load the enabled actions of this host.
+
+        Targeting is read from the through tables, prefetching users and groups
+        would send queries for other apps through the chaos router.
+
+        :param all_hosts: Load the actions of all hosts, for publishing
+        """
+        actions = {}
+        targets = {}  # type: typing.Dict[typing.Tuple[str, int], typing.Tuple[set, set]]
+        for key, action_cls in models.action_models.items():
+            queryset = action_cls.objects.enabled()
+            if not all_hosts:
+                queryset = queryset.on_this_host()
+            actions[key] = list(queryset.prefetch_related("chaos_kvs"))
+            for index, attr in enumerate(("for_users", "for_groups")):
+                field = action_cls._meta.get_field(attr)
+                rows = field.remote_field.through.objects.values_list(
+                    field.m2m_field_name() + "_id",
+                    field.m2m_reverse_field_name() + "_id",
+                )
+                for action_id, target_id in rows:
+                    target = targets.setdefault((key, action_id), (set(), set()))
+                    target[index].add(target_id)
+        return cls(version, actions, targets)
+
+    def warm(self) -> None:
+        """
+        Build the matchers and prepare every action now instead of on first use.
+
+        An action that can't be prepared is logged and skipped, it fails again
+        when it fires.
+        """
+        self.url_matcher
+        self.uses_alias
+        self.cache_prefixes
+        self.storage_prefixes
+        for actions in self.actions.values():
+            for action in actions:
+                try:
+                    action.prepare()
+                except Exception:
+                    logger.exception(
+                        "Chaos action: %s %s could not be prepared",
+                        action.model_key,
+                        action.pk,
+                    )
+
+    def get_actions(self, model_key: str) -> typing.List[models.ChaosActionBase]:
+        return self.actions.get(model_key, [])
+
+    @cached_property
+    def url_matcher(self) -> UrlMatcher:
+        return UrlMatcher(
+            [
+                (action.url_match, action.act_on_url_name)
+                for action in self.get_actions(models.ChaosActionResponse.model_key)
+            ]
+        )
+
+    def for_request(
+        self, request: HttpRequest, now: datetime
+    ) -> typing.Iterator[models.ChaosActionResponse]:
+        """
+        The response actions for a resolved request that are active now.
+
+        Checks run from cheapest to most expensive, the groups of the user are
+        only queried when a targeted action matches everything else.
+
+        :param request: The request, with its `resolver_match`
+        :param now: The current time
+        """
+        group_ids = None  # type: typing.Optional[set]
+        user = request.user
+        actions = self.get_actions(models.ChaosActionResponse.model_key)
+        for index in self.url_matcher.match(request.path_info, request.resolver_match):
+            action = actions[index]
+            if not action.is_active(now):
+                continue
+            if not match_request(action.request_predicates, request):
+                continue
+            target = self.targets.get((action.model_key, action.pk))
+            if target is not None:
+                if group_ids is None:
+                    group_ids = set(user.groups.values_list("pk", flat=True))
+                if user.pk not in target[0] and not group_ids & target[1]:
+                    continue
+            yield action
+
+    @cached_property
+    def uses_alias(self) -> bool:
+        """
+        If any database action targets a database alias.
+        """
+        return any(
+            action.act_on_alias
+            for action in self.get_actions(models.ChaosActionDB.model_key)
+        )
+
+    def for_model(
+        self,
+        model: typing.Type[Model],
+        now: datetime,
+        alias: typing.Optional[str] = None,
+        acting: typing.Optional[ActingUser] = None,
+    ) -> typing.Iterator[models.ChaosActionDB]:
+        """
+        The database actions for a model that are active now.
+
+        :param model: The model class
+        :param now: The current time
+        :param alias: The database alias the query goes to, actions that
+                      target an alias don't match when this is `None`
+        :param acting: The user the query is made for, actions that target
+                       users or groups don't match when this is `None`
+        """
+        for action in self.get_actions(models.ChaosActionDB.model_key):
+            if action.act_on_alias and action.act_on_alias != alias:
+                continue
+            if action.act_on_value and action.act_on_value != attrgetter(
+                action.act_on_attribute
+            )(model):
+                continue
+            if not action.is_active(now):
+                continue
+            target = self.targets.get((action.model_key, action.pk))
+            if target is not None and (acting is None or not acting.matches(*target)):
+                continue
+            yield action
+
+    def _get_prefixes(self, model_key: str) -> PrefixTrie:
+        """
+        The `act_on_prefix` of the actions of a model, by action index.
+        """
+        prefixes = PrefixTrie()
+        for index, action in enumerate(self.get_actions(model_key)):
+            prefixes.add(action.act_on_prefix, index)
+        return prefixes
+
+    @cached_property
+    def cache_prefixes(self) -> PrefixTrie:
+        return self._get_prefixes(models.ChaosActionCache.model_key)
+
+    def for_cache(
+        self, alias: str, key: str, now: datetime
+    ) -> typing.Iterator[models.ChaosActionCache]:
+        """
+        The cache actions for a key that are active now.
+
+        :param alias: The alias of the wrapped cache
+        :param key: The cache key, before the cache's own prefix and version
+        :param now: The current time
+        """
+        actions = self.get_actions(models.ChaosActionCache.model_key)
+        if not actions:
+            return
+        for index in sorted(self.cache_prefixes.find(key)):
+            action = actions[index]
+            if action.act_on_cache and action.act_on_cache != alias:
+                continue
+            if action.is_active(now):
+                yield action
+
+    @cached_property
+    def storage_prefixes(self) -> PrefixTrie:
+        return self._get_prefixes(models.ChaosActionStorage.model_key)
+
+    def for_storage(
+        self, method: str, name: str, now: datetime
+    ) -> typing.Iterator[models.ChaosActionStorage]:
+        """
+        The storage actions for a file that are active now.
+
+        :param method: The storage method, see `ChaosActionStorage.method_choices_str`
+        :param name: The file or directory name
+        :param now: The current time
+        """
+        actions = self.get_actions(models.ChaosActionStorage.model_key)
+        if not actions:
+            return
+        for index in sorted(self.storage_prefixes.find(name)):
+            action = actions[index]
+            if action.act_on_method and action.act_on_method != method:
+                continue
+            if action.is_active(now):
+                yield action
+
+    def for_email(
+        self, recipients: typing.List[str], now: datetime
+    ) -> typing.Iterator[models.ChaosActionEmail]:
+        """
+        The email actions for a message that are active now.
+
+        :param recipients: The addresses of all recipients of the message,
+                           matched case insensitively
+        :param now: The current time
+        """
+        recipients = [recipient.lower() for recipient in recipients]
+        for action in self.get_actions(models.ChaosActionEmail.model_key):
+            suffix = action.act_on_recipient.lower()
+            if suffix and not any(
+                recipient.endswith(suffix) for recipient in recipients
+            ):
+                continue
+            if action.is_active(now):
+                yield action
+
+
+_snapshot = None  # type: typing.Optional[Snapshot]
+_checked = 0.0
+_expired = float("-inf")
+_loading = threading.local()
+_empty = Snapshot((0, ""), {}, {})
+#: Reloads the snapshot in the background, see `get_snapshot`
+_refresher = telemetry.PeriodicTask(
+    "chaos-snapshot", lambda: refresh(warm=True), "snapshot_refresh"
+)
+
+
+def get_snapshot() -> Snapshot:
+    """
+    Get the current snapshot, reloading it when the generation changed.
+
+    The generation is checked at most once every `snapshot_ttl` seconds, so
+    changes made by other processes take effect after up to that long, changes
+    made by this process right away, see `expire`. While a snapshot loads its
+    own queries must not trigger another load, they get an empty snapshot.
+
+    With the `snapshot_refresh` setting a background thread checks the
+    generation every few seconds instead, and only the first call of a process
+    and the first one after `expire` load the snapshot themselves.
+
+    With a published `snapshot_file` the generation and actions are read from
+    the file instead of the database, see `shared`.
+    """
+    if getattr(_loading, "active", False):
+        return _empty
+    snapshot = _snapshot
+    if snapshot is not None:
+        if _checked != _expired and _refresher.ensure():
+            return snapshot
+        ttl = telemetry.get_setting("snapshot_ttl", default_snapshot_ttl)
+        if ttl and time.monotonic() - _checked < ttl:
+            return snapshot
+    snapshot = refresh()
+    _refresher.ensure()
+    return snapshot
+
+
+def refresh(warm: bool = False) -> Snapshot:
+    """
+    Reload the snapshot if the generation changed.
+
+    The new snapshot replaces the current one with a single assignment, threads
+    that still use the old one keep it until they call `get_snapshot` again.
+
+    :param warm: Prepare a new snapshot before it replaces the current one, see
+                 `Snapshot.warm`
+    """
+    global _snapshot, _checked
+    current = _snapshot
+    _loading.active = True
+    try:
+        snapshot = _load_published(current) or _load(current)
+        if warm and snapshot is not current:
+            snapshot.warm()
+    finally:
+        _loading.active = False
+    _snapshot = snapshot
+    _checked = time.monotonic()
+    return snapshot
+
+
+def expire() -> None:
+    """
+    Check the generation on the next `get_snapshot` call, regardless of the
+    `snapshot_ttl` and the refresh thread.
+    """
+    global _checked
+    _checked = _expired
+
+
+@receiver(setting_changed)
+def expire_on_setting_changed(setting: str, **kwargs) -> None:
+    """
+    Apply changed settings, like `override_settings` in tests, right away.
+    """
+    if setting == "CHAOS":
+        expire()
+
+
+def _load(snapshot: typing.Optional[Snapshot]) -> Snapshot:
+    version = models.ChaosGeneration.objects.current()
+    if snapshot is None or snapshot.version != version:
+        return Snapshot.load(version)
+    return snapshot
+
+
+def _load_published(snapshot: typing.Optional[Snapshot]) -> typing.Optional[Snapshot]:
+    """
+    The snapshot of the published file, `None` without one.
+    """
+    snapshot_file = shared.get_snapshot_file()
+    if snapshot_file is None:
+        return None
+    try:
+        version = snapshot_file.version()
+        if version is None:
+            return None
+        if snapshot is None or snapshot.version != version:
+            return Snapshot(*snapshot_file.read())
+    except ValueError:
+        logger.exception("Could not read chaos snapshot file %s", snapshot_file.path)
+        return None
+    return snapshot
+
+
+def publish(path: str) -> Snapshot:
+    """
+    Write the enabled actions of all hosts to a snapshot file, see `shared`.
+
+    :param path: The snapshot file
+    :returns: The published snapshot
+    """
+    snapshot = Snapshot.load(models.ChaosGeneration.objects.current(), all_hosts=True)
+    shared.write(
+        path, shared.encode(snapshot.version, snapshot.actions, snapshot.targets)
+    )
+    expire()
+    return snapshot
+
+
+def warmup() -> Snapshot:
+    """
+    Resolve the host names and load and warm the snapshot, so the first
+    request of a process doesn't pay for it.
+    """
+    models.get_hostnames()
+    snapshot = get_snapshot()
+    snapshot.warm()
+    return snapshot
+
+
+def clear() -> None:
+    """
+    Forget the current snapshot and stop the refresh thread.
+    """
+    global _snapshot
+    _snapshot = None
+    _refresher.stop()
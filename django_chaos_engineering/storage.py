@@ -0,0 +1,133 @@
+"""
+A file storage that wraps another storage and applies storage chaos actions to
+it. The wrapped storage is set with the `storage_backend` setting, the default
+is the file system storage. Other keyword arguments are passed on to it:
+
+.. code-block:: python
+
+    DEFAULT_FILE_STORAGE = "django_chaos_engineering.storage.ChaosStorage"
+    CHAOS = {"storage_backend": "storages.backends.s3boto3.S3Boto3Storage"}
+
+Actions act on `open`, `save`, `exists`, `url` and `listdir`, and match the
+beginning of the file or directory name.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import typing
+
+from django.core.files.base import File
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+from django_chaos_engineering import models
+from django_chaos_engineering.snapshot import get_snapshot
+from django_chaos_engineering.telemetry import get_setting
+
+
+#: The wrapped storage without a `storage_backend` setting
+default_storage_backend = "django.core.files.storage.FileSystemStorage"
+
+
+class ThrottledFile(File):
+    """
+    A file that is read at the rate of the slowest throttle action.
+    """
+
+    def __init__(
+        self, file: File, actions: typing.List[models.ChaosActionStorage]
+    ) -> None:
+        super().__init__(file, name=file.name)
+        self.action = min(actions, key=lambda action: action.get_bytes_per_second())
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        self.action.perform_throttle(len(data))
+        return data
+
+
+@deconstructible
+class ChaosStorage(Storage):
+    """
+    Wraps the storage of the `storage_backend` setting.
+    """
+
+    def __init__(self, backend: typing.Optional[str] = None, **kwargs) -> None:
+        """
+        :param backend: The wrapped storage class, overrides the setting
+        :param kwargs: Arguments for the wrapped storage
+        """
+        backend = backend or get_setting("storage_backend", default_storage_backend)
+        self.storage = import_string(backend)(**kwargs)
+
+    def _perform(
+        self, method: str, name: str, size: int = 0
+    ) -> typing.List[models.ChaosActionStorage]:
+        """
+        Perform the actions for a storage method.
+
+        :param size: The number of written bytes
+        :returns: The throttle actions that fired
+        """
+        return [
+            action
+            for action in get_snapshot().for_storage(method, name, timezone.now())
+            if action.perform(target=name, size=size)
+            and action.verb == models.verb_throttle
+        ]
+
+    def open(self, name, mode="rb"):
+        throttled = self._perform(models.ChaosActionStorage.method_open, name)
+        file = self.storage.open(name, mode)
+        if throttled:
+            return ThrottledFile(file, throttled)
+        return file
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        self._perform(models.ChaosActionStorage.method_save, name, content.size)
+        return self.storage.save(name, content, max_length=max_length)
+
+    def exists(self, name):
+        self._perform(models.ChaosActionStorage.method_exists, name)
+        return self.storage.exists(name)
+
+    def url(self, name):
+        self._perform(models.ChaosActionStorage.method_url, name)
+        return self.storage.url(name)
+
+    def listdir(self, path):
+        self._perform(models.ChaosActionStorage.method_listdir, path)
+        return self.storage.listdir(path)
+
+    def get_valid_name(self, name):
+        return self.storage.get_valid_name(name)
+
+    def get_available_name(self, name, max_length=None):
+        return self.storage.get_available_name(name, max_length=max_length)
+
+    def generate_filename(self, filename):
+        return self.storage.generate_filename(filename)
+
+    def path(self, name):
+        return self.storage.path(name)
+
+    def delete(self, name):
+        return self.storage.delete(name)
+
+    def size(self, name):
+        return self.storage.size(name)
+
+    def get_accessed_time(self, name):
+        return self.storage.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.storage.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.storage.get_modified_time(name)
@@ -0,0 +1,71 @@
+"""
+Lazy wrappers for the content of streaming responses.
+
+Every wrapper passes chunks on as they come, the response is never buffered.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import typing
+
+
+Chunks = typing.Iterable[bytes]
+
+
+def drip(
+    content: Chunks, delay: typing.Callable[[], typing.Any]
+) -> typing.Iterator[bytes]:
+    """
+    Delay every chunk after the first one.
+
+    :param content: The chunks of the response
+    :param delay: Called before every delayed chunk
+    """
+    first = True
+    for chunk in content:
+        if not first:
+            delay()
+        first = False
+        yield chunk
+
+
+def stall(
+    content: Chunks, after: int, delay: typing.Callable[[], typing.Any]
+) -> typing.Iterator[bytes]:
+    """
+    Delay the stream once after some bytes were sent.
+
+    :param content: The chunks of the response
+    :param after: The number of bytes before the delay
+    :param delay: Called once
+    """
+    sent = 0
+    stalled = False
+    for chunk in content:
+        if not stalled and sent + len(chunk) >= after:
+            split = after - sent
+            if split:
+                yield chunk[:split]
+            delay()
+            stalled = True
+            chunk = chunk[split:]
+        sent += len(chunk)
+        if chunk:
+            yield chunk
+
+
+def truncate(content: Chunks, after: int) -> typing.Iterator[bytes]:
+    """
+    End the stream after some bytes.
+
+    :param content: The chunks of the response
+    :param after: The number of bytes to send
+    """
+    sent = 0
+    for chunk in content:
+        if sent + len(chunk) >= after:
+            if after > sent:
+                yield chunk[: after - sent]
+            return
+        sent += len(chunk)
+        yield chunk
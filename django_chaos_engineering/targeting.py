@@ -0,0 +1,74 @@
+"""
+The user that database queries are made for.
+
+Database actions can be targeted at users and groups, like the ones of storms.
+The router doesn't know the request a query belongs to, so the middleware sets
+the user of the request while the view runs, and the router only lets targeted
+actions act on the queries of their users.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import threading
+import typing
+from contextlib import contextmanager
+
+
+class ActingUser:
+    """
+    The user of the current request, for database actions targeted at users or
+    groups, see `acting_user`.
+
+    The user and its groups are resolved on first use. Their own queries go
+    through the chaos router too, targeted actions don't match them.
+    """
+
+    def __init__(self, user: typing.Any) -> None:
+        self.user = user
+        self.group_ids = None  # type: typing.Optional[set]
+        self.resolving = False
+
+    def matches(self, user_ids: set, group_ids: set) -> bool:
+        """
+        If the user is one of the users, or in one of the groups.
+        """
+        if self.resolving:
+            return False
+        self.resolving = True
+        try:
+            pk = self.user.pk
+            if pk is None:
+                return False
+            if pk in user_ids:
+                return True
+            if not group_ids:
+                return False
+            if self.group_ids is None:
+                self.group_ids = set(self.user.groups.values_list("pk", flat=True))
+            return bool(self.group_ids & group_ids)
+        finally:
+            self.resolving = False
+
+
+_acting = threading.local()
+
+
+@contextmanager
+def acting_user(user: typing.Any) -> typing.Iterator[None]:
+    """
+    Let database actions that target users or groups act on the queries made
+    in the block, if the user is targeted. The middleware sets the user of
+    every request, without one targeted database actions never act.
+
+    :param user: A user, or `None`
+    """
+    previous = getattr(_acting, "user", None)
+    _acting.user = ActingUser(user) if user is not None else None
+    try:
+        yield
+    finally:
+        _acting.user = previous
+
+
+def get_acting_user() -> typing.Optional[ActingUser]:
+    return getattr(_acting, "user", None)
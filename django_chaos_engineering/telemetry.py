@@ -0,0 +1,319 @@
+"""
+Buffered telemetry for chaos actions.
+
+Recording telemetry happens on the request path, so it must be cheap. Events
+are appended to an in-memory ring buffer and written out in batches by a
+background thread. When the buffer is full the oldest events are dropped, chaos
+experiments should never be slowed down by their own bookkeeping.
+
+Copyright (c) 2019 Nicolas Kuttler, see LICENSE for details.
+"""
+
+import atexit
+import json
+import logging
+import socket
+import threading
+import typing
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+#: Write events to the `ChaosEvent` model
+sink_db = "db"
+#: Append events to a JSON lines file
+sink_jsonl = "jsonl"
+
+#: Default number of buffered events
+default_event_log_size = 10000
+#: Default seconds between flushes
+default_flush_interval = 5
+
+
+def get_setting(key: str, default=None):
+    return getattr(settings, "CHAOS", {}).get(key, default)
+
+
+class EventBuffer:
+    """
+    A bounded ring buffer of injection events.
+
+    Appending and draining are atomic operations on a `deque`, so no lock is
+    needed on the request path.
+    """
+
+    def __init__(self, size: int = default_event_log_size) -> None:
+        self.events = deque(maxlen=size)  # type: deque
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def append(self, event: dict) -> None:
+        self.events.append(event)
+
+    def drain(self) -> typing.List[dict]:
+        """
+        Remove and return all buffered events.
+        """
+        drained = []
+        while True:
+            try:
+                drained.append(self.events.popleft())
+            except IndexError:
+                return drained
+
+
+class ActionCounters:
+    """
+    Per-action evaluation, firing and delay counters.
+
+    The counters only live in process memory until they are flushed, so an
+    evaluation costs a dictionary update instead of a database write.
+    """
+
+    def __init__(self) -> None:
+        self.counts = {}  # type: typing.Dict[typing.Tuple[str, int], typing.List[int]]
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, model: str, action_id: int, fired: bool, injected_ms: int) -> None:
+        key = (model, action_id)
+        with self.lock:
+            counts = self.counts.get(key)
+            if counts is None:
+                counts = self.counts[key] = [0, 0, 0]
+            counts[0] += 1
+            if fired:
+                counts[1] += 1
+                counts[2] += injected_ms
+
+    def drain(self) -> typing.Dict[typing.Tuple[str, int], typing.List[int]]:
+        """
+        Remove and return all counters.
+        """
+        with self.lock:
+            counts, self.counts = self.counts, {}
+        return counts
+
+
+class PeriodicThread(threading.Thread):
+    """
+    Daemon thread that calls a function every `interval` seconds until stopped.
+    """
+
+    def __init__(
+        self, name: str, interval: float, function: typing.Callable[[], None]
+    ) -> None:
+        super().__init__(name=name, daemon=True)
+        self.interval = interval
+        self.function = function
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.function()
+            except Exception:
+                logger.exception("Chaos thread %s failed", self.name)
+            finally:
+                # Database connections are thread local, don't leak ours
+                connection.close()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+class PeriodicTask:
+    """
+    Runs a function in a `PeriodicThread`, every few seconds as configured by a
+    setting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: typing.Callable[[], None],
+        setting: str,
+        default: float = 0,
+    ) -> None:
+        """
+        :param name: The name of the thread
+        :param setting: The setting with the seconds between calls, a falsy
+                        value disables the thread
+        """
+        self.name = name
+        self.function = function
+        self.setting = setting
+        self.default = default
+        self.thread = None  # type: typing.Optional[PeriodicThread]
+        self.lock = threading.Lock()
+
+    def ensure(self) -> bool:
+        """
+        Start the thread on first use, and again in forked processes.
+
+        :returns: If the thread runs
+        """
+        thread = self.thread
+        if thread is not None and thread.is_alive():
+            return True
+        interval = get_setting(self.setting, self.default)
+        if not interval:
+            return False
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = PeriodicThread(self.name, interval, self.function)
+                self.thread.start()
+        return True
+
+    def stop(self) -> None:
+        with self.lock:
+            if self.thread is not None:
+                self.thread.stop()
+                self.thread = None
+
+
+_events = EventBuffer(get_setting("event_log_size", default_event_log_size))
+_counters = ActionCounters()
+
+
+def record_event(
+    model: str, action_id: int, verb: str, target: str, injected_ms: int = 0
+) -> None:
+    """
+    Buffer an injection event if the event log is enabled.
+
+    :param model: The action model, see `models.model_choices`
+    :param action_id: The action's primary key
+    :param verb: The action's verb
+    :param target: The url name, model label, cache key, file name or
+                   recipients the action fired on
+    :param injected_ms: Injected delay
+    """
+    if not get_setting("event_log"):
+        return
+    _events.append(
+        {
+            "model": model,
+            "action_id": action_id,
+            "verb": verb,
+            # Cache keys and recipient lists can be longer than the column
+            "target": (target or "")[:255],
+            "injected_ms": injected_ms,
+            "host": socket.gethostname(),
+            "ctime": timezone.now(),
+        }
+    )
+    _flusher.ensure()
+
+
+def count_action(
+    model: str, action_id: int, fired: bool, injected_ms: int = 0
+) -> None:
+    """
+    Count an action evaluation unless the `counters` setting is disabled.
+
+    :param model: The action model, see `models.model_choices`
+    :param action_id: The action's primary key
+    :param fired: If the action fired
+    :param injected_ms: Injected delay
+    """
+    if not get_setting("counters", True):
+        return
+    _counters.add(model, action_id, fired, injected_ms)
+    _flusher.ensure()
+
+
+def write_events_db(events: typing.List[dict]) -> None:
+    from django_chaos_engineering.models import ChaosEvent
+
+    ChaosEvent.objects.bulk_create([ChaosEvent(**event) for event in events])
+
+
+def write_events_jsonl(events: typing.List[dict]) -> None:
+    path = get_setting("event_log_file", "chaos_events.jsonl")
+    with open(path, "a") as fh:
+        for event in events:
+            event = dict(event, ctime=event["ctime"].isoformat())
+            fh.write(json.dumps(event, sort_keys=True))
+            fh.write("\n")
+
+
+event_writers = {sink_db: write_events_db, sink_jsonl: write_events_jsonl}
+
+
+def flush_events() -> int:
+    """
+    Write all buffered events to the configured sink.
+
+    :returns: The number of written events
+    """
+    events = _events.drain()
+    if not events:
+        return 0
+    sink = get_setting("event_log")
+    writer = event_writers.get(sink)
+    if writer is None:
+        logger.error("Unknown chaos event log sink %s", sink)
+        return 0
+    try:
+        writer(events)
+    except Exception:
+        logger.exception("Could not write %s chaos events", len(events))
+        return 0
+    return len(events)
+
+
+def flush_counters() -> int:
+    """
+    Add the buffered counters to the action rows.
+
+    There is one bulk update per action model, the increments are `F()`
+    expressions so concurrent flushes from other processes are not lost.
+
+    :returns: The number of updated actions
+    """
+    from django_chaos_engineering.models import action_models
+
+    counts = _counters.drain()
+    by_model = {}  # type: typing.Dict[str, list]
+    for (model, action_id), (evaluations, firings, injected_ms) in counts.items():
+        cls = action_models[model]
+        action = cls(pk=action_id)
+        action.evaluations = F("evaluations") + evaluations
+        action.firings = F("firings") + firings
+        action.injected_ms = F("injected_ms") + injected_ms
+        by_model.setdefault(model, []).append(action)
+    for model, actions in by_model.items():
+        try:
+            action_models[model].objects.bulk_update(
+                actions, ["evaluations", "firings", "injected_ms"], batch_size=500
+            )
+        except Exception:
+            logger.exception("Could not update %s chaos counters", len(actions))
+    return len(counts)
+
+
+def flush() -> None:
+    """
+    Flush all telemetry buffers.
+    """
+    flush_events()
+    flush_counters()
+
+
+#: Writes the buffers in the background, a falsy `flush_interval` setting
+#: disables it, buffers are then only written when `flush()` is called
+_flusher = PeriodicTask(
+    "chaos-telemetry", flush, "flush_interval", default_flush_interval
+)
+atexit.register(flush)
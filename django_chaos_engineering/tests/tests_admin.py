@@ -1,8 +1,10 @@
-from django.test import Client
-from django.test.utils import override_settings
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 
 from django_chaos_engineering import mock_data, models
+from django_chaos_engineering.admin import EstimatedCountPaginator, count_related
 
 
 class ChaosAdminMixin:
@@ -37,3 +39,62 @@ class ChaosAdminMixin:
     def test_admin_new(self):
         url = reverse("admin:django_chaos_engineering_{}_add".format(self.modelstr))
         self.assertEqual(200, self.c.get(url).status_code)
+
+    def _changelist_url(self):
+        return reverse(
+            "admin:django_chaos_engineering_{}_changelist".format(self.modelstr)
+        )
+
+    def _make_targeted(self, count):
+        user = mock_data.make_user()
+        group = mock_data.make_group()
+        for i in range(count):
+            self._call_mockfn(
+                enabled=False,
+                config={"foo": 1, "bar": 2},
+                for_users=[user],
+                for_groups=[group],
+            )
+
+    def _count_changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(200, self.c.get(self._changelist_url()).status_code)
+        return len(queries)
+
+    @override_settings(CHAOS={"mock_safe": True, "ignore_apps_request": ["admin"]})
+    def test_admin_list_counts(self):
+        self._make_targeted(1)
+        response = self.c.get(self._changelist_url())
+        action = response.context["cl"].result_list[0]
+        counts = (action.kv_count, action.user_count, action.group_count)
+        self.assertEqual((2, 1, 1), counts)
+
+    @override_settings(CHAOS={"mock_safe": True, "ignore_apps_request": ["admin"]})
+    def test_admin_list_query_count_does_not_grow(self):
+        self._make_targeted(2)
+        few = self._count_changelist_queries()
+        self._make_targeted(20)
+        self.assertEqual(few, self._count_changelist_queries())
+
+    @override_settings(CHAOS={"mock_safe": True, "ignore_apps_request": ["admin"]})
+    def test_admin_bulk_actions_bump_generation(self):
+        action = self._call_mockfn(enabled=False)
+        generation = models.ChaosGeneration.objects.current()
+        self.c.post(
+            self._changelist_url(),
+            {"action": "enable", "_selected_action": [action.pk]},
+        )
+        action.refresh_from_db()
+        self.assertTrue(action.enabled)
+        self.assertNotEqual(generation, models.ChaosGeneration.objects.current())
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def test_count_ignores_annotations(self):
+        mock_data.make_action_db(enabled=False, act_on_value="sites")
+        queryset = models.ChaosActionDB.objects.annotate(
+            kv_count=count_related(models.ChaosActionDB, "chaos_kvs")
+        )
+        paginator = EstimatedCountPaginator(queryset, 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(1, paginator.count)
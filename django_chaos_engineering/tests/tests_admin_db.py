@@ -1,4 +1,5 @@
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from django_chaos_engineering.tests.tests_admin import ChaosAdminMixin
 from django_chaos_engineering import mock_data
@@ -15,3 +16,10 @@ class ChaosAdminDBTest(ChaosAdminMixin, TestCase):
         if "act_on_value" not in kwargs:
             kwargs["act_on_value"] = "default_mock_value"
         return globals()["mockfn"](*args, **kwargs)
+
+    @override_settings(CHAOS={"mock_safe": True, "ignore_apps_request": ["admin"]})
+    def test_admin_search(self):
+        self._call_mockfn(act_on_value="sites", enabled=False)
+        self._call_mockfn(act_on_value="auth", enabled=False)
+        response = self.c.get(self._changelist_url(), {"q": "sites"})
+        self.assertEqual(1, len(response.context["cl"].result_list))
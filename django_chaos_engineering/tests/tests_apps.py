@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db import OperationalError
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from django_chaos_engineering import apps as chaos_apps
+
+
+class IsManagementCommandTest(TestCase):
+    def test_commands(self):
+        self.assertTrue(chaos_apps.is_management_command(["manage.py", "migrate"]))
+        self.assertTrue(chaos_apps.is_management_command(["/bin/django-admin", "test"]))
+        self.assertTrue(chaos_apps.is_management_command(["manage.py"]))
+        self.assertTrue(
+            chaos_apps.is_management_command(["/lib/django/__main__.py", "migrate"])
+        )
+
+    def test_servers(self):
+        self.assertFalse(chaos_apps.is_management_command(["manage.py", "runserver"]))
+        self.assertFalse(chaos_apps.is_management_command(["/bin/gunicorn", "wsgi"]))
+        self.assertFalse(chaos_apps.is_management_command([]))
+        self.assertFalse(
+            chaos_apps.is_management_command(["/lib/gunicorn/__main__.py", "wsgi"])
+        )
+        self.assertFalse(
+            chaos_apps.is_management_command(["/lib/django/__main__.py", "runserver"])
+        )
+
+
+@patch("django_chaos_engineering.apps.connections")
+@patch("django_chaos_engineering.snapshot.warmup")
+class ReadyTest(TestCase):
+    def setUp(self):
+        self.config = apps.get_app_config("django_chaos_engineering")
+
+    def test_disabled_by_default(self, warmup, connections):
+        with patch.object(chaos_apps, "is_management_command", lambda: False):
+            self.config.ready()
+        warmup.assert_not_called()
+
+    @override_settings(CHAOS={"mock_safe": True, "warmup": True})
+    def test_enabled(self, warmup, connections):
+        with patch.object(chaos_apps, "is_management_command", lambda: False):
+            self.config.ready()
+        warmup.assert_called_once_with()
+
+    @override_settings(CHAOS={"mock_safe": True, "warmup": True})
+    def test_not_for_management_commands(self, warmup, connections):
+        with patch.object(chaos_apps, "is_management_command", lambda: True):
+            self.config.ready()
+        warmup.assert_not_called()
+
+    @override_settings(CHAOS={"mock_safe": True, "warmup": True})
+    def test_database_errors_are_logged(self, warmup, connections):
+        warmup.side_effect = OperationalError
+        with patch.object(chaos_apps, "is_management_command", lambda: False):
+            with self.assertLogs("django_chaos_engineering.apps", "WARNING"):
+                self.config.ready()
+
+    @override_settings(CHAOS={"mock_safe": True, "warmup": True})
+    def test_connections_are_closed(self, warmup, connections):
+        with patch.object(chaos_apps, "is_management_command", lambda: False):
+            self.config.ready()
+        connections.close_all.assert_called_once_with()
+
+    @override_settings(CHAOS={"mock_safe": True, "warmup": True})
+    def test_connections_are_closed_after_errors(self, warmup, connections):
+        warmup.side_effect = OperationalError
+        with patch.object(chaos_apps, "is_management_command", lambda: False):
+            with self.assertLogs("django_chaos_engineering.apps", "WARNING"):
+                self.config.ready()
+        connections.close_all.assert_called_once_with()
@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from django_chaos_engineering import budget, bulk, mock_data, models, snapshot
+
+
+class BudgetTest(TestCase):
+    def setUp(self):
+        self.c = Client()
+        budget.get_cache().clear()
+        self.addCleanup(budget.get_cache().clear)
+
+    def test_spend(self):
+        self.assertEqual(0, budget.spent("db", 1, budget.kind_injections))
+        self.assertEqual(1, budget.spend("db", 1, budget.kind_injections))
+        self.assertEqual(6, budget.spend("db", 1, budget.kind_injections, 5))
+        self.assertEqual(6, budget.spent("db", 1, budget.kind_injections))
+        budget.reset("db", [1])
+        self.assertEqual(0, budget.spent("db", 1, budget.kind_injections))
+
+    def _make_action(self, **kwargs):
+        action = mock_data.make_action_response(
+            verb=models.verb_return,
+            act_on_url_name="test_view",
+            config={"status_code": 500},
+            probability=100,
+            enabled=True,
+        )
+        for key, value in kwargs.items():
+            setattr(action, key, value)
+        action.save()
+        return action
+
+    def _get_status_codes(self, count):
+        return [self.c.get(reverse("test_view")).status_code for i in range(count)]
+
+    def test_max_injections(self):
+        action = self._make_action(max_injections=2)
+        self.assertEqual([500, 500, 200], self._get_status_codes(3))
+        action.refresh_from_db()
+        self.assertFalse(action.enabled)
+
+    def test_exhausted_action_is_reloaded(self):
+        action = self._make_action(max_injections=1)
+        self._get_status_codes(1)
+        self.assertNotIn(
+            action.pk,
+            [a.pk for a in snapshot.get_snapshot().get_actions(action.model_key)],
+        )
+
+    def test_exhausted_action_does_not_fire_in_stale_copies(self):
+        action = self._make_action(max_injections=1)
+        stale = models.ChaosActionResponse.objects.get(pk=action.pk)
+        self.assertIsNotNone(action.perform())
+        self.assertIsNone(stale.perform())
+
+    def test_enable_resets_budget(self):
+        action = self._make_action(max_injections=1)
+        self._get_status_codes(1)
+        action.refresh_from_db()
+        action.enable()
+        self.assertEqual([500, 200], self._get_status_codes(2))
+
+    def test_save_enabled_resets_budget(self):
+        action = self._make_action(max_injections=1)
+        self._get_status_codes(1)
+        action = models.ChaosActionResponse.objects.get(pk=action.pk)
+        action.enabled = True
+        action.save()
+        self.assertEqual([500, 200], self._get_status_codes(2))
+
+    def test_save_refreshed_resets_budget(self):
+        action = self._make_action(max_injections=1)
+        self._get_status_codes(1)
+        action.refresh_from_db()
+        action.enabled = True
+        action.save()
+        self.assertEqual([500, 200], self._get_status_codes(2))
+
+    def test_save_keeps_budget_of_enabled_actions(self):
+        action = self._make_action(max_injections=2)
+        self._get_status_codes(1)
+        action = models.ChaosActionResponse.objects.get(pk=action.pk)
+        action.save()
+        self.assertEqual([500, 200], self._get_status_codes(2))
+
+    def test_import_enabled_resets_budget(self):
+        action = self._make_action(max_injections=1)
+        action.external_key = "budget"
+        action.save()
+        self._get_status_codes(1)
+        record = bulk.action_to_record(models.ChaosActionResponse.objects.get())
+        record["enabled"] = True
+        bulk.load_records([record])
+        self.assertEqual([500, 200], self._get_status_codes(2))
+
+    def test_replay_resets_budget(self):
+        action = self._make_action(max_injections=1)
+        record = bulk.action_to_record(action, with_id=True)
+        self._get_status_codes(1)
+        bulk.load_records([record], replace=True)
+        self.assertEqual([500, 200], self._get_status_codes(2))
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_max_injected_ms(self, _sleep):
+        action = mock_data.make_action_db(
+            verb=models.verb_slow,
+            config={"slow_min": 100, "slow_max": 100},
+            probability=100,
+            enabled=True,
+        )
+        action.max_injected_ms = 250
+        action.save()
+        results = [action.perform() for i in range(4)]
+        self.assertEqual([True, True, True, False], results)
+        action.refresh_from_db()
+        self.assertFalse(action.enabled)
+        self.assertEqual(3, _sleep.call_count)
@@ -0,0 +1,214 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipIf
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_chaos_engineering import bulk, mock_data, models
+
+
+def make_records(count=3, **kwargs):
+    records = []
+    for i in range(count):
+        record = {
+            "model": "response",
+            "key": "response-{}".format(i),
+            "verb": models.verb_slow,
+            "act_on_url_name": "test_view",
+            "probability": 10,
+            "config": {"slow_min": 100, "slow_max": 200},
+        }
+        record.update(kwargs)
+        records.append(record)
+    return records
+
+
+class LoadRecordsTest(TestCase):
+    def test_load_creates_actions_with_kvs(self):
+        created, updated = bulk.load_records(make_records())
+        self.assertEqual((3, 0), (created, updated))
+        self.assertEqual(3, models.ChaosActionResponse.objects.count())
+        self.assertEqual(6, models.ChaosKV.objects.count())
+        action = models.ChaosActionResponse.objects.get(external_key="response-1")
+        self.assertEqual(200, action.get_arg("slow_max", 0))
+
+    def _count_queries(self, records):
+        with CaptureQueriesContext(connection) as queries:
+            bulk.load_records(records)
+        return len(queries)
+
+    def test_load_query_count_does_not_grow(self):
+        bulk.load_records(make_records(count=1))
+        few = self._count_queries(make_records(count=5))
+        # Stay below SQLite's batch size limits
+        many = self._count_queries(make_records(count=40))
+        self.assertEqual(few, many)
+
+    def test_load_is_idempotent(self):
+        bulk.load_records(make_records())
+        created, updated = bulk.load_records(make_records(probability=50))
+        self.assertEqual((0, 3), (created, updated))
+        actions = models.ChaosActionResponse.objects.filter(probability=50)
+        self.assertEqual(3, actions.count())
+        self.assertEqual(6, models.ChaosKV.objects.count())
+
+    def test_load_time_window(self):
+        bulk.load_records(
+            make_records(
+                count=1,
+                active_from="2019-12-02T10:00:00+00:00",
+                active_until="2019-12-02T10:15:00+00:00",
+            )
+        )
+        action = models.ChaosActionResponse.objects.get()
+        self.assertEqual(15 * 60, (action.active_until - action.active_from).seconds)
+
+    def test_load_invalid_time_window(self):
+        records = make_records(
+            count=1,
+            active_from="2019-12-02T10:15:00+00:00",
+            active_until="2019-12-02T10:00:00+00:00",
+        )
+        with self.assertRaises(ValidationError):
+            bulk.load_records(records)
+
+    def test_load_targeting(self):
+        user = mock_data.make_user()
+        group = mock_data.make_group()
+        bulk.load_records(
+            make_records(count=1, users=[user.username], groups=[group.name])
+            + [
+                {
+                    "model": "db",
+                    "key": "db-0",
+                    "verb": models.verb_raise,
+                    "act_on_attribute": models.ChaosActionDB.attr_default,
+                    "act_on_value": "sites",
+                    "users": [user.username],
+                }
+            ]
+        )
+        response = models.ChaosActionResponse.objects.get()
+        self.assertEqual([user], list(response.for_users.all()))
+        self.assertEqual([group], list(response.for_groups.all()))
+        db = models.ChaosActionDB.objects.get()
+        self.assertEqual([user], list(db.for_users.all()))
+
+    def test_invalid_record_saves_nothing(self):
+        records = make_records() + make_records(count=1, key="bad", verb="nonsense")
+        with self.assertRaises(ValidationError):
+            bulk.load_records(records)
+        self.assertEqual(0, models.ChaosActionResponse.objects.count())
+
+    def test_invalid_config_saves_nothing(self):
+        for config in ({"k" * 17: 1}, {"slow_min": "1" * 256}):
+            with self.assertRaises(ValidationError):
+                bulk.load_records(make_records(config=config))
+        self.assertEqual(0, models.ChaosActionResponse.objects.count())
+        self.assertEqual(0, models.ChaosKV.objects.count())
+
+    def test_unknown_user_raises(self):
+        with self.assertRaises(ValidationError):
+            bulk.load_records(make_records(users=["nobody"]))
+
+    def test_missing_key_raises(self):
+        with self.assertRaises(ValidationError):
+            bulk.load_records(make_records(key=""))
+
+    def test_unknown_model_raises(self):
+        with self.assertRaises(ValidationError):
+            bulk.load_records(make_records(model="nonsense"))
+
+    def test_action_to_record_roundtrip(self):
+        bulk.load_records(make_records(count=1))
+        action = models.ChaosActionResponse.objects.get()
+        record = bulk.action_to_record(action)
+        self.assertEqual("response-0", record["key"])
+        self.assertEqual({"slow_max": "200", "slow_min": "100"}, dict(record["config"]))
+        self.assertEqual((0, 1), bulk.load_records([record]))
+
+
+class ReadFileTest(TestCase):
+    def _write(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "w") as fh:
+            fh.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_read_json_list(self):
+        path = self._write(".json", json.dumps(make_records()))
+        self.assertEqual(3, len(bulk.read_file(path)))
+
+    def test_read_json_mapping(self):
+        path = self._write(".json", json.dumps({"actions": make_records()}))
+        self.assertEqual(3, len(bulk.read_file(path)))
+
+    def test_read_json_invalid(self):
+        path = self._write(".json", json.dumps("foo"))
+        with self.assertRaises(ValidationError):
+            bulk.read_file(path)
+
+    @skipIf(bulk.yaml is None, "PyYAML is not installed")
+    def test_read_yaml(self):
+        path = self._write(".yaml", "actions:\n  - model: db\n    key: foo\n")
+        self.assertEqual([{"model": "db", "key": "foo"}], bulk.read_file(path))
+
+
+class SnapshotTest(TestCase):
+    def _export(self):
+        fh = StringIO()
+        bulk.write_snapshot(fh)
+        fh.seek(0)
+        return fh
+
+    def test_snapshot_roundtrip(self):
+        user = mock_data.make_user()
+        response = mock_data.make_action_response(
+            act_on_url_name="test_view", config={"slow_min": 5}, for_users=[user]
+        )
+        db = mock_data.make_action_db(probability=12.5)
+        header, records = bulk.read_snapshot(self._export())
+        self.assertEqual(
+            models.ChaosGeneration.objects.current()[0], header["generation"]
+        )
+        self.assertEqual(2, len(records))
+
+        mock_data.make_action_response()
+        response_pk = response.pk
+        response.delete()
+        created, updated = bulk.load_records(records, replace=True)
+        self.assertEqual(2, created)
+        self.assertEqual(1, models.ChaosActionResponse.objects.count())
+        replayed = models.ChaosActionResponse.objects.get()
+        self.assertEqual(response_pk, replayed.pk)
+        self.assertEqual([user], list(replayed.for_users.all()))
+        self.assertEqual(5, replayed.get_arg("slow_min", 0))
+        self.assertEqual(db.probability, models.ChaosActionDB.objects.get().probability)
+
+    def test_replay_bumps_generation_once(self):
+        mock_data.make_action_response()
+        mock_data.make_action_db()
+        header, records = bulk.read_snapshot(self._export())
+        generation = models.ChaosGeneration.objects.current()[0]
+        bulk.load_records(records, replace=True)
+        self.assertEqual(generation + 1, models.ChaosGeneration.objects.current()[0])
+
+    def test_replay_requires_ids(self):
+        with self.assertRaises(ValidationError):
+            bulk.load_records(make_records(), replace=True)
+
+    def test_read_invalid_snapshot(self):
+        for content in ["", "[]\n", '{"format": "foo"}\n']:
+            with self.assertRaises(ValidationError):
+                bulk.read_snapshot(StringIO(content))
+
+    def test_read_unsupported_version(self):
+        header = {"format": bulk.snapshot_format, "version": 0}
+        with self.assertRaises(ValidationError):
+            bulk.read_snapshot(StringIO(json.dumps(header)))
@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from django_chaos_engineering import budget, mock_data, models
+
+
+class ChaosCacheBackendTest(TestCase):
+    def setUp(self):
+        self.cache = caches["chaos"]
+        self.real = caches["default"]
+        self.real.clear()
+        self.addCleanup(self.real.clear)
+
+    def _make_action(self, verb, prefix="user:", **kwargs):
+        kwargs.setdefault("probability", 100)
+        return mock_data.make_action_cache(
+            verb=verb, act_on_prefix=prefix, enabled=True, **kwargs
+        )
+
+    def test_no_actions(self):
+        self.cache.set("user:1", "value")
+        self.assertEqual("value", self.cache.get("user:1"))
+        self.assertEqual("value", self.real.get("user:1"))
+
+    def test_miss(self):
+        self._make_action(models.verb_miss)
+        self.real.set("user:1", "value")
+        self.real.set("other", "value")
+        self.assertEqual("default", self.cache.get("user:1", "default"))
+        self.assertFalse(self.cache.has_key("user:1"))
+        self.assertEqual("value", self.cache.get("other"))
+        self.assertEqual({"other": "value"}, self.cache.get_many(["user:1", "other"]))
+
+    def test_miss_not_fired(self):
+        self._make_action(models.verb_miss, probability=0)
+        self.real.set("user:1", "value")
+        self.assertEqual("value", self.cache.get("user:1"))
+
+    def test_stale(self):
+        self._make_action(models.verb_stale)
+        self.real.set("user:1", "old")
+        self.cache.set("user:1", "new")
+        self.cache.set_many({"user:2": "new", "other": "new"})
+        self.cache.delete("user:1")
+        self.assertEqual("old", self.cache.get("user:1"))
+        self.assertIsNone(self.real.get("user:2"))
+        self.assertEqual("new", self.real.get("other"))
+
+    def test_raise(self):
+        self._make_action(models.verb_raise)
+        with self.assertRaises(ConnectionError):
+            self.cache.get("user:1")
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_slow(self, _sleep):
+        self._make_action(
+            models.verb_slow,
+            prefix="",
+            config={
+                models.ChaosKV.attr_slow_min: 10,
+                models.ChaosKV.attr_slow_max: 10,
+            },
+        )
+        self.assertTrue(self.cache.add("counter", 0))
+        self.assertEqual(1, self.cache.incr("counter"))
+        self.assertEqual(2, _sleep.call_count)
+
+    def test_other_cache(self):
+        self._make_action(models.verb_miss, act_on_cache="chaos")
+        self.real.set("user:1", "value")
+        self.assertEqual("value", self.cache.get("user:1"))
+
+    def test_unknown_cache(self):
+        with self.assertRaises(ValidationError):
+            self._make_action(models.verb_miss, act_on_cache="nonsense")
+
+    def test_reserved_keys(self):
+        self._make_action(models.verb_raise, prefix="")
+        key = budget.get_key("cache", 1, budget.kind_injections)
+        self.cache.set(key, 1)
+        self.assertEqual(1, self.cache.get(key))
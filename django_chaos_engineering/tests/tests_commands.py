@@ -1,13 +1,21 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
 from io import StringIO
-from unittest import skip
 from unittest.mock import patch
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.utils import timezone
 
-from django_chaos_engineering import mock_data, models
-from django_chaos_engineering.management.commands.chaos import STORM_KEY, STORM_VALUE
+from django_chaos_engineering import matchers, mock_data, models
+from django_chaos_engineering.snapshot import get_snapshot
+
+storm_settings = {"mock_safe": True, "storm": True, "flush_interval": 0}
 
 
 class OutsMixin:
@@ -31,7 +39,18 @@ class HelpTest(OutsMixin, TestCase):
         self.assertEqual(0, ex.exception.code)
 
     def test_help_smoke_test(self):
-        for command in ["create_response", "create_db", "list", "dump"]:
+        commands = [
+            "create_response",
+            "create_db",
+            "create_cache",
+            "create_storage",
+            "create_email",
+            "list",
+            "dump",
+            "import",
+            "export",
+        ]
+        for command in commands:
             self._test_help_smoke_test(command)
 
 
@@ -93,6 +112,9 @@ class CommandListTest(OutsMixin, OutputMixin, TestCase):
     def test_list_by_model_stderr_empty(self):
         mock_data.make_action_db()
         mock_data.make_action_response()
+        mock_data.make_action_cache()
+        mock_data.make_action_storage()
+        mock_data.make_action_email()
         for model in models.model_choices:
             self._test_output_equals(self.err, "", "--models", model)
             self._test_output_not_equals(self.out, "", "--models", model)
@@ -101,13 +123,97 @@ class CommandListTest(OutsMixin, OutputMixin, TestCase):
         key = models.ChaosKV.get_random_key()
         mock_data.make_action_db(config={key: "bar"})
         mock_data.make_action_response(config={key: "bar"})
-        self.assertEqual(2, models.ChaosKV.objects.all().count())
+        mock_data.make_action_cache(config={key: "bar"})
+        mock_data.make_action_storage(config={key: "bar"})
+        mock_data.make_action_email(config={key: "bar"})
+        self.assertEqual(5, models.ChaosKV.objects.all().count())
         for model in models.model_choices:
             self._test_output_equals(self.err, "", "--models", model)
             self._test_output_not_equals(self.out, "", "--models", model)
             call_command("chaos", "list", stdout=self.out, stderr=self.err)
 
 
+class CommandListFilterTest(OutsMixin, TestCase):
+    def _list(self, *args):
+        out = StringIO()
+        call_command("chaos", "list", *args, stdout=out, stderr=self.err)
+        return out.getvalue()
+
+    def _count_list_queries(self, *args):
+        # Don't count loading the chaos configuration
+        get_snapshot()
+        with CaptureQueriesContext(connection) as queries:
+            self._list(*args)
+        return len(queries)
+
+    def _list_json(self, *args):
+        return json.loads(self._list("--format", "json", *args))
+
+    def test_list_json_empty(self):
+        self.assertEqual([], self._list_json())
+
+    def test_list_json(self):
+        user = mock_data.make_user()
+        action = mock_data.make_action_response(
+            act_on_url_name="test_view", config={"slow_min": 5}, for_users=[user]
+        )
+        mock_data.make_action_db()
+        records = self._list_json("--models", "response")
+        self.assertEqual(1, len(records))
+        self.assertEqual(action.pk, records[0]["id"])
+        self.assertEqual({"slow_min": "5"}, records[0]["config"])
+        self.assertEqual([user.username], records[0]["users"])
+
+    def test_list_jsonl(self):
+        mock_data.make_action_response()
+        mock_data.make_action_db()
+        lines = self._list("--format", "jsonl").splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(["response", "db"], [record["model"] for record in records])
+
+    def test_list_filters(self):
+        mock_data.make_action_response(
+            verb=models.verb_slow, act_on_url_name="test_view", enabled=True
+        )
+        mock_data.make_action_response(
+            verb=models.verb_raise, act_on_url_name="other", enabled=False
+        )
+        mock_data.make_action_db(
+            verb=models.verb_slow, enabled=True, on_host="example.com"
+        )
+        self.assertEqual(2, len(self._list_json("--enabled")))
+        self.assertEqual(2, len(self._list_json("--verb", models.verb_slow)))
+        self.assertEqual(1, len(self._list_json("--url", "test_view")))
+        self.assertEqual(1, len(self._list_json("--host", "example.com")))
+
+    def test_list_url_patterns(self):
+        for url_match, name in (
+            (matchers.url_match_glob, "test_*"),
+            (matchers.url_match_regex, "test_v.*"),
+            (matchers.url_match_path, "/test_view"),
+            (matchers.url_match_exact, ""),
+            (matchers.url_match_glob, "other*"),
+            (matchers.url_match_namespace, "admin"),
+        ):
+            mock_data.make_action_response(act_on_url_name=name, url_match=url_match)
+        self.assertEqual(4, len(self._list_json("--url", "test_view")))
+        self.assertEqual(2, len(self._list_json("--url", "admin:index")))
+        self.assertEqual(2, len(self._list_json("--url", "admin:app_list")))
+
+    def _make_actions(self, count):
+        user = mock_data.make_user()
+        for i in range(count):
+            mock_data.make_action_response(config={"slow_min": i}, for_users=[user])
+            mock_data.make_action_db(config={"slow_min": i}, for_users=[user])
+
+    def test_list_more_does_not_query_per_action(self):
+        self._make_actions(2)
+        few = self._count_list_queries("--more")
+        self._make_actions(10)
+        self.assertEqual(few, self._count_list_queries("--more"))
+        self.assertEqual(few, self._count_list_queries("--format", "jsonl"))
+
+
 class GenericCommandTest(OutsMixin, TestCase):
     def test_nonsense(self):
         with self.assertRaises(CommandError):
@@ -205,57 +311,73 @@ class CreateMixin:
         actions = self.cls.objects.filter(chaos_kvs__value="bar")
         self.assertEqual(1, len(actions))
 
-    @skip("Disabled")
-    def test_storm_creates_actions(self):
-        user = mock_data.make_user()
-        call_command(
-            "chaos", "storm", "--user", user.username, stdout=self.out, stderr=self.err
-        )
-        actions = self.cls.objects.all()
-        self.assertEqual(len(self.cls.verb_choices), len(actions))
-
-    @skip("Disabled")
-    def test_storm_creates_actions_with_kv(self):
-        user = mock_data.make_user()
-        call_command(
-            "chaos", "storm", "--user", user.username, stdout=self.out, stderr=self.err
-        )
-        actions = self.cls.objects.filter(chaos_kvs__value=STORM_VALUE)
-        self.assertEqual(len(self.cls.verb_choices), len(actions))
-
-    @skip("Disabled")
-    def test_storm_creates_actions_with_probability(self):
+    def _storm(self, *args):
         user = mock_data.make_user()
         call_command(
             "chaos",
             "storm",
             "--user",
             user.username,
-            "--probability",
-            77,
+            *args,
             stdout=self.out,
-            stderr=self.err,
+            stderr=self.err
+        )
+        return user
+
+    @override_settings(CHAOS=storm_settings)
+    def test_storm_creates_actions(self):
+        user = self._storm()
+        actions = self.cls.objects.exclude(storm_id="")
+        self.assertEqual(len(self.cls.storm_verbs), len(actions))
+        for action in actions:
+            self.assertEqual([user], list(action.for_users.all()))
+            self.assertEqual(0, action.chaos_kvs.count())
+
+    @override_settings(CHAOS=storm_settings)
+    def test_storm_creates_actions_with_probability(self):
+        self._storm("--probability", 77)
+        actions = self.cls.objects.exclude(storm_id="").filter(probability=77)
+        self.assertEqual(len(self.cls.storm_verbs), len(actions))
+
+    @override_settings(CHAOS=storm_settings)
+    def test_storm_creates_actions_with_end_time(self):
+        before = timezone.now()
+        self._storm("--duration", 5)
+        for action in self.cls.objects.exclude(storm_id=""):
+            self.assertGreater(action.active_until, before + timedelta(minutes=4))
+            self.assertFalse(action.is_active(before + timedelta(minutes=6)))
+
+    @override_settings(CHAOS=storm_settings)
+    def test_storm_deletes_ended_storms(self):
+        mock_data.make_action_response()
+        mock_data.make_action_db()
+        self.cls.objects.update(
+            storm_id="ended", active_until=timezone.now() - timedelta(minutes=1)
         )
-        actions = self.cls.objects.filter(chaos_kvs__value=STORM_VALUE, probability=77)
-        self.assertEqual(len(self.cls.verb_choices), len(actions))
+        self._storm()
+        self.assertFalse(self.cls.objects.filter(storm_id="ended").exists())
+        # The action of the other model is not part of a storm
+        self.assertEqual(len(self.cls.storm_verbs), self.cls.objects.count())
 
-    @skip("Disabled")
-    def test_storm_actions(self):
+    @override_settings(CHAOS=storm_settings)
+    def test_storm_end(self):
         mock_data.make_action_response()
         mock_data.make_action_db()
-        mock_data.make_action_response(config={STORM_KEY: STORM_VALUE})
-        mock_data.make_action_db(config={STORM_KEY: STORM_VALUE})
+        mock_data.make_action_cache()
+        mock_data.make_action_storage()
+        mock_data.make_action_email()
+        self._storm()
         call_command("chaos", "storm", "--end", stdout=self.out, stderr=self.err)
         actions = self.cls.objects.all()
         # As we only count one action class, only one object should exist
         self.assertEqual(1, len(actions))
 
-    @skip("Disabled")
+    @override_settings(CHAOS=storm_settings)
     def test_storm_wrong_call_no_args(self):
         with self.assertRaises(CommandError):
             call_command("chaos", "storm", stdout=self.out, stderr=self.err)
 
-    @skip("Disabled")
+    @override_settings(CHAOS=storm_settings)
     def test_storm_wrong_call_users_and_groups(self):
         with self.assertRaises(CommandError):
             call_command(
@@ -269,6 +391,10 @@ class CreateMixin:
                 stderr=self.err,
             )
 
+    def test_storm_needs_setting(self):
+        with self.assertRaises(CommandError):
+            call_command("chaos", "storm", "--end", stdout=self.out, stderr=self.err)
+
 
 class CreateResponseTest(CreateMixin, OutsMixin, TestCase):
     mocker = "django_chaos_engineering.mock_data.make_action_response"
@@ -281,8 +407,139 @@ class CreateResponseTest(CreateMixin, OutsMixin, TestCase):
     def test_create_return_creates_object(self):
         self._test_create_action_creates_objects(models.verb_return, "test_view")
 
+    def test_create_with_url_match(self):
+        self._test_create_action_creates_objects(
+            models.verb_return, "test_*", "--url-match", "glob"
+        )
+        action = self.cls.objects.get()
+        self.assertEqual(("test_*", "glob"), (action.act_on_url_name, action.url_match))
+        self.assertFalse(self.err.getvalue())
+
 
 class CreateResponseDB(CreateMixin, OutsMixin, TestCase):
     mocker = "django_chaos_engineering.mock_data.make_action_db"
     action_type = "db"
     cls = models.ChaosActionDB
+
+
+class CreateCacheTest(CreateMixin, OutsMixin, TestCase):
+    mocker = "django_chaos_engineering.mock_data.make_action_cache"
+    action_type = "cache"
+    cls = models.ChaosActionCache
+
+    def test_create_with_cache(self):
+        self._test_create_action_creates_objects(
+            models.verb_miss, "session:", "--cache", "default"
+        )
+        action = self.cls.objects.get()
+        self.assertEqual("session:", action.act_on_prefix)
+        self.assertEqual("default", action.act_on_cache)
+
+
+class CreateStorageTest(CreateMixin, OutsMixin, TestCase):
+    mocker = "django_chaos_engineering.mock_data.make_action_storage"
+    action_type = "storage"
+    cls = models.ChaosActionStorage
+
+    def test_create_with_method(self):
+        self._test_create_action_creates_objects(
+            models.verb_throttle, "uploads/", "--method", "open"
+        )
+        action = self.cls.objects.get()
+        self.assertEqual("uploads/", action.act_on_prefix)
+        self.assertEqual("open", action.act_on_method)
+
+
+class CreateEmailTest(CreateMixin, OutsMixin, TestCase):
+    mocker = "django_chaos_engineering.mock_data.make_action_email"
+    action_type = "email"
+    cls = models.ChaosActionEmail
+
+
+class ImportTest(OutsMixin, TestCase):
+    def _write(self, records):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(records, fh)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_creates_actions(self):
+        records = [
+            {
+                "model": "db",
+                "key": "db-{}".format(i),
+                "verb": models.verb_slow,
+                "act_on_attribute": models.ChaosActionDB.attr_default,
+                "act_on_value": "sites",
+            }
+            for i in range(3)
+        ]
+        path = self._write(records)
+        call_command("chaos", "import", path, stdout=self.out, stderr=self.err)
+        call_command("chaos", "import", path, stdout=self.out, stderr=self.err)
+        self.assertEqual(3, models.ChaosActionDB.objects.count())
+
+    def test_import_invalid_raises(self):
+        path = self._write([{"model": "db", "key": "foo", "verb": "nonsense"}])
+        with self.assertRaises(CommandError):
+            call_command("chaos", "import", path, stdout=self.out, stderr=self.err)
+
+    def test_import_missing_file_raises(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "chaos", "import", "/does/not/exist", stdout=self.out, stderr=self.err
+            )
+
+
+class ExportReplayTest(OutsMixin, TestCase):
+    def test_export_stdout(self):
+        mock_data.make_action_response()
+        call_command("chaos", "export", stdout=self.out, stderr=self.err)
+        self.assertEqual(2, len(self.out.getvalue().splitlines()))
+
+    def test_export_and_replay(self):
+        action = mock_data.make_action_db()
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command("chaos", "export", path, stdout=self.out, stderr=self.err)
+        action_pk = action.pk
+        action.delete()
+        mock_data.make_action_response()
+        call_command("chaos", "replay", path, stdout=self.out, stderr=self.err)
+        self.assertEqual(0, models.ChaosActionResponse.objects.count())
+        self.assertEqual(action_pk, models.ChaosActionDB.objects.get().pk)
+
+    def test_replay_missing_file_raises(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "chaos", "replay", "/does/not/exist", stdout=self.out, stderr=self.err
+            )
+
+
+class PublishTest(OutsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def test_publish(self):
+        mock_data.make_action_response(enabled=True)
+        call_command("chaos", "publish", self.path, stdout=self.out, stderr=self.err)
+        self.assertIn("Published 1 actions", self.out.getvalue())
+        self.assertGreater(os.path.getsize(self.path), 0)
+
+    def test_publish_without_file_raises(self):
+        with self.assertRaises(CommandError):
+            call_command("chaos", "publish", stdout=self.out, stderr=self.err)
+
+    @patch("django_chaos_engineering.management.commands.chaos.time.sleep")
+    def test_publish_interval_only_publishes_changes(self, _sleep):
+        _sleep.side_effect = [None, KeyboardInterrupt]
+        with override_settings(CHAOS={"mock_safe": True, "snapshot_file": self.path}):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("chaos", "publish", "--interval", "5", stdout=self.out)
+        self.assertEqual(1, self.out.getvalue().count("Published"))
+        _sleep.assert_called_with(5)
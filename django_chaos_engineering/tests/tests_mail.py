@@ -0,0 +1,64 @@
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+from django.test import TestCase
+
+from django_chaos_engineering import mock_data, models
+
+
+backend = "django_chaos_engineering.mail.ChaosEmailBackend"
+locmem = "django.core.mail.backends.locmem.EmailBackend"
+
+
+class ChaosEmailBackendTest(TestCase):
+    def _make_action(self, verb, recipient="@example.com", **kwargs):
+        kwargs.setdefault("probability", 100)
+        return mock_data.make_action_email(
+            verb=verb, act_on_recipient=recipient, enabled=True, **kwargs
+        )
+
+    def _send(self, *recipients, fail_silently=False):
+        connection = get_connection(
+            backend, wrapped_backend=locmem, fail_silently=fail_silently
+        )
+        messages = [
+            EmailMessage("Subject", "Body", "from@example.org", [recipient])
+            for recipient in recipients
+        ]
+        return connection.send_messages(messages)
+
+    def test_no_actions(self):
+        self.assertEqual(2, self._send("a@example.com", "b@example.com"))
+        self.assertEqual(2, len(mail.outbox))
+
+    def test_partial_batch_failure(self):
+        self._make_action(models.verb_raise)
+        with self.assertRaises(SMTPException):
+            self._send("a@example.org", "b@EXAMPLE.com", "c@example.org")
+        self.assertEqual(["a@example.org"], mail.outbox[0].to)
+        self.assertEqual(1, len(mail.outbox))
+
+    def test_partial_batch_failure_silently(self):
+        self._make_action(models.verb_raise)
+        sent = self._send(
+            "a@example.org", "b@example.com", "c@example.org", fail_silently=True
+        )
+        self.assertEqual(2, sent)
+        self.assertEqual(
+            [["a@example.org"], ["c@example.org"]], [m.to for m in mail.outbox]
+        )
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_slow_per_message(self, _sleep):
+        self._make_action(
+            models.verb_slow,
+            recipient="",
+            config={
+                models.ChaosKV.attr_slow_min: 10,
+                models.ChaosKV.attr_slow_max: 10,
+            },
+        )
+        self.assertEqual(3, self._send("a@example.org", "b@example.com", "c@x.org"))
+        self.assertEqual(3, _sleep.call_count)
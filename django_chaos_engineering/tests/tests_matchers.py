@@ -0,0 +1,216 @@
+import re
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.test import Client, RequestFactory, TestCase
+from django.urls import resolve, reverse
+
+from django_chaos_engineering import matchers, mock_data, models
+from django_chaos_engineering.matchers import PrefixTrie, UrlMatcher
+
+
+class PrefixTrieTest(TestCase):
+    def test_find(self):
+        trie = PrefixTrie()
+        trie.add("/admin/", 0)
+        trie.add("/admin/auth/", 1)
+        trie.add("/api/", 2)
+        trie.add("", 3)
+        self.assertEqual([3, 0, 1], trie.find("/admin/auth/user/"))
+        self.assertEqual([3, 0], trie.find("/admin/"))
+        self.assertEqual([3], trie.find("/ad"))
+
+
+class UrlMatcherTest(TestCase):
+    def _match(self, patterns, url):
+        path = reverse(url)
+        return UrlMatcher(patterns).match(path, resolve(path))
+
+    def test_exact(self):
+        patterns = [
+            (matchers.url_match_exact, "test_view"),
+            (matchers.url_match_exact, "other"),
+            (matchers.url_match_exact, ""),
+            (matchers.url_match_exact, None),
+        ]
+        self.assertEqual([0, 2], self._match(patterns, "test_view"))
+
+    def test_glob_and_regex(self):
+        patterns = [
+            (matchers.url_match_glob, "test_*"),
+            (matchers.url_match_glob, "*_views"),
+            (matchers.url_match_regex, r"te.t_vi\w+"),
+            (matchers.url_match_regex, "test"),
+            (matchers.url_match_regex, "(a|t)(e)st_view"),
+        ]
+        self.assertEqual([0, 2, 4], self._match(patterns, "test_view"))
+
+    def test_namespace(self):
+        patterns = [
+            (matchers.url_match_namespace, "admin"),
+            (matchers.url_match_namespace, "api"),
+        ]
+        self.assertEqual([0], self._match(patterns, "admin:index"))
+        self.assertEqual([], self._match(patterns, "test_view"))
+
+    def test_path(self):
+        patterns = [
+            (matchers.url_match_path, "/admin/"),
+            (matchers.url_match_path, "/test"),
+        ]
+        self.assertEqual([0], self._match(patterns, "admin:index"))
+        self.assertEqual([1], self._match(patterns, "test_view"))
+
+    def test_many_patterns_share_one_regex(self):
+        patterns = [(matchers.url_match_glob, "view_{}_*".format(i)) for i in range(500)]
+        patterns.append((matchers.url_match_glob, "test_*"))
+        matcher = UrlMatcher(patterns)
+        self.assertEqual(501, len(matcher.regex.groupindex))
+        path = reverse("test_view")
+        self.assertEqual([500], matcher.match(path, resolve(path)))
+
+    def test_patterns_with_groups(self):
+        patterns = [
+            (matchers.url_match_regex, "(?P<x>test)_view"),
+            (matchers.url_match_regex, "(?P<x>other)_view"),
+            (matchers.url_match_regex, r"(t)es\1_view"),
+            (matchers.url_match_regex, r"(\w)est_\w+"),
+            (matchers.url_match_glob, "test_*"),
+        ]
+        matcher = UrlMatcher(patterns)
+        self.assertEqual(1, len(matcher.regex.groupindex))
+        path = reverse("test_view")
+        self.assertEqual([0, 2, 3, 4], matcher.match(path, resolve(path)))
+
+    def test_failed_combination_matches_one_by_one(self):
+        def compile(regex, compile=re.compile):
+            if regex.startswith("(?:(?="):
+                raise re.error("combined")
+            return compile(regex)
+
+        patterns = [
+            (matchers.url_match_glob, "test_*"),
+            (matchers.url_match_regex, "other"),
+        ]
+        with patch("django_chaos_engineering.matchers.re.compile", compile):
+            with self.assertLogs("django_chaos_engineering.matchers", "ERROR"):
+                matcher = UrlMatcher(patterns)
+        self.assertIsNone(matcher.regex)
+        path = reverse("test_view")
+        self.assertEqual([0], matcher.match(path, resolve(path)))
+
+    def test_invalid_patterns_are_skipped(self):
+        patterns = [
+            (matchers.url_match_regex, "(unclosed"),
+            (matchers.url_match_glob, "test_*"),
+        ]
+        with self.assertLogs("django_chaos_engineering.matchers", "ERROR"):
+            self.assertEqual([1], self._match(patterns, "test_view"))
+
+
+class RequestMatchTest(TestCase):
+    def _match(self, text, *args, **kwargs):
+        request = RequestFactory().generic(*args, **kwargs)
+        return matchers.match_request(matchers.compile_request_match(text), request)
+
+    def test_empty_matches_all(self):
+        self.assertTrue(self._match("", "GET", "/"))
+
+    def test_method(self):
+        self.assertTrue(self._match("method:post,put", "POST", "/"))
+        self.assertFalse(self._match("method:POST", "GET", "/"))
+
+    def test_path(self):
+        self.assertTrue(self._match("path:/api/", "GET", "/api/v2/"))
+        self.assertFalse(self._match("path:/api/", "GET", "/"))
+
+    def test_header(self):
+        self.assertTrue(self._match("header:X-Chaos", "GET", "/", HTTP_X_CHAOS="1"))
+        self.assertTrue(self._match("header:X-Chaos=on", "GET", "/", HTTP_X_CHAOS="on"))
+        self.assertFalse(self._match("header:X-Chaos=on", "GET", "/", HTTP_X_CHAOS="1"))
+        self.assertFalse(self._match("header:X-Chaos", "GET", "/"))
+        self.assertTrue(
+            self._match("header:Content-Type=text/plain", "POST", "/", "x", "text/plain")
+        )
+
+    def test_cookie(self):
+        request = RequestFactory().get("/")
+        request.COOKIES["chaos"] = "on"
+        predicates = matchers.compile_request_match("cookie:chaos=on")
+        self.assertTrue(matchers.match_request(predicates, request))
+        self.assertFalse(self._match("cookie:chaos", "GET", "/"))
+
+    def test_query(self):
+        self.assertTrue(self._match("query:chaos", "GET", "/?chaos"))
+        self.assertTrue(self._match("query:chaos=1", "GET", "/?chaos=1"))
+        self.assertFalse(self._match("query:chaos=1", "GET", "/?chaos=2"))
+
+    def test_all_clauses_must_match(self):
+        text = 'method:POST "header:X-Chaos=on please"'
+        self.assertTrue(self._match(text, "POST", "/", HTTP_X_CHAOS="on please"))
+        self.assertFalse(self._match(text, "GET", "/", HTTP_X_CHAOS="on please"))
+        self.assertFalse(self._match(text, "POST", "/"))
+
+    def test_cheapest_first(self):
+        predicates = matchers.compile_request_match("query:a method:POST")
+        request = RequestFactory().get("/?a")
+        # The method predicate fails before the query string is parsed
+        self.assertFalse(predicates[0](request))
+
+    def test_invalid(self):
+        for text in ["nonsense", "method:", "verb:POST", "header:=on", '"unclosed']:
+            with self.assertRaises(ValueError):
+                matchers.compile_request_match(text)
+
+
+class UrlMatchActionTest(TestCase):
+    def setUp(self):
+        self.c = Client()
+
+    def _make_action(self, url_match, pattern):
+        action = mock_data.make_action_response(
+            verb=models.verb_return,
+            act_on_url_name=pattern,
+            config={"status_code": 500},
+            probability=100,
+            enabled=True,
+        )
+        action.url_match = url_match
+        action.full_clean()
+        action.save()
+        return action
+
+    def test_glob_action_is_performed(self):
+        self._make_action(matchers.url_match_glob, "test_*")
+        self.assertEqual(500, self.c.get(reverse("test_view")).status_code)
+
+    def test_path_action_is_performed(self):
+        self._make_action(matchers.url_match_path, "/test_")
+        self.assertEqual(500, self.c.get(reverse("test_view")).status_code)
+
+    def test_regex_action_is_not_performed(self):
+        self._make_action(matchers.url_match_regex, "other.*")
+        self.assertEqual(200, self.c.get(reverse("test_view")).status_code)
+
+    def test_regex_actions_with_the_same_group_name(self):
+        self._make_action(matchers.url_match_regex, "(?P<x>other)_view")
+        self._make_action(matchers.url_match_regex, "(?P<x>test)_view")
+        self.assertEqual(500, self.c.get(reverse("test_view")).status_code)
+
+    def test_invalid_regex(self):
+        with self.assertRaises(ValidationError):
+            self._make_action(matchers.url_match_regex, "(unclosed")
+
+    def test_request_match_action(self):
+        action = self._make_action(matchers.url_match_exact, "test_view")
+        action.request_match = "header:X-Chaos=on"
+        action.save()
+        self.assertEqual(200, self.c.get(reverse("test_view")).status_code)
+        response = self.c.get(reverse("test_view"), HTTP_X_CHAOS="on")
+        self.assertEqual(500, response.status_code)
+
+    def test_invalid_request_match(self):
+        action = self._make_action(matchers.url_match_exact, "test_view")
+        action.request_match = "method"
+        with self.assertRaises(ValidationError):
+            action.full_clean()
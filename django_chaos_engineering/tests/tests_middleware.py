@@ -1,9 +1,10 @@
 from unittest.mock import patch
 
 from django.test import Client, TestCase
-from django.urls import reverse
+from django.test.utils import override_settings
+from django.urls import URLResolver, reverse
 
-from django_chaos_engineering import exceptions, mock_data, models
+from django_chaos_engineering import budget, exceptions, mock_data, models, telemetry
 
 
 class ModelChaosActionResponseSlowTest(TestCase):
@@ -144,3 +145,159 @@ class ModelChaosActionResponseRaiseTest(TestCase):
     def test_bad_url_raises(self):
         # For coverage, no error raised
         self.c.get("/im/not/configured")
+
+
+class ResolveOnceTest(TestCase):
+    def test_path_is_resolved_once(self):
+        mock_data.make_action_response(
+            verb=models.verb_slow,
+            act_on_url_name="other_view",
+            probability=100,
+            enabled=True,
+        )
+        resolved = []
+        original = URLResolver.resolve
+
+        def resolve(resolver, path):
+            resolved.append(path)
+            return original(resolver, path)
+
+        with patch.object(URLResolver, "resolve", resolve):
+            self.assertEqual(200, Client().get(reverse("test_view")).status_code)
+        self.assertEqual(1, len(resolved))
+
+
+class StreamingTest(TestCase):
+    def setUp(self):
+        self.c = Client()
+
+    def _make_action(self, verb, url_name="test_stream_view", **config):
+        return mock_data.make_action_response(
+            verb=verb,
+            act_on_url_name=url_name,
+            probability=100,
+            enabled=True,
+            config=config,
+        )
+
+    def _content(self, url_name="test_stream_view"):
+        response = self.c.get(reverse(url_name))
+        if response.streaming:
+            return b"".join(response.streaming_content)
+        return response.content
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_drip(self, _sleep):
+        self._make_action(models.verb_drip, slow_min=10, slow_max=10)
+        self.assertEqual(1000, len(self._content()))
+        self.assertEqual(9, _sleep.call_count)
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_stall(self, _sleep):
+        self._make_action(models.verb_stall, after_bytes=250, slow_min=10, slow_max=10)
+        response = self.c.get(reverse("test_stream_view"))
+        chunks = list(response.streaming_content)
+        self.assertEqual(1000, sum(len(chunk) for chunk in chunks))
+        self.assertEqual(250, sum(len(chunk) for chunk in chunks[:3]))
+        self.assertEqual(1, _sleep.call_count)
+
+    @override_settings(
+        CHAOS={"mock_safe": True, "event_log": "db", "flush_interval": 0}
+    )
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_drip_delays_are_logged(self, _sleep):
+        telemetry._events.drain()
+        telemetry._counters.drain()
+        action = self._make_action(models.verb_drip, slow_min=10, slow_max=10)
+        self._content()
+        events = telemetry._events.drain()
+        self.assertEqual([90], [event["injected_ms"] for event in events])
+        counts = telemetry._counters.drain()
+        self.assertEqual([1, 1, 90], counts[(action.model_key, action.pk)])
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_drip_delays_use_the_budget(self, _sleep):
+        budget.get_cache().clear()
+        self.addCleanup(budget.get_cache().clear)
+        action = self._make_action(models.verb_drip, slow_min=10, slow_max=10)
+        action.max_injected_ms = 50
+        action.save()
+        self._content()
+        action.refresh_from_db()
+        self.assertFalse(action.enabled)
+
+    def test_truncate(self):
+        self._make_action(models.verb_truncate, after_bytes=250)
+        self.assertEqual(b"x" * 250, self._content())
+
+    def test_truncate_and_stall(self):
+        self._make_action(models.verb_truncate, after_bytes=250)
+        with patch("django_chaos_engineering.models.time.sleep") as _sleep:
+            self._make_action(models.verb_stall, after_bytes=500)
+            self.assertEqual(250, len(self._content()))
+        self.assertEqual(0, _sleep.call_count)
+
+    def test_not_streaming(self):
+        self._make_action(models.verb_truncate, url_name="test_view", after_bytes=5)
+        self.assertIn(b"Test view", self._content("test_view"))
+
+
+class LatencyTargetTest(TestCase):
+    def setUp(self):
+        self.c = Client()
+
+    def _make_action(self, **config):
+        return mock_data.make_action_response(
+            verb=models.verb_slow,
+            act_on_url_name="test_view",
+            probability=100,
+            enabled=True,
+            config=config,
+        )
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_pads_after_the_view(self, _sleep):
+        self._make_action(target_ms=500)
+        with patch.object(
+            models.ChaosActionResponse, "perform_pad", autospec=True
+        ) as perform_pad:
+            self.assertEqual(200, self.c.get(reverse("test_view")).status_code)
+        (action, elapsed_ms), kwargs = perform_pad.call_args
+        self.assertTrue(0 < elapsed_ms < 500)
+        self.assertEqual({"target": "test_view"}, kwargs)
+        _sleep.assert_not_called()
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_pad(self, _sleep):
+        self._make_action(target_ms=500)
+        self.c.get(reverse("test_view"))
+        (delay,), kwargs = _sleep.call_args
+        self.assertTrue(0 < delay < 0.5)
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_additive_slow_actions_act_before_the_view(self, _sleep):
+        self._make_action(slow_min=100, slow_max=100)
+        with patch.object(models.ChaosActionResponse, "perform_pad") as perform_pad:
+            self.c.get(reverse("test_view"))
+        perform_pad.assert_not_called()
+        _sleep.assert_called_once_with(0.1)
+
+
+class DBTargetingTest(TestCase):
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_user_of_the_request_is_acting(self, _sleep):
+        user = mock_data.make_user()
+        mock_data.make_action_db(
+            act_on_value="",
+            enabled=True,
+            verb=models.verb_slow,
+            probability=100,
+            for_users=[user],
+        )
+        client = Client()
+        client.get(reverse("test_db_view"))
+        self.assertEqual(0, _sleep.call_count)
+        client.force_login(user)
+        _sleep.reset_mock()
+        client.get(reverse("test_db_view"))
+        self.assertLess(0, _sleep.call_count)
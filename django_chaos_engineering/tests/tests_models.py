@@ -170,6 +170,8 @@ class ChaosActionMixin(abc.ABC):
     @patch("django_chaos_engineering.models.socket.gethostname", lambda: "example.com")
     @patch("django_chaos_engineering.models.socket.getfqdn", lambda: "example.com")
     def test_manager_on_this_host(self):
+        models.get_hostnames.cache_clear()
+        self.addCleanup(models.get_hostnames.cache_clear)
         self._call_mockfn(probability=100, on_host="example.com")
         self._call_mockfn(probability=100, on_host="foo.example.com")
         self.assertEqual(1, self.cls.objects.on_this_host().count())
@@ -177,6 +179,8 @@ class ChaosActionMixin(abc.ABC):
     @patch("django_chaos_engineering.models.socket.gethostname", lambda: "example.com")
     @patch("django_chaos_engineering.models.socket.getfqdn", lambda: "example.com")
     def test_manager_on_this_host_when_blank(self):
+        models.get_hostnames.cache_clear()
+        self.addCleanup(models.get_hostnames.cache_clear)
         self._call_mockfn(probability=100)
         self._call_mockfn(probability=100, on_host="foo.example.com")
         self.assertEqual(1, self.cls.objects.on_this_host().count())
@@ -268,3 +272,39 @@ class RoundingDecimalFieldTest(TestCase):
         self._test_to_python_value("100.00000", int(100))
         self._test_to_python_value("0.00000", int(0))
         self._test_to_python_value("10.12345", float(10.12345))
+
+
+class GenerationTest(TestCase):
+    def test_current_without_row(self):
+        self.assertEqual((0, ""), models.ChaosGeneration.objects.current())
+
+    def test_bump(self):
+        models.ChaosGeneration.objects.bump()
+        generation, token = models.ChaosGeneration.objects.current()
+        models.ChaosGeneration.objects.bump()
+        self.assertEqual(generation + 1, models.ChaosGeneration.objects.current()[0])
+        self.assertNotEqual(token, models.ChaosGeneration.objects.current()[1])
+
+    def test_changes_bump(self):
+        action = mock_data.make_action_response()
+        generation = models.ChaosGeneration.objects.current()
+        action.disable()
+        self.assertNotEqual(generation, models.ChaosGeneration.objects.current())
+        generation = models.ChaosGeneration.objects.current()
+        mock_data.make_kv(action)
+        self.assertNotEqual(generation, models.ChaosGeneration.objects.current())
+        generation = models.ChaosGeneration.objects.current()
+        action.for_users.add(mock_data.make_user())
+        self.assertNotEqual(generation, models.ChaosGeneration.objects.current())
+        generation = models.ChaosGeneration.objects.current()
+        action.delete()
+        self.assertNotEqual(generation, models.ChaosGeneration.objects.current())
+
+    def test_deferred_bumps_once(self):
+        models.ChaosGeneration.objects.bump()
+        generation, token = models.ChaosGeneration.objects.current()
+        with models.ChaosGeneration.objects.deferred():
+            for i in range(3):
+                mock_data.make_action_db()
+            self.assertEqual(generation, models.ChaosGeneration.objects.current()[0])
+        self.assertEqual(generation + 1, models.ChaosGeneration.objects.current()[0])
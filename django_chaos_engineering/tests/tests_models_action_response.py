@@ -1,4 +1,12 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.exceptions import SuspiciousOperation
+from django.http import Http404
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from django_chaos_engineering.tests.tests_models import (
     ChaosUnitPerformMixin,
@@ -58,3 +66,194 @@ class ActionResponseUnitTest(ChaosUnitPerformMixin, ChaosActionMixin, TestCase):
             enabled=False, act_on_url_name="", config={"foo": "bar"}
         )
         self.assertLess(0, len(list(action.dump(excess=True))))
+
+
+class ActionResponsePlanTest(TestCase):
+    def _make_action(self, verb, config):
+        return mockfn(verb=verb, enabled=True, probability=100, config=config)
+
+    def test_return_default_maps(self):
+        action = self._make_action(models.verb_return, {"status_code": 500})
+        response = action.perform_return()
+        self.assertEqual(500, response.status_code)
+        self.assertEqual(b"Chaos response 500", response.content)
+        action = self._make_action(models.verb_return, {"status_code": 404})
+        with self.assertRaises(Http404):
+            action.perform_return()
+
+    @override_settings(
+        CHAOS={
+            "mock_safe": True,
+            "status_code_exception_map": {
+                "400": "django.core.exceptions.SuspiciousOperation"
+            },
+            "status_code_response_map": {},
+        }
+    )
+    def test_return_configured_maps(self):
+        action = self._make_action(models.verb_return, {"status_code": 400})
+        with self.assertRaises(SuspiciousOperation):
+            action.perform_return()
+        action = self._make_action(models.verb_return, {"status_code": 404})
+        self.assertEqual(404, action.perform_return().status_code)
+
+    def test_return_plan_is_prepared_once(self):
+        action = self._make_action(models.verb_return, {"status_code": 503})
+        action.perform_return()
+        with self.assertNumQueries(0):
+            response = action.perform_return()
+        self.assertEqual(503, response.status_code)
+
+    def test_exception_class_is_imported_once(self):
+        action = self._make_action(
+            models.verb_raise, {"exception": "django.http.Http404"}
+        )
+        with patch(
+            "django_chaos_engineering.models.import_string", return_value=Http404
+        ) as _import:
+            for i in range(2):
+                with self.assertRaises(Http404):
+                    action.perform_raise()
+        self.assertEqual(1, _import.call_count)
+
+    def test_exception_class_fallback(self):
+        action = self._make_action(models.verb_raise, {"exception": "no.Such"})
+        with self.assertRaises(models.ChaosActionResponse.default_exception):
+            action.perform_raise()
+
+    def _make_body_file(self):
+        body_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, body_dir)
+        with open(os.path.join(body_dir, "down.html"), "wb") as fh:
+            fh.write(b"<h1>Down</h1>")
+        return body_dir
+
+    def test_return_body_file(self):
+        body_dir = self._make_body_file()
+        action = self._make_action(
+            models.verb_return, {"status_code": 503, "body_file": "down.html"}
+        )
+        with override_settings(CHAOS={"mock_safe": True, "body_dir": body_dir}):
+            self.assertEqual(b"<h1>Down</h1>", action.perform_return().content)
+
+    def test_return_body_file_needs_body_dir(self):
+        body_dir = self._make_body_file()
+        action = self._make_action(
+            models.verb_return,
+            {"status_code": 503, "body_file": os.path.join(body_dir, "down.html")},
+        )
+        with self.assertLogs("django_chaos_engineering.models", "ERROR"):
+            content = action.perform_return().content
+        self.assertEqual(b"Chaos response 503", content)
+
+    def test_return_body_file_outside_body_dir(self):
+        body_dir = self._make_body_file()
+        for body_file in ("../down.html", "/etc/passwd", "sub/../../down.html"):
+            action = self._make_action(
+                models.verb_return, {"status_code": 503, "body_file": body_file}
+            )
+            with override_settings(
+                CHAOS={"mock_safe": True, "body_dir": os.path.join(body_dir, "sub")}
+            ):
+                with self.assertLogs("django_chaos_engineering.models", "ERROR"):
+                    content = action.perform_return().content
+            self.assertEqual(b"Chaos response 503", content)
+
+    @override_settings(
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {
+                    "loaders": [
+                        (
+                            "django.template.loaders.locmem.Loader",
+                            {"chaos.html": "Error {{ status_code }}"},
+                        )
+                    ]
+                },
+            }
+        ]
+    )
+    def test_return_body_template(self):
+        action = self._make_action(
+            models.verb_return, {"status_code": 503, "body_template": "chaos.html"}
+        )
+        self.assertEqual(b"Error 503", action.perform_return().content)
+
+    def test_return_body_kb(self):
+        action = self._make_action(
+            models.verb_return, {"status_code": 503, "body_kb": 100}
+        )
+        self.assertEqual(102400, len(action.perform_return().content))
+
+    def test_return_missing_body_file(self):
+        action = self._make_action(
+            models.verb_return, {"status_code": 503, "body_file": "/no/such/file"}
+        )
+        self.assertEqual(b"Chaos response 503", action.perform_return().content)
+
+    def test_return_headers(self):
+        action = self._make_action(
+            models.verb_return,
+            {
+                "status_code": 429,
+                "content_type": "application/json",
+                "headers": '{"Retry-After": 120}',
+            },
+        )
+        response = action.perform_return()
+        self.assertEqual("application/json", response["Content-Type"])
+        self.assertEqual("120", response["Retry-After"])
+
+    def test_return_invalid_headers(self):
+        action = self._make_action(
+            models.verb_return, {"status_code": 429, "headers": "Retry-After: 1"}
+        )
+        self.assertFalse(action.perform_return().has_header("Retry-After"))
+
+
+class ActionResponseLatencyTargetTest(TestCase):
+    def _make_action(self, config, verb=models.verb_slow):
+        return mockfn(verb=verb, enabled=True, probability=100, config=config)
+
+    def test_additive_by_default(self):
+        action = self._make_action({"slow_min": 10, "slow_max": 10})
+        self.assertEqual([], action.latency_targets)
+        self.assertFalse(action.pads)
+
+    def test_target_ms(self):
+        action = self._make_action({"target_ms": 300})
+        self.assertEqual([(100.0, 300)], action.latency_targets)
+        self.assertTrue(action.pads)
+        self.assertEqual(300, action._get_random_target())
+
+    def test_only_slow_actions_pad(self):
+        action = self._make_action({"target_ms": 300}, verb=models.verb_raise)
+        self.assertFalse(action.pads)
+
+    def test_percentiles(self):
+        action = self._make_action({"percentiles": "90:1000, 50:200"})
+        self.assertEqual([(50.0, 200), (90.0, 1000)], action.latency_targets)
+        with patch("django_chaos_engineering.models.random.uniform", lambda a, b: 20):
+            self.assertEqual(200, action._get_random_target())
+        with patch("django_chaos_engineering.models.random.uniform", lambda a, b: 70):
+            self.assertEqual(600, action._get_random_target())
+        with patch("django_chaos_engineering.models.random.uniform", lambda a, b: 95):
+            self.assertEqual(1000, action._get_random_target())
+
+    def test_invalid_percentiles_fall_back(self):
+        action = self._make_action({"percentiles": "150:200", "target_ms": 100})
+        with self.assertLogs("django_chaos_engineering.models", "ERROR"):
+            self.assertEqual([(100.0, 100)], action.latency_targets)
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_perform_pad(self, _sleep):
+        action = self._make_action({"target_ms": 300})
+        self.assertEqual(200, action.perform_pad(100))
+        _sleep.assert_called_once_with(0.2)
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_perform_pad_slow_view(self, _sleep):
+        action = self._make_action({"target_ms": 300})
+        self.assertEqual(0, action.perform_pad(450))
+        _sleep.assert_not_called()
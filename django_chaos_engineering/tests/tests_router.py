@@ -1,11 +1,17 @@
+from datetime import timedelta
 from operator import attrgetter
 from unittest.mock import patch
 
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection, connections, router
 from django.test import TestCase
 from django.test.utils import override_settings
+from django.utils import timezone
 
-from django_chaos_engineering import mock_data, models
+from django_chaos_engineering import bulk, exceptions, mock_data, models
 from django_chaos_engineering.routers import ChaosRouter
+from django_chaos_engineering.targeting import acting_user
 from django.contrib.sites.models import Site as TestModel
 
 
@@ -23,6 +29,32 @@ test_model_value_map = {
 }
 
 
+class ReplicaRouter:
+    """
+    Send reads of the test model to the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model is TestModel:
+            return "replica"
+        return None
+
+
+class RandomReplicaRouter:
+    """
+    Send reads of the test model to a "random" database, like many replica
+    routers do.
+    """
+
+    def __init__(self):
+        self.aliases = iter(["replica", "default"] * 10)
+
+    def db_for_read(self, model, **hints):
+        if model is TestModel:
+            return next(self.aliases)
+        return None
+
+
 class RouterUnitTest(TestCase):
     #: Models we want to test
     models = [
@@ -102,3 +134,206 @@ class RouterUnitTest(TestCase):
         )
         self.router.db_for_write(TestModel)
         self.assertEqual(1, _sleep.call_count)
+
+    def test_action_wildcard_value_is_performed_for_write(self):
+        mock_data.make_action_db(
+            act_on_value="",
+            act_on_attribute=models.ChaosActionDB.attr_default,
+            enabled=True,
+            verb=models.verb_raise,
+            probability=100,
+        )
+        with self.assertRaises(models.ChaosActionDB.default_exception):
+            self.router.db_for_write(TestModel)
+
+    def test_action_ended_is_not_performed_for_write(self):
+        action = mock_data.make_action_db(
+            act_on_value=TEST_APP_LABEL,
+            act_on_attribute=models.ChaosActionDB.attr_default,
+            enabled=True,
+            verb=models.verb_raise,
+            probability=100,
+        )
+        action.active_until = timezone.now() - timedelta(seconds=1)
+        action.save()
+        self.router.db_for_write(TestModel)
+
+
+class RouterAliasTest(TestCase):
+    def setUp(self):
+        self.router = ChaosRouter()
+
+    def _make_action(self, alias):
+        return mock_data.make_action_db(
+            act_on_value=TEST_APP_LABEL,
+            act_on_attribute=models.ChaosActionDB.attr_default,
+            act_on_alias=alias,
+            enabled=True,
+            verb=models.verb_raise,
+            probability=100,
+        )
+
+    def test_get_alias_skips_chaos_routers(self):
+        with patch.object(router, "routers", [self.router, ReplicaRouter()]):
+            self.assertEqual("replica", self.router.get_alias("db_for_read", TestModel))
+            self.assertEqual("default", self.router.get_alias("db_for_write", TestModel))
+
+    def test_get_alias_uses_instance(self):
+        instance = TestModel()
+        instance._state.db = "replica"
+        alias = self.router.get_alias("db_for_write", TestModel, instance=instance)
+        self.assertEqual("replica", alias)
+
+    def test_action_for_replica(self):
+        self._make_action("replica")
+        with patch.object(router, "routers", [self.router, ReplicaRouter()]):
+            self.router.db_for_write(TestModel)
+            with self.assertRaises(models.ChaosActionDB.default_exception):
+                self.router.db_for_read(TestModel)
+
+    def test_alias_is_decided_once(self):
+        self._make_action("replica")
+        random_router = RandomReplicaRouter()
+        with patch.object(router, "routers", [self.router, random_router]):
+            self.router.db_for_write(TestModel)
+            with self.assertRaises(models.ChaosActionDB.default_exception):
+                router.db_for_read(TestModel)
+        # Queries the action doesn't fire on go where it said
+        models.ChaosActionDB.objects.update(act_on_alias="default")
+        models.ChaosGeneration.objects.bump()
+        random_router = RandomReplicaRouter()
+        with patch.object(router, "routers", [self.router, random_router]):
+            self.assertEqual("replica", router.db_for_read(TestModel))
+            self.assertEqual("default", next(random_router.aliases))
+
+    def test_alias_is_left_to_other_routers(self):
+        with patch.object(router, "routers", [self.router, ReplicaRouter()]):
+            self.assertIsNone(self.router.db_for_read(TestModel))
+
+    def test_action_for_replica_without_replica_router(self):
+        self._make_action("replica")
+        self.router.db_for_read(TestModel)
+
+    def test_action_for_default(self):
+        self._make_action("default")
+        with self.assertRaises(models.ChaosActionDB.default_exception):
+            self.router.db_for_write(TestModel)
+
+    def test_unknown_alias(self):
+        with self.assertRaises(ValidationError):
+            self._make_action("nonsense")
+
+
+class RouterRerouteTest(TestCase):
+    def setUp(self):
+        self.router = ChaosRouter()
+
+    def _make_action(self, alias, **kwargs):
+        return mock_data.make_action_db(
+            act_on_value=TEST_APP_LABEL,
+            act_on_attribute=models.ChaosActionDB.attr_default,
+            enabled=True,
+            verb=models.verb_reroute,
+            config={models.ChaosKV.attr_alias: alias},
+            **kwargs
+        )
+
+    def test_reroute_for_read_and_write(self):
+        self._make_action("replica", probability=100)
+        self.assertEqual("replica", self.router.db_for_read(TestModel))
+        self.assertEqual("replica", self.router.db_for_write(TestModel))
+
+    def test_reroute_not_fired(self):
+        self._make_action("replica", probability=0)
+        self.assertIsNone(self.router.db_for_read(TestModel))
+
+    @patch("django_chaos_engineering.models.logger.error")
+    def test_reroute_unknown_alias(self, _error):
+        self._make_action("nonsense", probability=100)
+        self.assertIsNone(self.router.db_for_read(TestModel))
+        self.assertEqual(1, _error.call_count)
+
+    def test_reroute_other_model(self):
+        self._make_action("replica", probability=100)
+        self.assertIsNone(self.router.db_for_read(models.ChaosKV))
+
+
+class RouterDropTest(TestCase):
+    def setUp(self):
+        self.router = ChaosRouter()
+
+    def _make_action(self, drop):
+        return mock_data.make_action_db(
+            act_on_value=TEST_APP_LABEL,
+            act_on_attribute=models.ChaosActionDB.attr_default,
+            enabled=True,
+            verb=models.verb_drop,
+            probability=100,
+            config={models.ChaosKV.attr_drop: drop},
+        )
+
+    def test_drop_closes_connection(self):
+        self._make_action(models.ChaosActionDB.drop_close)
+        with patch.object(connections["replica"], "close") as close:
+            with patch.object(router, "routers", [self.router, ReplicaRouter()]):
+                self.assertEqual("replica", self.router.db_for_read(TestModel))
+        self.assertEqual(1, close.call_count)
+
+    def test_drop_fails_next_statement(self):
+        action = self._make_action(models.ChaosActionDB.drop_error)
+        # Routing the query itself fails it
+        with self.assertRaises(OperationalError):
+            TestModel.objects.count()
+        self.assertEqual([], connection.execute_wrappers)
+        models.ChaosActionDB.objects.filter(pk=action.pk).update(enabled=False)
+        models.ChaosGeneration.objects.bump()
+        self.assertEqual(1, TestModel.objects.count())
+
+
+class RouterTargetingTest(TestCase):
+    def setUp(self):
+        self.user = mock_data.make_user()
+        self.group = mock_data.make_group()
+
+    def _make_action(self, **kwargs):
+        return mock_data.make_action_db(
+            act_on_value="",
+            enabled=True,
+            verb=models.verb_raise,
+            probability=100,
+            **kwargs
+        )
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_storm_only_acts_for_its_users(self, _sleep):
+        bulk.create_storm(
+            [self.user.pk],
+            [],
+            timezone.now() + timedelta(minutes=5),
+            {key: 100 for key in models.action_models},
+        )
+        self.assertEqual(1, TestModel.objects.count())
+        with acting_user(mock_data.make_user()):
+            self.assertEqual(1, TestModel.objects.count())
+        with acting_user(self.user):
+            with self.assertRaises(exceptions.ChaosExceptionDB):
+                TestModel.objects.count()
+
+    def test_group_targeting(self):
+        self._make_action(for_groups=[self.group])
+        with acting_user(self.user):
+            self.assertEqual(1, TestModel.objects.count())
+        self.user.groups.add(self.group)
+        with acting_user(self.user):
+            with self.assertRaises(exceptions.ChaosExceptionDB):
+                TestModel.objects.count()
+
+    def test_anonymous_users_are_never_targeted(self):
+        self._make_action(for_users=[self.user])
+        with acting_user(AnonymousUser()):
+            self.assertEqual(1, TestModel.objects.count())
+
+    def test_untargeted_actions_act_for_everyone(self):
+        self._make_action()
+        with self.assertRaises(exceptions.ChaosExceptionDB):
+            TestModel.objects.count()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from django_chaos_engineering import mock_data, models, shared, snapshot
+
+
+class SharedSnapshotTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, "snapshot")
+        snapshot.clear()
+        self.addCleanup(snapshot.clear)
+        override = override_settings(
+            CHAOS={"mock_safe": True, "counters": False, "snapshot_file": self.path}
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _make_action(self, **kwargs):
+        action = mock_data.make_action_response(
+            verb=models.verb_return,
+            act_on_url_name="test_view",
+            config={"status_code": 500},
+            probability=100,
+            enabled=True,
+            **kwargs
+        )
+        action.active_until = timezone.now() + timedelta(hours=1)
+        action.save()
+        return action
+
+    def test_round_trip(self):
+        action = self._make_action()
+        user = mock_data.make_user()
+        action.for_users.add(user)
+        published = snapshot.publish(self.path)
+        version, actions, targets = shared.SnapshotFile(self.path).read()
+        self.assertEqual(published.version, version)
+        (read,) = actions[models.ChaosActionResponse.model_key]
+        self.assertEqual(action.pk, read.pk)
+        self.assertEqual(action.probability, read.probability)
+        self.assertEqual(
+            action.active_until.replace(microsecond=0),
+            read.active_until.replace(microsecond=0),
+        )
+        self.assertEqual({"status_code": "500"}, read.args)
+        self.assertEqual(({user.pk}, set()), targets[(read.model_key, read.pk)])
+
+    def test_other_hosts_are_published_but_not_read(self):
+        self._make_action(on_host="elsewhere.example.com")
+        self.assertEqual(1, len(snapshot.publish(self.path)))
+        version, actions, targets = shared.SnapshotFile(self.path).read()
+        self.assertEqual([], actions[models.ChaosActionResponse.model_key])
+
+    def test_get_snapshot_reads_the_file(self):
+        self._make_action()
+        snapshot.publish(self.path)
+        with self.assertNumQueries(0):
+            snap = snapshot.get_snapshot()
+        self.assertEqual(1, len(snap))
+        self.assertIs(snap, snapshot.get_snapshot())
+        self.assertEqual(500, Client().get(reverse("test_view")).status_code)
+
+    def test_new_generation_is_swapped_in(self):
+        action = self._make_action()
+        snapshot.publish(self.path)
+        self.assertEqual(1, len(snapshot.get_snapshot()))
+        action.enabled = False
+        action.save()
+        # Not published yet
+        self.assertEqual(1, len(snapshot.get_snapshot()))
+        snapshot.publish(self.path)
+        self.assertEqual(0, len(snapshot.get_snapshot()))
+
+    def test_falls_back_to_the_database(self):
+        self._make_action()
+        self.assertEqual(1, len(snapshot.get_snapshot()))
+
+    def test_invalid_file_falls_back_to_the_database(self):
+        self._make_action()
+        with open(self.path, "wb") as fh:
+            fh.write(b"nonsense")
+        with self.assertLogs("django_chaos_engineering.snapshot", "ERROR"):
+            self.assertEqual(1, len(snapshot.get_snapshot()))
+
+    def test_empty_file_is_invalid(self):
+        open(self.path, "wb").close()
+        with self.assertRaises(ValueError):
+            shared.SnapshotFile(self.path).version()
+
+    @patch("django_chaos_engineering.shared.os.replace", side_effect=OSError)
+    def test_failed_write_leaves_no_temporary_file(self, _replace):
+        with self.assertRaises(OSError):
+            shared.write(self.path, b"content")
+        self.assertEqual([], os.listdir(self.dir.name))
@@ -0,0 +1,235 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.sites.models import Site
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from django_chaos_engineering import mock_data, models, snapshot
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        self.c = Client()
+        snapshot.clear()
+
+    def _make_action(self, **kwargs):
+        action = mock_data.make_action_response(
+            verb=models.verb_return,
+            act_on_url_name="test_view",
+            config={"status_code": 500},
+            probability=100,
+            enabled=True,
+        )
+        for key, value in kwargs.items():
+            setattr(action, key, value)
+        action.save()
+        return action
+
+    def _for_request(self, snap, user, now):
+        request = RequestFactory().get(reverse("test_view"))
+        request.resolver_match = resolve(request.path_info)
+        request.user = user
+        return list(snap.for_request(request, now))
+
+    def test_scheduled_action_is_not_performed(self):
+        self._make_action(active_from=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(200, self.c.get(reverse("test_view")).status_code)
+
+    def test_started_action_is_performed(self):
+        self._make_action(
+            active_from=timezone.now() - timedelta(minutes=5),
+            active_until=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(500, self.c.get(reverse("test_view")).status_code)
+
+    def test_ended_action_is_not_performed(self):
+        self._make_action(active_until=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(200, self.c.get(reverse("test_view")).status_code)
+
+    def test_time_window_uses_clock(self):
+        start = timezone.now() + timedelta(minutes=5)
+        action = self._make_action(
+            active_from=start, active_until=start + timedelta(minutes=15)
+        )
+        snap = snapshot.get_snapshot()
+        user = mock_data.make_user()
+        self.assertEqual([], self._for_request(snap, user, timezone.now()))
+        later = start + timedelta(minutes=1)
+        self.assertEqual([action], self._for_request(snap, user, later))
+
+    def test_invalid_time_window(self):
+        now = timezone.now()
+        action = models.ChaosActionResponse(
+            verb=models.verb_slow, active_from=now, active_until=now
+        )
+        with self.assertRaises(ValidationError):
+            action.full_clean()
+
+    def test_snapshot_is_reused(self):
+        self._make_action()
+        snap = snapshot.get_snapshot()
+        # Only the generation is queried
+        with self.assertNumQueries(1):
+            self.assertIs(snap, snapshot.get_snapshot())
+
+    @override_settings(CHAOS={"mock_safe": True, "snapshot_ttl": 60})
+    def test_snapshot_ttl(self):
+        snap = snapshot.get_snapshot()
+        with self.assertNumQueries(0):
+            self.assertIs(snap, snapshot.get_snapshot())
+
+    @override_settings(CHAOS={"mock_safe": True})
+    def test_default_snapshot_ttl(self):
+        snap = snapshot.get_snapshot()
+        with self.assertNumQueries(0):
+            self.assertIs(snap, snapshot.get_snapshot())
+
+    @override_settings(CHAOS={"mock_safe": True, "snapshot_ttl": 60})
+    def test_own_changes_expire_the_snapshot(self):
+        action = self._make_action()
+        self.assertEqual(1, len(snapshot.get_snapshot()))
+        action.disable()
+        self.assertEqual(0, len(snapshot.get_snapshot()))
+
+    def test_snapshot_reloads_on_change(self):
+        action = self._make_action()
+        self.assertEqual(1, len(snapshot.get_snapshot()))
+        action.disable()
+        self.assertEqual(0, len(snapshot.get_snapshot()))
+
+    def test_kvs_are_prefetched(self):
+        self._make_action()
+        action = snapshot.get_snapshot().get_actions("response")[0]
+        with self.assertNumQueries(0):
+            self.assertEqual(500, action.get_arg("status_code", 200))
+
+    def test_user_targeting(self):
+        user = mock_data.make_user()
+        other = mock_data.make_user()
+        group = mock_data.make_group()
+        user.groups.add(group)
+        for_user = mock_data.make_action_response(
+            act_on_url_name="", for_users=[user], enabled=True
+        )
+        for_group = mock_data.make_action_response(
+            act_on_url_name="", for_groups=[group], enabled=True
+        )
+        snap = snapshot.get_snapshot()
+        now = timezone.now()
+        self.assertEqual(
+            {for_user, for_group}, set(self._for_request(snap, user, now))
+        )
+        self.assertEqual([], self._for_request(snap, other, now))
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_router_model_matching(self, _sleep):
+        mock_data.make_action_db(
+            verb=models.verb_slow,
+            act_on_attribute=models.ChaosActionDB.attr_default,
+            act_on_value="sites",
+            probability=100,
+            enabled=True,
+        )
+        snap = snapshot.get_snapshot()
+        self.assertEqual(1, len(list(snap.for_model(Site, timezone.now()))))
+        self.assertEqual(0, len(list(snap.for_model(models.ChaosKV, timezone.now()))))
+
+
+class WarmupTest(TestCase):
+    def setUp(self):
+        snapshot.clear()
+        self.addCleanup(snapshot.clear)
+
+    def test_warmup_prepares_actions(self):
+        action = mock_data.make_action_response(
+            verb=models.verb_return,
+            act_on_url_name="test_view",
+            config={"status_code": 503},
+            enabled=True,
+        )
+        action.request_match = "method:POST"
+        action.save()
+        snap = snapshot.warmup()
+        self.assertIn("url_matcher", snap.__dict__)
+        self.assertIn("cache_prefixes", snap.__dict__)
+        (warmed,) = snap.get_actions(models.ChaosActionResponse.model_key)
+        self.assertEqual(action, warmed)
+        for attr in ("args", "request_predicates", "return_plan"):
+            self.assertIn(attr, warmed.__dict__)
+        self.assertEqual(503, warmed.return_plan.status_code)
+
+    def test_warmup_skips_broken_actions(self):
+        mock_data.make_action_response(
+            verb=models.verb_slow,
+            act_on_url_name="test_view",
+            config={"slow_min": "fast"},
+            enabled=True,
+        )
+        with self.assertLogs("django_chaos_engineering.snapshot", "ERROR"):
+            snap = snapshot.warmup()
+        self.assertEqual(1, len(snap))
+
+
+@override_settings(CHAOS={"mock_safe": True, "snapshot_refresh": 60})
+class RefreshTest(TestCase):
+    def setUp(self):
+        snapshot.clear()
+        self.addCleanup(snapshot.clear)
+
+    def _make_action(self):
+        return mock_data.make_action_response(
+            verb=models.verb_slow, act_on_url_name="test_view", enabled=True
+        )
+
+    def test_requests_dont_reload(self):
+        action = self._make_action()
+        snap = snapshot.get_snapshot()
+        self.assertTrue(snapshot._refresher.thread.is_alive())
+        # Like another process, without expiring the snapshot of this one
+        models.ChaosActionResponse.objects.filter(pk=action.pk).update(enabled=False)
+        models.ChaosGeneration.objects.update(generation=F("generation") + 1)
+        with self.assertNumQueries(0):
+            self.assertIs(snap, snapshot.get_snapshot())
+
+    def test_changes_of_this_process_apply_right_away(self):
+        action = self._make_action()
+        snapshot.get_snapshot()
+        self.assertTrue(snapshot._refresher.thread.is_alive())
+        action.disable()
+        self.assertEqual(0, len(snapshot.get_snapshot()))
+        with self.assertNumQueries(0):
+            snapshot.get_snapshot()
+
+    def test_refresh_swaps_in_a_warm_snapshot(self):
+        action = self._make_action()
+        snap = snapshot.get_snapshot()
+        action.disable()
+        refreshed = snapshot.refresh(warm=True)
+        self.assertIsNot(snap, refreshed)
+        self.assertIn("url_matcher", refreshed.__dict__)
+        self.assertIs(refreshed, snapshot.get_snapshot())
+        self.assertEqual(0, len(refreshed))
+
+    def test_dead_refresher_is_replaced(self):
+        snapshot.get_snapshot()
+        thread = snapshot._refresher.thread
+        thread.stop()
+        thread.join()
+        snapshot.get_snapshot()
+        self.assertIsNot(thread, snapshot._refresher.thread)
+        self.assertTrue(snapshot._refresher.thread.is_alive())
+
+    @patch("django_chaos_engineering.snapshot.refresh")
+    def test_thread_refreshes(self, refresh):
+        snapshot._refresher.function()
+        refresh.assert_called_once_with(warm=True)
+
+    @override_settings(CHAOS={"mock_safe": True})
+    def test_disabled_by_default(self):
+        snapshot.get_snapshot()
+        self.assertIsNone(snapshot._refresher.thread)
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from django_chaos_engineering import mock_data, models
+from django_chaos_engineering.storage import ChaosStorage, ThrottledFile
+
+
+class ChaosStorageTest(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ChaosStorage(location=self.location, base_url="/media/")
+
+    def _make_action(self, verb, prefix="uploads/", **kwargs):
+        kwargs.setdefault("probability", 100)
+        return mock_data.make_action_storage(
+            verb=verb, act_on_prefix=prefix, enabled=True, **kwargs
+        )
+
+    def test_no_actions(self):
+        name = self.storage.save("uploads/a.txt", ContentFile(b"data"))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual("/media/uploads/a.txt", self.storage.url(name))
+        self.assertEqual(([], ["a.txt"]), self.storage.listdir("uploads"))
+        with self.storage.open(name) as fh:
+            self.assertEqual(b"data", fh.read())
+
+    @override_settings(
+        CHAOS={
+            "mock_safe": True,
+            "storage_backend": "django.core.files.storage.FileSystemStorage",
+        }
+    )
+    def test_backend_setting(self):
+        storage = ChaosStorage(location=self.location)
+        self.assertEqual(self.location, storage.storage.location)
+
+    def test_raise(self):
+        self._make_action(models.verb_raise, act_on_method="exists")
+        with self.assertRaises(OSError):
+            self.storage.exists("uploads/a.txt")
+        self.assertFalse(self.storage.exists("other.txt"))
+
+    def test_raise_other_method(self):
+        self._make_action(models.verb_raise, act_on_method="url")
+        self.storage.exists("uploads/a.txt")
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_slow(self, _sleep):
+        self._make_action(
+            models.verb_slow,
+            config={
+                models.ChaosKV.attr_slow_min: 10,
+                models.ChaosKV.attr_slow_max: 10,
+            },
+        )
+        self.storage.url("uploads/a.txt")
+        _sleep.assert_called_once_with(0.01)
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_throttle_write(self, _sleep):
+        self._make_action(
+            models.verb_throttle,
+            act_on_method="save",
+            config={models.ChaosKV.attr_bytes_per_second: 1000},
+        )
+        self.storage.save("uploads/a.txt", ContentFile(b"x" * 500))
+        _sleep.assert_called_once_with(0.5)
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_throttle_read(self, _sleep):
+        name = self.storage.save("uploads/a.txt", ContentFile(b"x" * 2000))
+        self._make_action(
+            models.verb_throttle,
+            act_on_method="open",
+            config={models.ChaosKV.attr_bytes_per_second: 1000},
+        )
+        with self.storage.open(name) as fh:
+            self.assertIsInstance(fh, ThrottledFile)
+            self.assertEqual(2000, sum(len(chunk) for chunk in fh.chunks(500)))
+        self.assertEqual([0.5] * 4, [call[0][0] for call in _sleep.call_args_list])
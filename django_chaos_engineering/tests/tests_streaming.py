@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from django_chaos_engineering import streaming
+
+
+class StreamingTest(TestCase):
+    def setUp(self):
+        self.pulled = []
+        self.delays = []
+
+    def _content(self):
+        for chunk in (b"aaa", b"bbb", b"ccc"):
+            self.pulled.append(chunk)
+            yield chunk
+
+    def _delay(self):
+        self.delays.append(len(self.pulled))
+
+    def test_drip(self):
+        self.assertEqual(
+            [b"aaa", b"bbb", b"ccc"], list(streaming.drip(self._content(), self._delay))
+        )
+        self.assertEqual([2, 3], self.delays)
+
+    def test_stall_inside_chunk(self):
+        chunks = list(streaming.stall(self._content(), 4, self._delay))
+        self.assertEqual([b"aaa", b"b", b"bb", b"ccc"], chunks)
+        self.assertEqual([2], self.delays)
+
+    def test_stall_at_chunk_boundary(self):
+        chunks = list(streaming.stall(self._content(), 3, self._delay))
+        self.assertEqual([b"aaa", b"bbb", b"ccc"], chunks)
+        self.assertEqual([1], self.delays)
+
+    def test_stall_after_end(self):
+        list(streaming.stall(self._content(), 100, self._delay))
+        self.assertEqual([], self.delays)
+
+    def test_truncate_is_lazy(self):
+        self.assertEqual([b"aaa", b"b"], list(streaming.truncate(self._content(), 4)))
+        self.assertEqual([b"aaa", b"bbb"], self.pulled)
+
+    def test_truncate_at_start(self):
+        self.assertEqual([], list(streaming.truncate(self._content(), 0)))
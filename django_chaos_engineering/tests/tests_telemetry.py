@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from django_chaos_engineering import mock_data, models, telemetry
+
+
+class EventBufferTest(TestCase):
+    def test_drain_empties_buffer(self):
+        buf = telemetry.EventBuffer(size=10)
+        buf.append({"foo": 1})
+        buf.append({"foo": 2})
+        self.assertEqual([{"foo": 1}, {"foo": 2}], buf.drain())
+        self.assertEqual(0, len(buf))
+
+    def test_ring_buffer_drops_oldest(self):
+        buf = telemetry.EventBuffer(size=2)
+        for i in range(3):
+            buf.append({"foo": i})
+        self.assertEqual([{"foo": 1}, {"foo": 2}], buf.drain())
+
+
+class TelemetryMixin:
+    """
+    Start and end every test with empty buffers.
+    """
+
+    def setUp(self):
+        self.c = Client()
+        self._drain()
+        self.addCleanup(self._drain)
+
+    def _drain(self):
+        telemetry._events.drain()
+        telemetry._counters.drain()
+
+
+class EventLogTest(TelemetryMixin, TestCase):
+    def _make_slow_action(self):
+        return mock_data.make_action_response(
+            verb=models.verb_slow,
+            act_on_url_name="test_view",
+            config={"slow_min": 10, "slow_max": 10},
+            probability=100,
+            enabled=True,
+        )
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_no_events_without_setting(self, _sleep):
+        self._make_slow_action()
+        self.c.get(reverse("test_view"))
+        self.assertEqual(0, len(telemetry._events))
+
+    @override_settings(CHAOS={"mock_safe": True, "event_log": "db", "flush_interval": 0})
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_events_are_buffered_until_flush(self, _sleep):
+        action = self._make_slow_action()
+        self.c.get(reverse("test_view"))
+        self.assertEqual(1, len(telemetry._events))
+        self.assertEqual(0, models.ChaosEvent.objects.count())
+        telemetry.flush()
+        event = models.ChaosEvent.objects.get()
+        self.assertEqual(action.pk, event.action_id)
+        self.assertEqual("response", event.model)
+        self.assertEqual(models.verb_slow, event.verb)
+        self.assertEqual("test_view", event.target)
+        self.assertEqual(10, event.injected_ms)
+
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_events_jsonl(self, _sleep):
+        self._make_slow_action()
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        chaos = {"event_log": "jsonl", "event_log_file": path, "flush_interval": 0}
+        with override_settings(CHAOS=chaos):
+            self.c.get(reverse("test_view"))
+            self.c.get(reverse("test_view"))
+            self.assertEqual(2, telemetry.flush_events())
+        with open(path) as fh:
+            events = [json.loads(line) for line in fh]
+        self.assertEqual(2, len(events))
+        self.assertEqual("test_view", events[0]["target"])
+
+    @override_settings(CHAOS={"event_log": "nonsense", "flush_interval": 0})
+    @patch("django_chaos_engineering.telemetry.logger.error")
+    def test_unknown_sink_is_logged(self, _error):
+        telemetry.record_event("db", 1, models.verb_raise, "sites.Site")
+        self.assertEqual(0, telemetry.flush_events())
+        self.assertEqual(1, _error.call_count)
+
+
+@override_settings(CHAOS={"mock_safe": True, "flush_interval": 0})
+class ActionCountersTest(TelemetryMixin, TestCase):
+    @patch("django_chaos_engineering.models.time.sleep")
+    def test_counters_are_flushed_in_bulk(self, _sleep):
+        fired = mock_data.make_action_response(
+            verb=models.verb_slow,
+            act_on_url_name="test_view",
+            config={"slow_min": 10, "slow_max": 10},
+            probability=100,
+            enabled=True,
+        )
+        skipped = mock_data.make_action_response(
+            verb=models.verb_slow,
+            act_on_url_name="test_view",
+            probability=0,
+            enabled=True,
+        )
+        for i in range(3):
+            self.c.get(reverse("test_view"))
+        fired.refresh_from_db()
+        self.assertEqual(0, fired.evaluations)
+        with self.assertNumQueries(1):
+            self.assertEqual(2, telemetry.flush_counters())
+        fired.refresh_from_db()
+        skipped.refresh_from_db()
+        self.assertEqual(3, fired.evaluations)
+        self.assertEqual(3, fired.firings)
+        self.assertEqual(30, fired.injected_ms)
+        self.assertEqual(3, skipped.evaluations)
+        self.assertEqual(0, skipped.firings)
+
+    def test_flush_adds_to_stored_counters(self):
+        action = mock_data.make_action_db(enabled=True)
+        models.ChaosActionDB.objects.filter(pk=action.pk).update(evaluations=5)
+        telemetry.count_action("db", action.pk, fired=False)
+        telemetry.flush_counters()
+        action.refresh_from_db()
+        self.assertEqual(6, action.evaluations)
+
+    @override_settings(CHAOS={"counters": False})
+    def test_counters_disabled(self):
+        telemetry.count_action("db", 1, fired=True)
+        self.assertEqual(0, len(telemetry._counters))
+
+
+@override_settings(CHAOS={"mock_safe": True, "flush_interval": 60})
+class PeriodicTaskTest(TestCase):
+    def setUp(self):
+        self.task = telemetry.PeriodicTask("chaos-test", Mock(), "flush_interval")
+        self.addCleanup(self.task.stop)
+
+    def test_thread_is_started_once(self):
+        self.assertTrue(self.task.ensure())
+        thread = self.task.thread
+        self.assertTrue(thread.is_alive())
+        self.assertTrue(self.task.ensure())
+        self.assertIs(thread, self.task.thread)
+
+    def test_dead_thread_is_replaced(self):
+        self.task.ensure()
+        thread = self.task.thread
+        thread.stop()
+        thread.join()
+        self.task.ensure()
+        self.assertIsNot(thread, self.task.thread)
+        self.assertTrue(self.task.thread.is_alive())
+
+    @override_settings(CHAOS={"mock_safe": True, "flush_interval": 0})
+    def test_disabled_by_a_falsy_setting(self):
+        self.assertFalse(self.task.ensure())
+        self.assertIsNone(self.task.thread)
+
+    @patch("django_chaos_engineering.telemetry.connection")
+    def test_thread_calls_the_function(self, connection):
+        function = Mock(side_effect=[ValueError, None])
+        thread = telemetry.PeriodicThread("chaos-test", 5, function)
+        with patch.object(thread.stopped, "wait", side_effect=[False, False, True]):
+            with self.assertLogs("django_chaos_engineering.telemetry", "ERROR"):
+                thread.run()
+        self.assertEqual(2, function.call_count)
+        self.assertEqual(2, connection.close.call_count)
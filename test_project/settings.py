@@ -4,7 +4,21 @@ import os
 SECRET_KEY = "test_secret"
 DEBUG = False
 USE_TZ = True
-DATABASES = {"default": {"NAME": "db.sqlite3", "ENGINE": "django.db.backends.sqlite3"}}
+DATABASES = {
+    "default": {"NAME": "db.sqlite3", "ENGINE": "django.db.backends.sqlite3"},
+    "replica": {
+        "NAME": "db.sqlite3",
+        "ENGINE": "django.db.backends.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
+}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "chaos": {
+        "BACKEND": "django_chaos_engineering.cache.ChaosCacheBackend",
+        "LOCATION": "default",
+    },
+}
 ROOT_URLCONF = "test_project.urls"
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -49,7 +63,7 @@ TEMPLATES = [
     }
 ]
 SITE_ID = 1
-CHAOS = {"mock_safe": True}
+CHAOS = {"mock_safe": True, "counters": False, "flush_interval": 0, "snapshot_ttl": 0}
 LANGUAGE_CODE = "en"
 LANGUAGES = [("de", "German"), ("en", "English")]
 LOGGING = {
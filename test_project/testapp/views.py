@@ -1,5 +1,14 @@
-from django.http import HttpResponse
+from django.contrib.sites.models import Site
+from django.http import HttpResponse, StreamingHttpResponse
 
 
 def test_view(request):
     return HttpResponse("<html><body>Test view</body></html>")
+
+
+def test_stream_view(request):
+    return StreamingHttpResponse(b"x" * 100 for i in range(10))
+
+
+def test_db_view(request):
+    return HttpResponse("Sites: {}".format(Site.objects.count()))
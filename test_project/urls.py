@@ -6,5 +6,7 @@ from django.urls import path
 
 urlpatterns = [
     path("test_view/", views.test_view, name="test_view"),
+    path("test_stream_view/", views.test_stream_view, name="test_stream_view"),
+    path("test_db_view/", views.test_db_view, name="test_db_view"),
     path("admin/", admin.site.urls),
 ]